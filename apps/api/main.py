@@ -1,27 +1,29 @@
 """
 FastAPI RAG API za CBCG SEPA chatbot.
+
+Teške zavisnosti (openai, numpy/faiss, encoder, index) se ne importuju pri startu:
+učitavaju se pri prvoj upotrebi ili u pozadinskom warmup-u (STARTUP_WARMUP).
 """
+import threading
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from .schemas import AskRequest, AskResponse, Source
-from .rag_pipeline import synthesize_answer
+from .rag_pipeline import synthesize_answer, get_client
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# OpenAI client za LLM-based provere
-openai_client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
-)
-
 # Choose retrieval based on environment
 # If Azure credentials are not configured or are placeholders, use mock
 AZURE_ENDPOINT = os.getenv("AZURE_SEARCH_ENDPOINT", "")
 AZURE_KEY = os.getenv("AZURE_SEARCH_API_KEY", "")
+STARTUP_WARMUP = os.getenv("STARTUP_WARMUP", "true").lower() in ("1", "true", "yes")
+# Dijagnostički endpoint-i (/memory) - isključeni u produkciji
+DEBUG_ENDPOINTS = os.getenv("DEBUG_ENDPOINTS", "false").lower() in ("1", "true", "yes")
 
 USE_AZURE = (
     AZURE_ENDPOINT and 
@@ -34,13 +36,27 @@ if USE_AZURE:
     from .retrieval import retrieve
     print("Using Azure Search for retrieval")
 else:
-    from .retrieval_mock import retrieve
+    def retrieve(query: str, k: int = 8) -> list:
+        """Lokalni retrieval; retrieval_mock (numpy, faiss, index) se importuje pri prvom pozivu ili u warmup-u."""
+        from .retrieval_mock import retrieve as local_retrieve
+        return local_retrieve(query, k)
     print("Using MOCK retrieval (no Azure configured)")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warmup u pozadinskoj niti - worker prima zahtjeve odmah, a modeli se učitavaju paralelno."""
+    if STARTUP_WARMUP:
+        from .preload import warmup
+        threading.Thread(target=warmup, args=(not USE_AZURE,), name="warmup", daemon=True).start()
+    yield
+
+
 app = FastAPI(
     title="CBCG SEPA Bot",
     version="0.1.0",
-    description="RAG chatbot za Centralnu banku Crne Gore"
+    description="RAG chatbot za Centralnu banku Crne Gore",
+    lifespan=lifespan
 )
 
 # Enable CORS
@@ -100,7 +116,7 @@ def extract_sources(answer_text: str, ctx_docs: list, question: str) -> list[Sou
         return []  # Sigurno je generički odgovor/disclaimer - ne daj izvor
     
     try:
-        disclaimer_check = openai_client.chat.completions.create(
+        disclaimer_check = get_client().chat.completions.create(
             model="gpt-4o-mini",  # Brz i jeftin za jednostavne DA/NE provere
             messages=[
                 {
@@ -437,7 +453,7 @@ def extract_sources(answer_text: str, ctx_docs: list, question: str) -> list[Sou
         # LLM-BASED PROVERA: Da li odgovor odgovara na pitanje?
         # Koristi GPT-4o da inteligentno proveri da li odgovor zapravo odgovara na pitanje
         try:
-            relevance_check = openai_client.chat.completions.create(
+            relevance_check = get_client().chat.completions.create(
                 model="gpt-4o-mini",  # Brz i jeftin za jednostavne DA/NE provere
                 messages=[
                     {
@@ -474,7 +490,7 @@ def extract_sources(answer_text: str, ctx_docs: list, question: str) -> list[Sou
     if best_doc:
         # LLM-BASED PROVERA: Da li izvor je zapravo relevantan za odgovor?
         try:
-            source_relevance_check = openai_client.chat.completions.create(
+            source_relevance_check = get_client().chat.completions.create(
                 model="gpt-4o-mini",  # Brz i jeftin za jednostavne DA/NE provere
                 messages=[
                     {
@@ -690,6 +706,15 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/memory")
+def memory():
+    """Memorija ovog worker-a u MB (pss < rss kad worker dijeli preload iz gunicorn master-a); samo uz DEBUG_ENDPOINTS."""
+    if not DEBUG_ENDPOINTS:
+        raise HTTPException(status_code=404, detail="Not Found")
+    from .preload import memory_usage
+    return {"pid": os.getpid(), **memory_usage()}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
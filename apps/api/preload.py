@@ -0,0 +1,143 @@
+"""
+Učitavanje teških zavisnosti van puta importa aplikacije.
+
+- preload(): gunicorn master (gunicorn.conf.py) učitava encoder, multilingual index i korpus
+  jednom, a worker-i posle fork-a dijele te stranice copy-on-write. Thread pool-ovi se ne prave
+  u master-u (torch/faiss na 1 nit, bez warmup encode-a), jer niti roditelja ne postoje u
+  djetetu - worker ih podešava u after_fork().
+- warmup(): pozadinska nit posle starta worker-a (FastAPI lifespan) - import openai i
+  retrieval_mock, učitavanje modela i indeksa i jedan upit, dok API već prima zahtjeve.
+"""
+import os
+import resource
+import sys
+import time
+from typing import Dict
+
+# Niti po worker-u za torch i faiss (0 = cpu_count // broj worker-a)
+TORCH_THREADS_PER_WORKER = int(os.getenv("TORCH_THREADS_PER_WORKER", "0"))
+
+SMAPS_FIELDS = {"Rss": "rss", "Pss": "pss", "Shared_Clean": "shared", "Shared_Dirty": "shared",
+                "Private_Clean": "private", "Private_Dirty": "private"}
+
+
+def worker_threads(workers: int) -> int:
+    if TORCH_THREADS_PER_WORKER > 0:
+        return TORCH_THREADS_PER_WORKER
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _set_threads(threads: int):
+    """torch (samo ako je već učitan) i faiss OpenMP broj niti."""
+    if "torch" in sys.modules:
+        sys.modules["torch"].set_num_threads(threads)
+    import faiss
+    faiss.omp_set_num_threads(threads)
+
+
+def load_models(fork_safe: bool = False) -> Dict:
+    """
+    Učitaj encoder, index (docs, passages, bitmape filtera) i document store u ovom procesu.
+
+    Args:
+        fork_safe: Preskoči ono što ne preživljava fork (ONNX Runtime sesija pravi
+            thread pool već pri kreiranju) - za gunicorn master
+
+    Returns:
+        Opis učitanog (šta je preskočeno i koliko je trajalo)
+    """
+    from apps.ingest import encoders, local_storage_vector_multilingual as store
+    from apps.ingest.doc_store import get_store
+
+    start = time.perf_counter()
+    info = {"encoder": None, "index_rows": None}
+
+    if encoders.ENCODER_BACKEND == "torch" or not fork_safe:
+        encoders.get_encoder()
+        info["encoder"] = f"{encoders.MODEL_NAME} ({encoders.ENCODER_BACKEND})"
+    else:
+        print(f"Preload: encoder backend {encoders.ENCODER_BACKEND} se učitava u svakom worker-u")
+
+    if store.index_files() is not None:
+        index, docs, passages, _ = store._load_index(block=True)
+        store._bitmaps(index, docs, passages)
+        info["index_rows"] = index.ntotal
+    get_store()
+
+    info["seconds"] = round(time.perf_counter() - start, 2)
+    print(f"Preload: encoder {info['encoder']}, index {info['index_rows']} redova za {info['seconds']}s")
+    return info
+
+
+def preload() -> Dict:
+    """gunicorn master: modeli i index prije fork-a, bez pravljenja thread pool-ova."""
+    _set_threads(1)
+    return load_models(fork_safe=True)
+
+
+def warmup(local: bool = True) -> Dict[str, float]:
+    """
+    Pozadinski warmup worker-a; greška se samo loguje (prvi upit tada učitava lazy).
+
+    Args:
+        local: Lokalni retrieval (retrieval_mock, encoder, index); za Azure samo openai
+
+    Returns:
+        Sekunde po koraku
+    """
+    timings = {}
+    step = time.perf_counter()
+    try:
+        from apps.api.rag_pipeline import get_client
+        get_client()
+        timings["openai"] = time.perf_counter() - step
+    except Exception as e:
+        print(f"Warmup: OpenAI klijent nije napravljen ({e})")
+
+    if local:
+        try:
+            step = time.perf_counter()
+            import apps.api.retrieval_mock  # noqa: F401 (numpy, faiss, index moduli)
+            timings["retrieval_import"] = time.perf_counter() - step
+
+            step = time.perf_counter()
+            load_models()
+            timings["models"] = time.perf_counter() - step
+
+            # Prvi encode pravi torch/ONNX thread pool-ove i alocira bafere
+            from apps.ingest.encoders import encode_query
+            step = time.perf_counter()
+            encode_query("warmup")
+            timings["first_query"] = time.perf_counter() - step
+        except Exception as e:
+            print(f"Warmup nije uspio ({e}) - učitava se pri prvom upitu")
+    print("Warmup: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+    return timings
+
+
+def after_fork(workers: int) -> int:
+    """U worker-u posle fork-a: podesi niti za torch i faiss. Vraća broj niti."""
+    threads = worker_threads(workers)
+    _set_threads(threads)
+    return threads
+
+
+def memory_usage(pid="self") -> Dict[str, float]:
+    """
+    Memorija procesa u MB: rss, pss (dijeljene stranice podijeljene na procese),
+    shared i private. Bez /proc (van Linux-a) samo maksimalni rss.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss je u KB na Linux-u, u bajtovima na macOS-u
+        return {"rss": round(maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)}
+
+    usage = {"rss": 0.0, "pss": 0.0, "shared": 0.0, "private": 0.0}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name in SMAPS_FIELDS:
+            usage[SMAPS_FIELDS[name]] += int(value.split()[0]) / 1024
+    return {key: round(value, 1) for key, value in usage.items()}
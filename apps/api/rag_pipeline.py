@@ -2,43 +2,51 @@
 RAG pipeline: retrieval + synthesis (OpenAI Chat Completions).
 """
 import os
+import threading
 import uuid
 from typing import List, Dict, Optional
 from datetime import datetime
-from openai import OpenAI
 from .prompts import get_system_prompt
 from dotenv import load_dotenv
 
 # Load .env file
 load_dotenv()
 
-client = OpenAI(
-    api_key=os.getenv("OPENAI_API_KEY"),
-    base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
-)
+_client = None
+_client_lock = threading.Lock()
 
 
-def synthesize_answer(
-    query: str, 
-    ctx_docs: List[Dict],
-    conversation_history: Optional[List[Dict[str, str]]] = None
-) -> tuple[str, str]:
+def get_client():
+    """OpenAI klijent - openai paket se importuje pri prvoj upotrebi (ili u warmup-u), ne pri startu."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            from openai import OpenAI
+            _client = OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+            )
+    return _client
+
+
+def build_context_blocks(ctx_docs: List[Dict]) -> List[str]:
     """
-    Sinteza odgovora koristeći kontekst + OpenAI Chat Completions.
+    Tekstualni blokovi konteksta koji idu u prompt (jedan po dokumentu).
     
     Args:
-        query: Korisničko pitanje
         ctx_docs: Lista relevantnih dokumenata
-        conversation_history: Prethodne poruke u konverzaciji (opciono)
         
     Returns:
-        (answer, answer_id)
+        Lista blokova (datum + passage-i ili skraćen content)
     """
-    # Kontekst svedi na ~10-15k tokena
     context_blocks = []
     for i, d in enumerate(ctx_docs, start=1):
         # Ne dodaj numerisane reference - samo content
-        body = d["content"][:2000]  # Skrati na 2000 char
+        # Passage index: samo passage-i koji odgovaraju upitu, inače skraćen content
+        if d.get("_passages"):
+            body = "\n...\n".join(d["_passages"])[:2000]
+        else:
+            body = d["content"][:2000]  # Skrati na 2000 char
         # Dodaj datum ako postoji
         if d.get("published_at"):
             try:
@@ -48,6 +56,27 @@ def synthesize_answer(
             except:
                 pass
         context_blocks.append(body)
+    return context_blocks
+
+
+def synthesize_answer(
+    query: str, 
+    ctx_docs: List[Dict],
+    conversation_history: Optional[List[Dict[str, str]]] = None
+) -> tuple[str, str]:
+    """
+    Sinteza odgovora koristeći kontekst + OpenAI Chat Completions.
+    
+    Args:
+        query: Korisničko pitanje
+        ctx_docs: Lista relevantnih dokumenata
+        conversation_history: Prethodne poruke u konverzaciji (opciono)
+        
+    Returns:
+        (answer, answer_id)
+    """
+    # Kontekst svedi na ~10-15k tokena
+    context_blocks = build_context_blocks(ctx_docs)
     
     # Proveri da li kontekst sadrži relevantne informacije
     if not context_blocks or len(context_blocks) == 0:
@@ -86,7 +115,7 @@ TVOJ ZADATAK:
     
     # Chat Completions API – standardni poziv
     # Koristi gpt-4o za najbolje odgovore (synthesis zahteva najbolji model)
-    resp = client.chat.completions.create(
+    resp = get_client().chat.completions.create(
         model="gpt-4o",
         messages=messages,
         temperature=0.3,  # Balans izmedu preciznosti i kreativnosti za bolje reasoning
@@ -0,0 +1,104 @@
+"""
+Cross-encoder reranking (CPU) za fuzionisane kandidate iz hibridne pretrage.
+
+Multilingual cross-encoder ocjenjuje parove (upit, dokument) zajedno, što je
+mnogo preciznije od RRF ranga - pa synthesis može da dobije samo top 3 dokumenta.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List
+
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+# Koliko fuzionisanih kandidata ide u reranker i koliko ih ostaje za synthesis
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "30"))
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "3"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "4096"))
+# Cross-encoder gleda samo početak dokumenta (kraći input = brži CPU inference)
+RERANK_MAX_CHARS = 1500
+
+_model = None
+_model_lock = threading.Lock()
+
+# LRU cache skorova po paru (upit, tekst dokumenta)
+_score_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_model():
+    """Lazy load cross-encoder modela (CPU)."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            from sentence_transformers import CrossEncoder
+            _model = CrossEncoder(RERANK_MODEL, device="cpu", max_length=512)
+    return _model
+
+
+def _doc_text(doc: Dict) -> str:
+    """Tekst koji se ocjenjuje: passage-i koji odgovaraju upitu ili početak članka."""
+    if doc.get("_passages"):
+        body = " ".join(doc["_passages"])
+    else:
+        body = doc.get("content", "")
+    return f"{doc.get('title', '')}. {body}"[:RERANK_MAX_CHARS]
+
+
+def _pair_key(query: str, text: str) -> str:
+    return hashlib.sha1(f"{query}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def score_pairs(query: str, texts: List[str]) -> List[float]:
+    """
+    Skorovi za parove (upit, tekst). Parovi iz cache-a se ne računaju ponovo,
+    ostali idu u jedan batch-ovan predict poziv.
+    """
+    keys = [_pair_key(query, text) for text in texts]
+    scores = [None] * len(texts)
+    missing = []
+
+    with _cache_lock:
+        for i, key in enumerate(keys):
+            if key in _score_cache:
+                _score_cache.move_to_end(key)
+                scores[i] = _score_cache[key]
+            else:
+                missing.append(i)
+
+    if missing:
+        predicted = get_model().predict(
+            [(query, texts[i]) for i in missing],
+            batch_size=RERANK_BATCH_SIZE,
+            show_progress_bar=False
+        )
+        with _cache_lock:
+            for i, score in zip(missing, predicted):
+                scores[i] = float(score)
+                _score_cache[keys[i]] = float(score)
+            while len(_score_cache) > RERANK_CACHE_SIZE:
+                _score_cache.popitem(last=False)
+
+    return scores
+
+
+def rerank(query: str, docs: List[Dict], top_n: int = RERANK_TOP_N) -> List[Dict]:
+    """
+    Preuredi kandidate po cross-encoder skoru i vrati top_n.
+
+    Args:
+        query: Pitanje korisnika
+        docs: Fuzionisani kandidati (najviše RERANK_CANDIDATES)
+        top_n: Broj dokumenata za synthesis
+
+    Returns:
+        Dokumenti sortirani po `_rerank_score`
+    """
+    if not docs:
+        return []
+
+    scores = score_pairs(query, [_doc_text(doc) for doc in docs])
+    ranked = sorted(zip(scores, range(len(docs))), key=lambda x: x[0], reverse=True)
+    return [{**docs[i], "_rerank_score": score} for score, i in ranked[:top_n]]
@@ -1,11 +1,21 @@
 """
 Hibridni retrieval (BM25 + opciono vektorska pretraga).
+
+FAQ i NEWS indeks se pretražuju paralelno preko Azure Search REST API-ja (httpx,
+jedan dijeljeni async klijent na pozadinskom event loop-u). FAQ upit je hibridni
+(tekst + vektor upita na content_vector), a embedding upita se kešira.
 """
+import asyncio
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import httpx
 from dotenv import load_dotenv
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
-from typing import List, Dict
+
+from .rag_pipeline import get_client
 
 load_dotenv()
 
@@ -13,53 +23,202 @@ SEARCH_ENDPOINT = os.getenv("AZURE_SEARCH_ENDPOINT")
 FAQ_INDEX = os.getenv("AZURE_SEARCH_FAQ_INDEX", "faq_sepa")
 NEWS_INDEX = os.getenv("AZURE_SEARCH_NEWS_INDEX", "news_cbcg")
 SEARCH_KEY = os.getenv("AZURE_SEARCH_API_KEY")
+# REST verzija koju koristi azure-search-documents 11.4.0 (vectorQueries)
+SEARCH_API_VERSION = os.getenv("AZURE_SEARCH_API_VERSION", "2023-11-01")
+SEARCH_TIMEOUT = float(os.getenv("AZURE_SEARCH_TIMEOUT", "10"))
+
+# Vektorski dio FAQ upita (content_vector, text-embedding-3-large, 3072-D)
+SEARCH_VECTOR = os.getenv("AZURE_SEARCH_VECTOR", "true").lower() in ("1", "true", "yes")
+EMBED_MODEL = os.getenv("OPENAI_EMBED_MODEL", "text-embedding-3-large")
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+VECTOR_FIELD = "content_vector"
+
+
+def openai_embed(text: str) -> List[float]:
+    """Embedding upita (isti model kojim je punjen content_vector; dijeljeni OpenAI klijent i konekcije)."""
+    return get_client().embeddings.create(model=EMBED_MODEL, input=[text]).data[0].embedding
+
+
+def _faq_context(d: Dict) -> Dict:
+    return {
+        "content": d.get("content", ""),
+        "title": d.get("title", "SEPA Q&A"),
+        "source": d.get("source", "pdf:SEPA_QnA"),
+        "page": d.get("page")
+    }
+
+
+def _news_context(d: Dict) -> Dict:
+    return {
+        "content": d.get("body", ""),
+        "title": d.get("title", ""),
+        "source": d.get("url", "cbcg.me"),
+        "page": None
+    }
+
+
+def _normalized(hits: List[Dict]) -> List[tuple]:
+    """(skor / najbolji skor u indeksu, hit) - BM25 i hibridni (RRF) skorovi nisu na istoj skali."""
+    top = max((h.get("@search.score") or 0.0 for h in hits), default=0.0)
+    return [((h.get("@search.score") or 0.0) / top if top else 0.0, h) for h in hits]
+
+
+class AsyncSearchRetriever:
+    """
+    Async klijent za FAQ + NEWS pretragu.
+
+    Pravi se i koristi na istom event loop-u (httpx pool konekcija je vezan za loop).
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        key: str,
+        faq_index: str = FAQ_INDEX,
+        news_index: str = NEWS_INDEX,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        timeout: float = SEARCH_TIMEOUT,
+        api_version: str = SEARCH_API_VERSION
+    ):
+        self.faq_index = faq_index
+        self.news_index = news_index
+        self.embed_fn = embed_fn
+        self.api_version = api_version
+        self.client = httpx.AsyncClient(
+            base_url=endpoint.rstrip("/"),
+            headers={"api-key": key, "Content-Type": "application/json"},
+            timeout=timeout,
+            transport=transport
+        )
+        self._embeddings = OrderedDict()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def search(self, index: str, body: Dict) -> List[Dict]:
+        r = await self.client.post(
+            f"/indexes/{index}/docs/search",
+            params={"api-version": self.api_version},
+            json=body
+        )
+        r.raise_for_status()
+        return r.json().get("value", [])
+
+    async def query_vector(self, query: str) -> Optional[List[float]]:
+        """Embedding upita iz LRU cache-a ili iz embed_fn (u niti, da ne blokira loop)."""
+        if self.embed_fn is None:
+            return None
+        if query in self._embeddings:
+            self._embeddings.move_to_end(query)
+            return self._embeddings[query]
+        vector = await asyncio.to_thread(self.embed_fn, query)
+        self._embeddings[query] = vector
+        if len(self._embeddings) > QUERY_EMBEDDING_CACHE_SIZE:
+            self._embeddings.popitem(last=False)
+        return vector
 
-# Only create clients if credentials are provided
-if SEARCH_ENDPOINT and SEARCH_KEY:
-    faq = SearchClient(SEARCH_ENDPOINT, FAQ_INDEX, AzureKeyCredential(SEARCH_KEY))
-    news = SearchClient(SEARCH_ENDPOINT, NEWS_INDEX, AzureKeyCredential(SEARCH_KEY))
-else:
-    faq = None
-    news = None
+    async def _faq(self, query: str, k: int) -> List[Dict]:
+        body = {"search": query, "top": k}
+        try:
+            vector = await self.query_vector(query)
+        except Exception as e:
+            print(f"Query embedding error (FAQ ide bez vektora): {e}")
+            vector = None
+        if vector is not None:
+            body["vectorQueries"] = [{"kind": "vector", "vector": vector, "fields": VECTOR_FIELD, "k": k}]
+        return await self.search(self.faq_index, body)
+
+    @staticmethod
+    async def _timed(name: str, coro, timings: Dict[str, float]):
+        start = time.perf_counter()
+        try:
+            return await coro
+        except Exception as e:
+            print(f"{name} search error: {e}")
+            return []
+        finally:
+            timings[name] = time.perf_counter() - start
+
+    async def retrieve(self, query: str, k: int = 8, timings: Optional[Dict[str, float]] = None) -> List[Dict]:
+        """
+        FAQ (hibridno) i NEWS (BM25, polovina kapaciteta) paralelno, spojeno po normalizovanom skoru.
+
+        Args:
+            query: Pitanje korisnika
+            k: Broj FAQ rezultata (NEWS dobija k // 2)
+            timings: Opciono - popunjava se sekundama po upitu (faq, news, total)
+
+        Returns:
+            Lista konteksta (content, title, source, page)
+        """
+        timings = {} if timings is None else timings
+        start = time.perf_counter()
+        faq_hits, news_hits = await asyncio.gather(
+            self._timed("faq", self._faq(query, k), timings),
+            self._timed("news", self.search(self.news_index, {"search": query, "top": max(0, k // 2)}), timings)
+        )
+        timings["total"] = time.perf_counter() - start
+
+        merged = [(score, _faq_context(d)) for score, d in _normalized(faq_hits)]
+        merged += [(score, _news_context(d)) for score, d in _normalized(news_hits)]
+        merged.sort(key=lambda item: item[0], reverse=True)
+        return [ctx for _, ctx in merged]
+
+
+class _LoopThread:
+    """Pozadinski event loop za sync pozivaoce (FastAPI sync endpoint-i rade u thread pool-u)."""
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="azure-retrieval", daemon=True)
+        self.thread.start()
+
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+
+_loop_thread: Optional[_LoopThread] = None
+_retriever: Optional[AsyncSearchRetriever] = None
+_init_lock = threading.Lock()
+
+
+def get_retriever():
+    """(loop, retriever) - prave se jednom, retriever na pozadinskom loop-u."""
+    global _loop_thread, _retriever
+    with _init_lock:
+        if _retriever is None:
+            _loop_thread = _LoopThread()
+
+            async def create():
+                return AsyncSearchRetriever(
+                    SEARCH_ENDPOINT, SEARCH_KEY, embed_fn=openai_embed if SEARCH_VECTOR else None
+                )
+
+            _retriever = _loop_thread.run(create())
+    return _loop_thread, _retriever
 
 
 def retrieve(query: str, k: int = 8) -> List[Dict]:
     """
     Hibridni retrieval: FAQ + NEWS.
-    
+
     Args:
         query: Pitanje korisnika
         k: Broj rezultata
-        
+
     Returns:
         Lista konteksta (content, title, source, page)
     """
-    ctx = []
-    
-    if not faq or not news:
-        return ctx  # Return empty if Azure not configured
-    
-    # FAQ retrieval
-    faq_hits = list(faq.search(query, top=k))
-    for d in faq_hits:
-        ctx.append({
-            "content": d.get("content", ""),
-            "title": d.get("title", "SEPA Q&A"),
-            "source": d.get("source", "pdf:SEPA_QnA"),
-            "page": d.get("page")
-        })
-    
-    # NEWS retrieval (polovina kapaciteta)
-    news_hits = list(news.search(query, top=max(0, k//2)))
-    for d in news_hits:
-        ctx.append({
-            "content": d.get("body", ""),
-            "title": d.get("title", ""),
-            "source": d.get("url", "cbcg.me"),
-            "page": None
-        })
-    
+    if not SEARCH_ENDPOINT or not SEARCH_KEY:
+        return []  # Return empty if Azure not configured
+
+    loop_thread, retriever = get_retriever()
+    timings = {}
+    ctx = loop_thread.run(retriever.retrieve(query, k, timings))
+    print(f"[SEARCH] FAQ {timings.get('faq', 0):.3f}s | NEWS {timings.get('news', 0):.3f}s | "
+          f"ukupno {timings.get('total', 0):.3f}s")
+
     # Limit
     max_chunks = int(os.getenv("MAX_CHUNKS", "12"))
     return ctx[:max_chunks]
-
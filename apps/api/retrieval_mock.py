@@ -3,15 +3,109 @@ LOCAL retrieval - koristi VECTOR SEARCH sa FAISS + OpenAI embeddings.
 """
 import os
 import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from pathlib import Path
-from typing import List, Dict
+from typing import Callable, List, Dict, Tuple
 from datetime import datetime, timedelta
 
 # Dodaj root u path za import
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from apps.ingest.local_storage_vector_multilingual import search_documents, load_documents
+from apps.ingest.local_storage_vector_multilingual import (
+    search_documents, indexed_passages, is_warm, MAX_PASSAGES_PER_DOC, RECENT_DAYS
+)
 from apps.ingest.local_storage import search_documents as keyword_search
+from apps.ingest.doc_store import get_store
+from apps.ingest.chunking import chunk
+from apps.api import reranker
+
+# Keyword i vector pretraga rade paralelno, svaka u svom pool-u sa RETRIEVAL_WORKERS mjesta
+# i svojim rokom (sekunde); dok encoder i index nisu učitani vector grana ima duži rok
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", "4"))
+KEYWORD_TIMEOUT = float(os.getenv("RETRIEVAL_KEYWORD_TIMEOUT", "1.0"))
+VECTOR_TIMEOUT = float(os.getenv("RETRIEVAL_VECTOR_TIMEOUT", "3.0"))
+VECTOR_COLD_TIMEOUT = float(os.getenv("RETRIEVAL_VECTOR_COLD_TIMEOUT", "60.0"))
+
+# Pool i semafor po grani: zaglavljene vector pretrage ne zauzimaju mjesta keyword grani,
+# a grana bez slobodnog mjesta odmah vraća "busy" umjesto čekanja u redu
+_branch_pools: Dict[str, ThreadPoolExecutor] = {}
+_branch_slots: Dict[str, threading.BoundedSemaphore] = {}
+_branch_lock = threading.Lock()
+
+# Broj probijenih rokova i grešaka po grani (npr. "vector:timeout")
+branch_failures = Counter()
+
+
+def _submit_branch(name: str, fn: Callable[[], List[Dict]]):
+    """Pokreni granu u njenom pool-u; None ako su sva mjesta grane zauzeta."""
+    with _branch_lock:
+        if name not in _branch_pools:
+            _branch_pools[name] = ThreadPoolExecutor(max_workers=RETRIEVAL_WORKERS,
+                                                     thread_name_prefix=f"retrieval-{name}")
+            _branch_slots[name] = threading.BoundedSemaphore(RETRIEVAL_WORKERS)
+        pool, slots = _branch_pools[name], _branch_slots[name]
+    if not slots.acquire(blocking=False):
+        return None
+    
+    def run():
+        try:
+            return fn()
+        finally:
+            slots.release()
+    
+    try:
+        future = pool.submit(run)
+    except Exception:
+        slots.release()
+        raise
+    # Otkazana (nepokrenuta) grana ne izvršava run() - mjesto se vraća ovdje
+    future.add_done_callback(lambda f: f.cancelled() and slots.release())
+    return future
+
+
+def _run_branches(branches: Dict[str, Tuple[Callable[[], List[Dict]], float]]) -> Dict[str, Dict]:
+    """
+    Pokreni grane pretrage paralelno; svaka ima rok mjeren od zajedničkog starta.
+    
+    Grana koja ne stigne na vrijeme vraća prazne rezultate i otkazuje se (ako još nije
+    počela); pokrenuta nastavlja u pozadini, ali zauzima samo mjesto svoje grane.
+    
+    Returns:
+        ime -> {"results", "seconds", "status": ok / timeout / busy / error}
+    """
+    start = time.perf_counter()
+    futures = {name: _submit_branch(name, fn) for name, (fn, _) in branches.items()}
+    out = {}
+    for name, future in futures.items():
+        deadline = start + branches[name][1]
+        status = "ok"
+        results = []
+        try:
+            if future is None:
+                status = "busy"
+            else:
+                results = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+        except FuturesTimeout:
+            future.cancel()
+            status = "timeout"
+        except Exception as e:
+            print(f"{name.capitalize()} search error: {e}")
+            status = "error"
+        if status != "ok":
+            branch_failures[f"{name}:{status}"] += 1
+        out[name] = {"results": results, "seconds": time.perf_counter() - start, "status": status}
+    return out
+
+
+def _branch_summary(name: str, branch: Dict) -> str:
+    if branch["status"] == "timeout":
+        return f"{name}: TIMEOUT posle {branch['seconds']:.3f}s"
+    if branch["status"] == "busy":
+        return f"{name}: BUSY (sva mjesta zauzeta)"
+    return f"{name}: {len(branch['results'])} u {branch['seconds']:.3f}s"
 
 
 def retrieve(query: str, k: int = 8) -> List[Dict]:
@@ -26,10 +120,8 @@ def retrieve(query: str, k: int = 8) -> List[Dict]:
         Lista konteksta (content, title, source, page)
     """
     try:
-        # Provjeri da li postoje lokalni dokumenti
-        docs = load_documents()
-        
-        if not docs:
+        # Provjeri da li postoje lokalni dokumenti (COUNT u store-u, bez učitavanja korpusa)
+        if not get_store().count():
             # Fallback na sample dokumente ako nema parsiranog PDF-a
             print("WARNING: No parsed PDF data found. Using sample documents.")
             print("Run: python parse_and_store.py")
@@ -40,30 +132,22 @@ def retrieve(query: str, k: int = 8) -> List[Dict]:
         is_current_question = any(word in query_lower for word in ['sad', 'trenutno', 'sada', 'danas', 'novo', 'najnovije', 'šta se dešava', 'šta se desava'])
         
         # HYBRID SEARCH 2.0: Kombinuj keyword + vector za NAJBOLJE rezultate
-        import time
         from collections import defaultdict
         
-        # 1. KEYWORD SEARCH (instant, odličan za specifične termine)
-        try:
-            start = time.time()
-            keyword_results = keyword_search(query, k=k * 2)
-            keyword_time = time.time() - start
-        except Exception as e:
-            print(f"Keyword search error: {e}")
-            keyword_results = []
-            keyword_time = 0
+        # "Trenutno" pitanja pretražuju samo skorije vremenske particije (ne cio korpus pa filter)
+        since = datetime.now() - timedelta(days=RECENT_DAYS) if is_current_question else None
         
-        # 2. VECTOR SEARCH (semantic, odličan za razumevanje)
-        try:
-            start = time.time()
-            vector_results = search_documents(query, k=k * 2)
-            vector_time = time.time() - start
-        except Exception as e:
-            print(f"Vector search error: {e}")
-            vector_results = []
-            vector_time = 0
+        # 1+2. KEYWORD (instant, specifični termini) i VECTOR (semantic) SEARCH paralelno;
+        # grana koja probije svoj rok se preskače i fuzija ide sa onim što je stiglo
+        branches = _run_branches({
+            "keyword": (lambda: keyword_search(query, k=k * 2, since=since), KEYWORD_TIMEOUT),
+            "vector": (lambda: search_documents(query, k=k * 2, since=since),
+                       VECTOR_TIMEOUT if is_warm() else VECTOR_COLD_TIMEOUT),
+        })
+        keyword_results = branches["keyword"]["results"]
+        vector_results = branches["vector"]["results"]
         
-        print(f"[SEARCH] Keyword: {len(keyword_results)} u {keyword_time:.3f}s | Vector: {len(vector_results)} u {vector_time:.3f}s")
+        print(f"[SEARCH] {_branch_summary('Keyword', branches['keyword'])} | {_branch_summary('Vector', branches['vector'])}")
         
         # Ako oba searcha ne rade, vrati sample docs
         if not keyword_results and not vector_results:
@@ -80,16 +164,18 @@ def retrieve(query: str, k: int = 8) -> List[Dict]:
             doc_scores[doc_id] += 1.0 / (rank + 60)
             doc_map[doc_id] = doc
         
-        # Dodaj vector scores
+        # Dodaj vector scores (vector verzija nosi passage-e koji odgovaraju upitu)
         for rank, doc in enumerate(vector_results, 1):
             doc_id = doc.get('source', '') + doc.get('title', '') + str(doc.get('page', ''))
             doc_scores[doc_id] += 1.0 / (rank + 60)
-            if doc_id not in doc_map:
+            if doc_id not in doc_map or doc.get('_passages'):
                 doc_map[doc_id] = doc
         
-        # Sortiraj po kombinovanom skoru
+        # Sortiraj po kombinovanom skoru (reranker dobija širi skup kandidata)
+        use_rerank = reranker.RERANK_ENABLED
+        n_candidates = max(k * 2, reranker.RERANK_CANDIDATES) if use_rerank else k * 2
         sorted_docs = sorted(doc_scores.items(), key=lambda x: x[1], reverse=True)
-        results = [doc_map[doc_id] for doc_id, score in sorted_docs[:k * 2]]
+        results = [doc_map[doc_id] for doc_id, score in sorted_docs[:n_candidates]]
         
         # 4. FILTRIRAJ ZA "TRENUTNO" PITANJA
         if is_current_question:
@@ -101,16 +187,30 @@ def retrieve(query: str, k: int = 8) -> List[Dict]:
                     try:
                         pub_date = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
                         days_old = (now - pub_date.replace(tzinfo=None) if pub_date.tzinfo else now - pub_date).days
-                        if days_old <= 90:
+                        if days_old <= RECENT_DAYS:
                             filtered_results.append(doc)
                     except:
                         pass
             
-            results = filtered_results[:k]
+            results = filtered_results if use_rerank else filtered_results[:k]
             print(f"[FILTER] Filtered {len(results)} recent articles (RRF fusion)")
-        else:
+        elif not use_rerank:
             results = results[:k]
         
+        # Keyword pogoci nemaju passage-e - izaberi najbolje po preklapanju sa upitom
+        results = _attach_passages(query, results)
+        
+        # 5. CROSS-ENCODER RERANKING: precizan poredak => synthesis dobija samo top N
+        if use_rerank and results:
+            try:
+                start = time.time()
+                n_in = len(results)
+                results = reranker.rerank(query, results, top_n=reranker.RERANK_TOP_N)
+                print(f"[RERANK] {n_in} -> {len(results)} u {time.time() - start:.3f}s")
+            except Exception as e:
+                print(f"Rerank error: {e}")
+                results = results[:k]
+        
         # Uvek dodaj osnovne činjenice o CBCG kao prvi dokument za relevantna pitanja
         cbcg_basics_keywords = ['osnovan', 'osnovana', 'kada', 'kad', 'dje', 'gdje', 'adresa', 'lokacija', 
                                 'sjedište', 'sedište', 'guverner', 'cbcg', 'centralna banka']
@@ -156,6 +256,27 @@ def retrieve(query: str, k: int = 8) -> List[Dict]:
         return _get_sample_docs()[:k]
 
 
+def _attach_passages(query: str, docs: List[Dict]) -> List[Dict]:
+    """
+    Za duge dokumente bez `_passages` izaberi passage-e sa najviše riječi iz upita,
+    tako da synthesis dobija samo relevantne dijelove članka.
+    
+    Passage-i se uzimaju iz učitanog indeksa; chunk-uje se samo dokument koji još nije indeksiran.
+    """
+    query_words = {w for w in query.lower().split() if len(w) > 3}
+    out = []
+    for doc in docs:
+        content = doc.get('content', '')
+        if doc.get('_passages') or len(content) <= 1200 or not query_words:
+            out.append(doc)
+            continue
+        
+        passages = indexed_passages(doc) or list(chunk(content))
+        ranked = sorted(passages, key=lambda p: len(query_words & set(p.lower().split())), reverse=True)
+        out.append({**doc, '_passages': ranked[:MAX_PASSAGES_PER_DOC]})
+    return out
+
+
 def _get_sample_docs() -> List[Dict]:
     """Fallback sample dokumenti."""
     return [
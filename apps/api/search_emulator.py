@@ -0,0 +1,545 @@
+"""
+Lokalni emulator Azure AI Search REST API-ja (za offline benchmark i load test).
+
+Pokriva podskup koji koriste retrieval.py, push_to_search.py i scrape_timer/scraper.py:
+
+- kreiranje indeksa (PUT /indexes('ime') ili /indexes/ime, POST /indexes)
+- upload / merge / mergeOrUpload / delete (docs/search.index ili docs/index)
+- pretraga (docs/search.post.search ili docs/search): BM25 preko searchable polja,
+  vectorQueries (FAISS, tačan inner product nad normalizovanim vektorima),
+  hibridno spajanje kao u Azure-u (RRF), filter (OData podskup), orderby, select, top, skip, count
+- docs/$count i dohvat dokumenta po ključu
+
+Oba stila putanja su podržana (SDK koristi indexes('ime'), REST dokumentacija indexes/ime).
+Sve je u memoriji; ključ (api-key) se ne provjerava.
+
+    python -m apps.api.search_emulator [--port 7700] [--seed-news]
+
+pa AZURE_SEARCH_ENDPOINT=http://127.0.0.1:7700 za API, scraper i push_to_search.
+SearchIndexClient (create_index_*) odbija http endpoint - za njega pokreni sa
+--ssl-certfile/--ssl-keyfile (self-signed) i https:// endpoint-om.
+"""
+import argparse
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+# Azure BM25 podrazumijevani parametri i RRF konstanta hibridne pretrage
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+DEFAULT_TOP = 50
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+PATH_RE = re.compile(r"^/indexes(?:\('(?P<quoted>[^']+)'\)|/(?P<plain>[^/(]+))(?P<rest>/.*)?$")
+DOC_KEY_RE = re.compile(r"^/docs(?:\('(?P<quoted>[^']+)'\)|/(?P<plain>[^/$]+))$")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    return JSONResponse({"error": {"code": "", "message": message}}, status_code=status)
+
+
+# --- OData filter (podskup): eq ne gt ge lt le, and or not, zagrade, search.in ---
+
+FILTER_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<str>'(?:[^']|'')*')|(?P<num>-?\d+(?:\.\d+)?)|(?P<punct>[(),])|(?P<word>[A-Za-z_][\w./]*))"
+)
+COMPARISONS = {
+    "eq": lambda a, b: a == b,
+    "ne": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and b is not None and a > b,
+    "ge": lambda a, b: a is not None and b is not None and a >= b,
+    "lt": lambda a, b: a is not None and b is not None and a < b,
+    "le": lambda a, b: a is not None and b is not None and a <= b,
+}
+
+
+def _filter_tokens(text: str) -> List[Tuple[str, object]]:
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        m = FILTER_TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"Neispravan filter kod pozicije {pos}: {text!r}")
+        pos = m.end()
+        if m.group("str") is not None:
+            tokens.append(("value", m.group("str")[1:-1].replace("''", "'")))
+        elif m.group("num") is not None:
+            num = m.group("num")
+            tokens.append(("value", float(num) if "." in num else int(num)))
+        elif m.group("punct") is not None:
+            tokens.append((m.group("punct"), None))
+        else:
+            word = m.group("word")
+            literals = {"true": True, "false": False, "null": None}
+            if word in literals:
+                tokens.append(("value", literals[word]))
+            elif word.lower() in COMPARISONS or word.lower() in ("and", "or", "not"):
+                tokens.append((word.lower(), None))
+            else:
+                tokens.append(("field", word))
+    return tokens
+
+
+def parse_filter(text: Optional[str]) -> Callable[[Dict], bool]:
+    """OData $filter -> predikat nad dokumentom."""
+    if not text:
+        return lambda doc: True
+    tokens = _filter_tokens(text)
+    pos = 0
+
+    def peek():
+        return tokens[pos][0] if pos < len(tokens) else None
+
+    def take(kind=None):
+        nonlocal pos
+        if pos >= len(tokens) or (kind and tokens[pos][0] != kind):
+            raise ValueError(f"Neispravan filter: {text!r}")
+        pos += 1
+        return tokens[pos - 1]
+
+    def or_expr():
+        left = and_expr()
+        while peek() == "or":
+            take()
+            right = and_expr()
+            left = (lambda l, r: lambda doc: l(doc) or r(doc))(left, right)
+        return left
+
+    def and_expr():
+        left = unary()
+        while peek() == "and":
+            take()
+            right = unary()
+            left = (lambda l, r: lambda doc: l(doc) and r(doc))(left, right)
+        return left
+
+    def unary():
+        if peek() == "not":
+            take()
+            inner = unary()
+            return lambda doc: not inner(doc)
+        if peek() == "(":
+            take()
+            inner = or_expr()
+            take(")")
+            return inner
+        _, name = take("field")
+        if name == "search.in":
+            take("(")
+            _, field = take("field")
+            take(",")
+            _, values = take("value")
+            delimiters = " ,"
+            if peek() == ",":
+                take()
+                _, delimiters = take("value")
+            take(")")
+            allowed = {v for v in re.split(f"[{re.escape(delimiters)}]", values) if v}
+            return lambda doc: doc.get(field) in allowed
+        op, _ = take()
+        if op not in COMPARISONS:
+            raise ValueError(f"Nepodržan operator {op!r} u filteru: {text!r}")
+        _, value = take("value")
+        compare = COMPARISONS[op]
+        return lambda doc: compare(doc.get(name), value)
+
+    predicate = or_expr()
+    if pos != len(tokens):
+        raise ValueError(f"Neispravan filter: {text!r}")
+    return predicate
+
+
+def _as_list(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    return list(value)
+
+
+def _sort_key(value):
+    # null prvi (kao u Azure-u za asc), pa brojevi / stringovi
+    return (value is not None, value if value is not None else 0)
+
+
+class EmulatedIndex:
+    """Jedan indeks: dokumenti po ključu, BM25 postinzi i FAISS index po vektorskom polju (lazy)."""
+
+    def __init__(self, definition: Dict):
+        self.definition = definition
+        self.name = definition["name"]
+        fields = definition.get("fields", [])
+        self.key = next((f["name"] for f in fields if f.get("key")), "id")
+        self.searchable = [
+            f["name"] for f in fields
+            if f.get("searchable") and f.get("type") in ("Edm.String", "Collection(Edm.String)")
+        ]
+        self.vector_fields = {
+            f["name"] for f in fields
+            if f.get("type") == "Collection(Edm.Single)" or f.get("dimensions") or f.get("vectorSearchDimensions")
+        }
+        self.docs: Dict[str, Dict] = {}
+        self.lock = threading.RLock()
+        self._postings = None
+        self._lengths = None
+        self._vectors: Dict[str, Tuple[List[str], faiss.Index]] = {}
+
+    def _invalidate(self):
+        self._postings = None
+        self._vectors.clear()
+
+    # --- upis ---
+
+    def index_actions(self, actions: List[Dict]) -> Tuple[int, List[Dict]]:
+        results = []
+        with self.lock:
+            for action in actions:
+                kind = action.get("@search.action", "upload")
+                fields = {k: v for k, v in action.items() if k != "@search.action"}
+                key = fields.get(self.key)
+                status, message = 200, None
+                if key is None:
+                    status, message = 400, f"Dokument nema ključ '{self.key}'"
+                elif kind == "upload":
+                    self.docs[key] = fields
+                elif kind == "mergeOrUpload":
+                    self.docs[key] = {**self.docs.get(key, {}), **fields}
+                elif kind == "merge":
+                    if key in self.docs:
+                        self.docs[key] = {**self.docs[key], **fields}
+                    else:
+                        status, message = 404, "Document not found."
+                elif kind == "delete":
+                    self.docs.pop(key, None)
+                else:
+                    status, message = 400, f"Nepoznata akcija {kind!r}"
+                results.append({"key": key, "status": status < 300, "errorMessage": message, "statusCode": status})
+            self._invalidate()
+        overall = 200 if all(r["status"] for r in results) else 207
+        return overall, results
+
+    # --- BM25 ---
+
+    def _build_postings(self):
+        postings = defaultdict(dict)
+        lengths = {}
+        for key, doc in self.docs.items():
+            tokens = []
+            for name in self.searchable:
+                value = doc.get(name)
+                if isinstance(value, list):
+                    value = " ".join(str(v) for v in value)
+                if value:
+                    tokens.extend(tokenize(str(value)))
+            lengths[key] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings[term][key] = tf
+        self._postings, self._lengths = postings, lengths
+
+    def bm25(self, text: str, allowed) -> Dict[str, float]:
+        if self._postings is None:
+            self._build_postings()
+        n = len(self._lengths)
+        avgdl = (sum(self._lengths.values()) / n) if n else 0.0
+        scores = defaultdict(float)
+        for term in set(tokenize(text)):
+            docs = self._postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for key, tf in docs.items():
+                if key not in allowed:
+                    continue
+                norm = 1 - BM25_B + BM25_B * self._lengths[key] / avgdl if avgdl else 1.0
+                scores[key] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        return scores
+
+    # --- vektori ---
+
+    def _vector_index(self, field: str):
+        if field not in self._vectors:
+            keys = [key for key, doc in self.docs.items() if doc.get(field)]
+            if keys:
+                matrix = np.array([self.docs[key][field] for key in keys], dtype='float32')
+                faiss.normalize_L2(matrix)
+                index = faiss.IndexFlatIP(matrix.shape[1])
+                index.add(matrix)
+            else:
+                index = None
+            self._vectors[field] = (keys, index)
+        return self._vectors[field]
+
+    def vector_search(self, query: Dict, allowed) -> Dict[str, float]:
+        vector = query.get("vector") or query.get("value")
+        k = int(query.get("k") or query.get("kNearestNeighborsCount") or DEFAULT_TOP)
+        scores = {}
+        for field in _as_list(query.get("fields")):
+            if field not in self.vector_fields:
+                raise ValueError(f"Polje {field!r} nije vektorsko polje indeksa {self.name}")
+            keys, index = self._vector_index(field)
+            if index is None:
+                continue
+            q = np.array([vector], dtype='float32')
+            faiss.normalize_L2(q)
+            # Filter se primjenjuje prije izbora k najbližih (pre-filtering)
+            distances, rows = index.search(q, index.ntotal)
+            hits = [(keys[row], float(d)) for d, row in zip(distances[0], rows[0]) if row >= 0 and keys[row] in allowed]
+            for key, score in hits[:k]:
+                scores[key] = max(scores.get(key, -1.0), score)
+        return scores
+
+    # --- pretraga ---
+
+    def search(self, body: Dict) -> Dict:
+        text = body.get("search")
+        vector_queries = body.get("vectorQueries") or body.get("vectors") or []
+        predicate = parse_filter(body.get("filter"))
+        top = body.get("top")
+        skip = int(body.get("skip") or 0)
+
+        with self.lock:
+            allowed = {key for key, doc in self.docs.items() if predicate(doc)}
+            rankings = []
+            if text and text.strip() != "*":
+                rankings.append(self.bm25(text, allowed))
+            elif not vector_queries:
+                rankings.append({key: 1.0 for key in allowed})
+            for query in vector_queries:
+                rankings.append(self.vector_search(query, allowed))
+
+            if len(rankings) == 1:
+                scores = rankings[0]
+            else:
+                # Hibridni upit: Reciprocal Rank Fusion kao u Azure-u
+                scores = defaultdict(float)
+                for ranking in rankings:
+                    for rank, key in enumerate(sorted(ranking, key=ranking.get, reverse=True), 1):
+                        scores[key] += 1.0 / (RRF_K + rank)
+
+            keys = sorted(scores, key=scores.get, reverse=True)
+            for clause in reversed(_as_list(body.get("orderby"))):
+                parts = clause.split()
+                field, desc = parts[0], len(parts) > 1 and parts[1].lower() == "desc"
+                if field == "search.score()":
+                    keys.sort(key=scores.get, reverse=desc)
+                else:
+                    keys.sort(key=lambda key: _sort_key(self.docs[key].get(field)), reverse=desc)
+
+            page_size = DEFAULT_TOP if top is None else int(top)
+            page = keys[skip:skip + page_size]
+            select = _as_list(body.get("select"))
+            value = []
+            for key in page:
+                doc = self.docs[key]
+                if select and select != ["*"]:
+                    fields = {name: doc.get(name) for name in select}
+                else:
+                    fields = {name: v for name, v in doc.items() if name not in self.vector_fields}
+                value.append({"@search.score": scores[key], **fields})
+
+        response = {"value": value}
+        if body.get("count"):
+            response["@odata.count"] = len(keys)
+        if top is None and skip + page_size < len(keys):
+            response["@search.nextPageParameters"] = {**body, "skip": skip + page_size}
+        return response
+
+
+def create_app() -> FastAPI:
+    """
+    FastAPI aplikacija emulatora (indeksi žive u app.state.indexes).
+
+    BM25, FAISS i filteri su CPU posao - idu u threadpool (run_in_threadpool), da jedna
+    velika pretraga ili upload ne blokira event loop za ostale zahtjeve; EmulatedIndex
+    ima svoj lock.
+    """
+    app = FastAPI(title="Azure AI Search emulator")
+    app.state.indexes = {}
+    indexes: Dict[str, EmulatedIndex] = app.state.indexes
+
+    def resolve(path: str):
+        m = PATH_RE.match(path)
+        if not m:
+            return None, None
+        return m.group("quoted") or m.group("plain"), m.group("rest") or ""
+
+    def get_index(name: str, create: bool = False) -> Optional[EmulatedIndex]:
+        if name not in indexes and create:
+            # Upload u nepostojeći indeks: napravi ga sa svim string poljima kao searchable
+            indexes[name] = EmulatedIndex({"name": name, "fields": [], "_auto": True})
+        return indexes.get(name)
+
+    @app.post("/indexes")
+    async def create_index(request: Request):
+        definition = await request.json()
+        indexes[definition["name"]] = await run_in_threadpool(EmulatedIndex, definition)
+        return JSONResponse(definition, status_code=201)
+
+    @app.get("/indexes")
+    async def list_indexes():
+        return {"value": [index.definition for index in indexes.values()]}
+
+    @app.api_route("/indexes{path:path}", methods=["GET", "PUT", "POST", "DELETE"])
+    async def dispatch(path: str, request: Request):
+        name, rest = resolve("/indexes" + path)
+        if name is None:
+            return _error(404, f"Nepoznata putanja {request.url.path}")
+
+        if rest == "":
+            if request.method == "PUT":
+                definition = {**await request.json(), "name": name}
+                created = name not in indexes
+                indexes[name] = await run_in_threadpool(EmulatedIndex, definition)
+                return JSONResponse(definition, status_code=201 if created else 200)
+            if request.method == "DELETE":
+                indexes.pop(name, None)
+                return Response(status_code=204)
+            if request.method == "GET" and name in indexes:
+                return indexes[name].definition
+            return _error(404, f"Index '{name}' ne postoji")
+
+        if rest in ("/docs/search.index", "/docs/index") and request.method == "POST":
+            index = get_index(name, create=True)
+            actions = (await request.json()).get("value", [])
+            if index.definition.get("_auto"):
+                _auto_fields(index, actions)
+            status, results = await run_in_threadpool(index.index_actions, actions)
+            return JSONResponse({"value": results}, status_code=status)
+
+        index = get_index(name)
+        if index is None:
+            return _error(404, f"Index '{name}' ne postoji")
+
+        if rest in ("/docs/search.post.search", "/docs/search") and request.method == "POST":
+            body = await request.json()
+            try:
+                return await run_in_threadpool(index.search, body)
+            except ValueError as e:
+                return _error(400, str(e))
+
+        if rest == "/docs" and request.method == "GET":
+            params = request.query_params
+            body = {
+                "search": params.get("search"),
+                "filter": params.get("$filter"),
+                "select": params.get("$select"),
+                "orderby": params.get("$orderby"),
+                "top": int(params["$top"]) if "$top" in params else None,
+                "skip": int(params.get("$skip", 0)),
+                "count": params.get("$count") == "true",
+            }
+            try:
+                return await run_in_threadpool(index.search, body)
+            except ValueError as e:
+                return _error(400, str(e))
+
+        if rest == "/docs/$count":
+            params = request.query_params
+            if "$filter" not in params and "search" not in params:
+                return PlainTextResponse(str(len(index.docs)))
+            body = {"search": params.get("search"), "filter": params.get("$filter"), "top": 0, "count": True}
+            try:
+                counted = await run_in_threadpool(index.search, body)
+            except ValueError as e:
+                return _error(400, str(e))
+            return PlainTextResponse(str(counted["@odata.count"]))
+
+        m = DOC_KEY_RE.match(rest)
+        if m and request.method == "GET":
+            doc = index.docs.get(m.group("quoted") or m.group("plain"))
+            if doc is None:
+                return _error(404, "Document not found.")
+            return {k: v for k, v in doc.items() if k not in index.vector_fields}
+
+        return _error(404, f"Nepodržana operacija {request.method} {request.url.path}")
+
+    return app
+
+
+def _auto_fields(index: EmulatedIndex, actions: List[Dict]):
+    """Polja auto-kreiranog indeksa iz prvih dokumenata (string = searchable, lista brojeva = vektor)."""
+    known = {f["name"] for f in index.definition["fields"]}
+    for action in actions:
+        for name, value in action.items():
+            if name.startswith("@") or name in known:
+                continue
+            known.add(name)
+            field = {"name": name, "key": name == index.key}
+            if isinstance(value, str):
+                field.update(type="Edm.String", searchable=name != index.key)
+            elif isinstance(value, list) and value and isinstance(value[0], (int, float)):
+                field.update(type="Collection(Edm.Single)")
+            index.definition["fields"].append(field)
+    index.searchable = [f["name"] for f in index.definition["fields"] if f.get("searchable")]
+    index.vector_fields = {f["name"] for f in index.definition["fields"] if f.get("type") == "Collection(Edm.Single)"}
+
+
+def seed_news(app: FastAPI, index_name: str = "news_cbcg") -> int:
+    """
+    Napuni news indeks člancima iz lokalnog document store-a (isti oblik kao Azure scraper).
+
+    "hash" je sha256 body-ja kao u scraper-u (body_digest); content u store-u je skraćen,
+    pa se koristi body_hash sačuvan pri skrejpovanju kad postoji.
+    """
+    from apps.functions.extract import body_digest
+    from apps.ingest.doc_store import get_store
+
+    index = EmulatedIndex({"name": index_name, "fields": [
+        {"name": "id", "type": "Edm.String", "key": True},
+        {"name": "title", "type": "Edm.String", "searchable": True},
+        {"name": "body", "type": "Edm.String", "searchable": True},
+        {"name": "url", "type": "Edm.String", "filterable": True},
+        {"name": "published_at", "type": "Edm.String", "filterable": True, "sortable": True},
+        {"name": "hash", "type": "Edm.String", "filterable": True},
+    ]})
+    actions = [
+        {
+            "@search.action": "upload",
+            "id": doc["id"],
+            "title": doc.get("title", ""),
+            "body": doc.get("content", ""),
+            "url": doc.get("url") or "",
+            "published_at": doc.get("published_at") or "",
+            "hash": doc.get("body_hash") or body_digest(doc.get("content", "")),
+        }
+        for doc in get_store().iter_documents() if doc.get("type") != "pdf"
+    ]
+    index.index_actions(actions)
+    app.state.indexes[index_name] = index
+    return len(actions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokalni Azure AI Search emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7700)
+    parser.add_argument("--seed-news", action="store_true", help="Napuni news_cbcg iz lokalnog document store-a")
+    parser.add_argument("--ssl-certfile")
+    parser.add_argument("--ssl-keyfile")
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = create_app()
+    if args.seed_news:
+        print(f"Seeded news_cbcg with {seed_news(app)} documents")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning",
+                ssl_certfile=args.ssl_certfile, ssl_keyfile=args.ssl_keyfile)
+
+
+if __name__ == "__main__":
+    main()
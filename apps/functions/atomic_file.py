@@ -0,0 +1,39 @@
+"""
+Atomičan upis fajla: tmp fajl pored cilja + os.replace.
+
+Čitalac (ili sledeći run posle prekida) vidi stari ili kompletan novi fajl, nikad
+polovičan. Samo standardna biblioteka - modul se koristi i iz Azure Function-a
+(root aplikacije je apps/functions) i iz apps/ingest.
+"""
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = 'w', encoding: Optional[str] = None) -> Iterator[IO]:
+    """
+    Otvori tmp fajl za upis; po izlasku iz bloka fajl se fsync-uje i zamjenjuje ciljni.
+
+    Ako blok baci izuzetak, ciljni fajl ostaje netaknut, a tmp fajl se briše.
+
+    Args:
+        path: Ciljni fajl (roditeljski direktorijum se pravi po potrebi)
+        mode: 'w' (tekst, podrazumijevano utf-8) ili 'wb'
+        encoding: Encoding za tekstualni mode
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(path.name + ".tmp")
+    if 'b' not in mode:
+        encoding = encoding or 'utf-8'
+    try:
+        with open(tmp_file, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,120 @@
+"""
+Asinhroni crawler: jedan httpx.AsyncClient sa connection pool-om,
+ograničena konkurentnost i token-bucket limit zahtjeva po hostu.
+"""
+import asyncio
+import os
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"}
+
+# Ukupno paralelnih zahtjeva i dozvoljen broj zahtjeva u sekundi po hostu (pristojno prema cbcg.me)
+SCRAPER_CONCURRENCY = int(os.getenv("SCRAPER_CONCURRENCY", "6"))
+SCRAPER_RATE_PER_HOST = float(os.getenv("SCRAPER_RATE_PER_HOST", "3"))
+SCRAPER_BURST = int(os.getenv("SCRAPER_BURST", "3"))
+
+# Statusi posle kojih se zahtjev ponavlja (sa Retry-After ako ga server pošalje)
+RETRY_STATUS = {429, 502, 503, 504}
+MAX_RETRIES = 3
+
+
+def response_size(r: httpx.Response) -> int:
+    """Preuzeti bajtovi (wire), ili dužina sadržaja ako transport ne broji bajtove."""
+    return r.num_bytes_downloaded or len(r.content)
+
+
+class TokenBucket:
+    """
+    Token bucket: `rate` tokena u sekundi, najviše `capacity` odjednom.
+    Svaki zahtjev troši jedan token; ako ga nema, čeka se dopuna.
+    """
+
+    def __init__(self, rate: float, capacity: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.updated = clock()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncCrawler:
+    """
+    Dijeljeni HTTP klijent za cijeli crawl.
+
+    Primjer:
+        async with AsyncCrawler() as crawler:
+            r = await crawler.get(url)
+    """
+
+    def __init__(
+        self,
+        concurrency: int = SCRAPER_CONCURRENCY,
+        rate_per_host: float = SCRAPER_RATE_PER_HOST,
+        burst: int = SCRAPER_BURST,
+        timeout: float = 30.0,
+        headers: Optional[Dict[str, str]] = None,
+        verify: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.buckets = defaultdict(lambda: TokenBucket(self.rate_per_host, self.burst))
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            headers=headers or DEFAULT_HEADERS,
+            verify=verify,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            transport=transport
+        )
+        self.requests = 0
+        self.bytes_received = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.client.aclose()
+
+    async def get(self, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """GET sa limitom po hostu, ograničenom konkurentnošću i retry-em na 429/5xx."""
+        host = urlsplit(url).netloc
+        for attempt in range(MAX_RETRIES + 1):
+            await self.buckets[host].acquire()
+            async with self.semaphore:
+                r = await self.client.get(url, headers=headers)
+            self.requests += 1
+            self.bytes_received += response_size(r)
+
+            if r.status_code not in RETRY_STATUS or attempt == MAX_RETRIES:
+                return r
+
+            try:
+                delay = float(r.headers.get("retry-after", ""))
+            except ValueError:
+                delay = 2.0 ** attempt
+            print(f"    {r.status_code} za {url}, ponovo za {delay:.1f}s")
+            await asyncio.sleep(delay)
+        return r
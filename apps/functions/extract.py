@@ -0,0 +1,123 @@
+"""
+Ekstrakcija članka sa cbcg.me u jednom prolazu: HTML se parsira jednom (selectolax, lexbor backend),
+a naslov, body (div.page-text), datum objave i jezik čitaju se iz istog stabla.
+
+Koriste je i lokalni scraper (local_scraper.parse_article) i Azure Function
+(scrape_timer/scraper.parse_article).
+"""
+import hashlib
+import re
+from datetime import datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from selectolax.lexbor import LexborHTMLParser as HTMLParser
+
+DEFAULT_TITLE = "CBCG Saopštenje"
+MAX_BODY_CHARS = 8000
+
+# Navigacija koja procuri u tekst kad stranica nema page-text div
+JUNK_RE = re.compile(r'(Kontakti|Mapa sajta|Najčešće postavljena pitanja|Home|O nama)', re.IGNORECASE)
+DATE_RE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+
+TITLE_SELECTORS = ("h1", "title", "h2[class*='title']", ".entry-title")
+BODY_FALLBACK_SELECTORS = ("article", "div[class*='content']")
+
+
+def doc_id_for_url(url: str) -> str:
+    """Stabilan id dokumenta izveden iz URL-a (izmijenjen članak zadržava id)."""
+    return f"cbcg_{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+
+
+def body_digest(body: str) -> str:
+    """sha256 body-ja članka - "hash" polje news indeksa (deduplikacija u scraper-u)."""
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def _text(node) -> str:
+    return ' '.join(node.text(separator=' ').split())
+
+
+def _title(tree: HTMLParser) -> str:
+    title = DEFAULT_TITLE
+    for selector in TITLE_SELECTORS:
+        node = tree.css_first(selector)
+        if node is not None:
+            title = _text(node)
+            if len(title) > 10:
+                break
+    return title or DEFAULT_TITLE
+
+
+def _body(tree: HTMLParser) -> str:
+    body = ""
+    for node in tree.css('div.page-text'):
+        body = _text(node)
+        if len(body) > 100:
+            break
+
+    # Fallback: najduži <article> / content div
+    if len(body) < 100:
+        for selector in BODY_FALLBACK_SELECTORS:
+            texts = [_text(node) for node in tree.css(selector)]
+            if texts:
+                body = max(texts, key=len)
+                break
+
+    body = ' '.join(JUNK_RE.sub('', body).split())
+    return body[:MAX_BODY_CHARS]
+
+
+def _published_at(tree: HTMLParser) -> Optional[str]:
+    """Datum objave kao ISO string, ili None ako ga stranica nema."""
+    # cbcg.me: <span class="date">06/11/2025</span>
+    for node in tree.css('.date'):
+        match = DATE_RE.search(node.text())
+        if match:
+            day, month, year = (int(g) for g in match.groups())
+            try:
+                return datetime(year, month, day).isoformat()
+            except ValueError:
+                continue
+
+    for node in tree.css('time[datetime], meta[property="article:published_time"]'):
+        value = node.attributes.get("datetime") or node.attributes.get("content")
+        if value:
+            try:
+                return datetime.fromisoformat(value.replace("Z", "+00:00")).isoformat()
+            except ValueError:
+                continue
+    return None
+
+
+def _lang(tree: HTMLParser, url: Optional[str]) -> Optional[str]:
+    root = tree.css_first("html")
+    lang = root.attributes.get("lang") if root is not None else None
+    if lang:
+        return lang.split("-")[0].lower()
+    # cbcg.me URL-ovi: /me/... i /en/...
+    if url:
+        segment = urlsplit(url).path.strip("/").split("/")[0]
+        if segment in ("me", "en"):
+            return segment
+    return None
+
+
+def extract_article(html: str, url: Optional[str] = None) -> Dict[str, Optional[str]]:
+    """
+    Izvuci članak iz HTML-a.
+
+    Args:
+        html: HTML stranice članka
+        url: URL članka (za jezik kad <html lang> nedostaje)
+
+    Returns:
+        {"title", "body", "published_at" (ISO ili None), "lang" (me/en ili None)}
+    """
+    tree = HTMLParser(html)
+    return {
+        "title": _title(tree),
+        "body": _body(tree),
+        "published_at": _published_at(tree),
+        "lang": _lang(tree, url),
+    }
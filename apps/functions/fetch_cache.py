@@ -0,0 +1,82 @@
+"""
+Perzistentni fetch cache za scrapere: ETag / Last-Modified i hash sadržaja po URL-u.
+
+Omogućava uslovne zahtjeve (If-None-Match / If-Modified-Since): 304 odgovor ili
+nepromijenjen hash sadržaja preskaču parsiranje i embedding.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    from apps.functions.atomic_file import atomic_write
+except ImportError:  # Azure Functions: root aplikacije je apps/functions
+    from atomic_file import atomic_write
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+# Relativna putanja iz env-a je relativna na PROJECT_ROOT (ne na radni direktorijum)
+FETCH_CACHE_FILE = PROJECT_ROOT / os.getenv("FETCH_CACHE_FILE", "data/fetch_cache.json")
+
+
+class FetchCache:
+    """Mapa url -> {etag, last_modified, content_hash, fetched_at}, snima se u JSON."""
+
+    def __init__(self, path: Path = FETCH_CACHE_FILE):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"UPOZORENJE: fetch cache nije učitan ({e}) - počinjem prazan")
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Headeri za uslovni GET na osnovu prethodnog odgovora."""
+        entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def update(self, url: str, status_code: int, headers, content: Optional[bytes]) -> bool:
+        """
+        Zabilježi odgovor.
+
+        Returns:
+            True ako je sadržaj nov ili promijenjen, False za 304 / isti hash
+        """
+        with self.lock:
+            entry = self.entries.setdefault(url, {})
+            entry["fetched_at"] = datetime.now().isoformat()
+
+            if status_code == 304:
+                return False
+
+            if headers.get("etag"):
+                entry["etag"] = headers["etag"]
+            if headers.get("last-modified"):
+                entry["last_modified"] = headers["last-modified"]
+
+            digest = hashlib.sha256(content or b"").hexdigest()
+            changed = entry.get("content_hash") != digest
+            entry["content_hash"] = digest
+            return changed
+
+    def forget(self, url: str):
+        """Zaboravi odgovor za URL (obrada ili upload nije uspio - sledeći run ga preuzima ponovo)."""
+        with self.lock:
+            self.entries.pop(url, None)
+
+    def save(self):
+        """Atomično snimanje (atomic_write)."""
+        with self.lock, atomic_write(self.path) as f:
+            json.dump(self.entries, f, ensure_ascii=False)
@@ -0,0 +1,53 @@
+"""
+Perzistentni URL frontier po sekciji (poznati članci) za inkrementalnu paginaciju.
+
+Dnevni crawl staje na prvoj stranici listinga koja sadrži samo poznate URL-ove;
+periodični full sweep prolazi cijelu arhivu (backfill i provjera izmjena).
+"""
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Set
+
+from apps.functions.atomic_file import atomic_write
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+# Relativna putanja iz env-a je relativna na PROJECT_ROOT (ne na radni direktorijum)
+FRONTIER_FILE = PROJECT_ROOT / os.getenv("FRONTIER_FILE", "data/frontier.json")
+
+
+class Frontier:
+    """Mapa sekcija -> {urls, last_full_sweep}, snima se u JSON."""
+
+    def __init__(self, path: Path = FRONTIER_FILE):
+        self.path = Path(path)
+        self.sections: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.sections = json.load(f)
+            except Exception as e:
+                print(f"UPOZORENJE: frontier nije učitan ({e}) - sledeći crawl je full sweep")
+
+    def known(self, section: str) -> Set[str]:
+        """Poznati URL-ovi sekcije."""
+        return set(self.sections.get(section, {}).get("urls", []))
+
+    def add(self, section: str, urls: Iterable[str]):
+        entry = self.sections.setdefault(section, {"urls": [], "last_full_sweep": None})
+        entry["urls"] = sorted(set(entry["urls"]) | set(urls))
+
+    def mark_full_sweep(self, section: str):
+        self.sections.setdefault(section, {"urls": [], "last_full_sweep": None})
+        self.sections[section]["last_full_sweep"] = datetime.now().isoformat()
+
+    def seed(self, section: str, urls: Iterable[str]):
+        """Inicijalno punjenje iz postojeće baze (ako sekcija još nema frontier)."""
+        if section not in self.sections:
+            self.add(section, urls)
+
+    def save(self):
+        """Atomično snimanje (atomic_write)."""
+        with atomic_write(self.path) as f:
+            json.dump(self.sections, f, ensure_ascii=False, indent=1)
@@ -2,9 +2,8 @@
 Lokalni scraper za cbcg.me (bez Azure Functions).
 Poboljšana verzija sa boljim parsing-om.
 """
-import httpx
+import asyncio
 import time
-import re
 from datetime import datetime
 from pathlib import Path
 import json
@@ -14,7 +13,12 @@ from selectolax.parser import HTMLParser
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
-from apps.ingest.local_storage import save_documents, load_documents, hash_content
+from apps.ingest.local_storage import save_documents
+from apps.ingest.doc_store import get_store, content_hash
+from apps.functions.crawler import AsyncCrawler, response_size
+from apps.functions.extract import body_digest, extract_article, doc_id_for_url
+from apps.functions.fetch_cache import FetchCache
+from apps.functions.frontier import Frontier
 
 # Content koje se skrejpuje SVAKI DAN
 DAILY_BASES = [
@@ -35,8 +39,13 @@ ONCE_BASES = [
 BASES = DAILY_BASES + ONCE_BASES
 
 
-def get_all_page_urls(base_url, client):
-    """Pronađi sve URL-ove sa svih stranica."""
+async def get_all_page_urls(base_url, crawler, stats=None, known=None):
+    """
+    Pronađi sve URL-ove sa svih stranica (stats["pages"] broji preuzete stranice).
+    
+    Sa `known` (frontier sekcije) paginacija staje na prvoj stranici koja sadrži
+    samo poznate URL-ove - noviji članci su uvijek na prvim stranicama.
+    """
     all_links = set()
     page = 1
     
@@ -48,8 +57,11 @@ def get_all_page_urls(base_url, client):
             else:
                 url = f"{base_url}?page={page}"
             
-            print(f"  Fetching page {page}...")
-            r = client.get(url)
+            print(f"  Fetching page {page}: {url}")
+            r = await crawler.get(url)
+            if stats is not None:
+                stats["pages"] = stats.get("pages", 0) + 1
+                stats["bytes"] = stats.get("bytes", 0) + response_size(r)
             r.raise_for_status()
             html = r.text
             
@@ -81,9 +93,13 @@ def get_all_page_urls(base_url, client):
                 break
             
             all_links.update(page_links)
-            page += 1
             
-            time.sleep(0.5)  # Throttle
+            # Inkrementalni mod: stranica bez ijednog novog URL-a = ostatak arhive je poznat
+            if known is not None and page_links <= known:
+                print(f"  Page {page} has only known URLs - stopping (incremental)")
+                break
+            
+            page += 1
             
         except Exception as e:
             print(f"    Error on page {page}: {e}")
@@ -92,192 +108,256 @@ def get_all_page_urls(base_url, client):
     return list(all_links)
 
 
-def scrape_cbcg():
-    """Scrape cbcg.me i dodaj u lokalni storage."""
-    print("Scraping cbcg.me...")
+def parse_article(link: str, content: str):
+    """
+    Parsiraj HTML članka u dokument (jedan selectolax prolaz, vidi extract.py).
     
-    # Check existing docs for "once" content
-    existing_docs = load_documents()
-    existing_urls = {doc.get("url") for doc in existing_docs if doc.get("url")}
+    Returns:
+        Dokument (dict) ili None ako je sadržaj prekratak
+    """
+    article = extract_article(content, link)
+    body = article["body"]
     
-    news_docs = []
+    # Sačuvaj samo ako ima dovoljno sadržaja
+    if len(body) <= 150:
+        return None
     
-    for base_url in BASES:
+    doc = {
+        "id": doc_id_for_url(link),
+        "title": article["title"],
+        "content": body[:3000],
+        "body_hash": body_digest(body),  # hash punog body-ja, kao "hash" u Azure news indeksu
+        "source": "cbcg.me",
+        "url": link,
+        "published_at": article["published_at"] or datetime.now().isoformat(),
+        "page": None,
+        "type": "news",
+        "lang": article["lang"]
+    }
+    return doc
+
+
+async def scrape_section(
+    base_url: str,
+    crawler: AsyncCrawler,
+    fetch_cache: FetchCache = None,
+    known_urls=frozenset(),
+    frontier: Frontier = None,
+    full_sweep: bool = True,
+    sink=None
+):
+    """
+    Skrejpuj jednu sekciju: paginacija + paralelno preuzimanje članaka.
+    
+    Članci koji su već u bazi preuzimaju se uslovno (ETag / Last-Modified iz fetch cache-a);
+    304 ili isti hash sadržaja preskaču parsiranje.
+    
+    Bez full_sweep (dnevni crawl) paginacija staje na prvoj stranici sa samo poznatim
+    URL-ovima iz frontier-a i preuzimaju se samo novi članci.
+    
+    Sa `sink` (async callable(link, html), streaming pipeline) HTML se predaje
+    sledećoj fazi umjesto parsiranja ovdje; pun red u sink-u usporava preuzimanje.
+    
+    Returns:
+        (docs, stats) - stats: pages, articles, saved, unchanged, bytes, seconds
+    """
+    start = time.perf_counter()
+    stats = {"pages": 0, "bytes": 0, "unchanged": 0}
+    known = frontier.known(base_url) if frontier is not None and not full_sweep else None
+    
+    # Get all links from all pages
+    links = await get_all_page_urls(base_url, crawler, stats, known=known)
+    if known is not None:
+        links = [link for link in links if link not in known]
+    print(f"  [{base_url}] Found {len(links)} articles to fetch ({'full sweep' if known is None else 'incremental'})")
+    failed = set()
+    
+    async def fetch_article(link):
         try:
-            print(f"\n=== Processing: {base_url} ===")
+            # Uslovni zahtjev samo za članke koje već imamo (304 nema body za nove)
+            known = fetch_cache is not None and link in known_urls
+            headers = fetch_cache.conditional_headers(link) if known else None
             
-            # Check if this is "once" content and already scraped
-            if base_url in ONCE_BASES:
-                # Provjeri ima li već dokumenata sa ovog URL-a
-                if any(base_url in url for url in existing_urls):
-                    print(f"  SKIP - Already scraped (once content)")
-                    continue
+            r = await crawler.get(link, headers=headers)
+            stats["bytes"] += response_size(r)
+            if r.status_code != 304:
+                r.raise_for_status()
             
-            with httpx.Client(
-                timeout=30.0, 
-                headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"},
-                verify=False,
-                follow_redirects=True
-            ) as client:
-                # Get all links from all pages
-                links = get_all_page_urls(base_url, client)
-                print(f"  Found {len(links)} articles across all pages")
-                
-                # Parse artikle - SVE (bez limita)
-                for idx, link in enumerate(links, 1):
-                    try:
-                        print(f"    [{idx}/{len(links)}] Parsing: {link}")
-                        
-                        r = client.get(link)
-                        r.raise_for_status()
-                        content = r.text
-                        
-                        # Extract naslov
-                        title = "CBCG Saopštenje"
-                        title_patterns = [
-                            r'<h1[^>]*>(.*?)</h1>',
-                            r'<title>(.*?)</title>',
-                            r'<h2[^>]*class="[^"]*title[^"]*"[^>]*>(.*?)</h2>',
-                            r'class="entry-title"[^>]*>(.*?)</',
-                        ]
-                        
-                        for pattern in title_patterns:
-                            match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
-                            if match:
-                                title = re.sub(r'<[^>]+>', '', match.group(1)).strip()
-                                if len(title) > 10:
-                                    break
-                        
-                        # Extract body
-                        # Extract body using selectolax - traži page-text div
-                        body = ""
-                        tree_content = HTMLParser(content)
-                        
-                        # Prvo pokušaj da nađeš page-text div
-                        for div in tree_content.css('div.page-text'):
-                            body = div.text()
-                            if len(body) > 100:
-                                break
-                        
-                        # Fallback: ako nema page-text, probaj ostale
-                        if not body or len(body) < 100:
-                            body_patterns = [
-                                r'<article[^>]*>(.*?)</article>',
-                                r'<div[^>]*class="[^"]*content[^"]*"[^>]*>(.*?)</div>',
-                            ]
-                            
-                            for pattern in body_patterns:
-                                matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
-                                if matches:
-                                    body = max(matches, key=len)
-                                    break
-                        
-                        # Clean body text (ukloni extra whitespace)
-                        if body:
-                            # Remove common junk
-                            body = re.sub(r'(Kontakti|Mapa sajta|Najčešće postavljena pitanja|Home|O nama)', '', body, flags=re.IGNORECASE)
-                            body = ' '.join(body.split())  # Normalize whitespace
-                            body = body.strip()
-                            
-                            # Remove if still too long (probably includes header/footer)
-                            if len(body) > 8000:
-                                body = body[:8000]
-                        
-                        # Extract publication date from HTML
-                        published_at = datetime.now().isoformat()  # Fallback to now
-                        try:
-                            # Try to find date in format DD/MM/YYYY
-                            date_match = re.search(r"class=['\"]date['\"][^>]*>(\d{1,2}/\d{1,2}/\d{4})<", html_content)
-                            if date_match:
-                                date_str = date_match.group(1)  # e.g., "06/11/2025"
-                                # Parse DD/MM/YYYY to ISO format
-                                date_obj = datetime.strptime(date_str, "%d/%m/%Y")
-                                published_at = date_obj.isoformat()
-                        except Exception as e:
-                            # If date parsing fails, use current time
-                            pass
-                        
-                        # Save if sufficient content
-                        if len(body) > 150:
-                            doc_id = f"cbcg_{hash_content(link)}"
-                            doc = {
-                                "id": doc_id,
-                                "title": title,
-                                "content": body[:3000],
-                                "source": "cbcg.me",
-                                "url": link,
-                                "published_at": published_at,
-                                "page": None,
-                                "type": "news"
-                            }
-                            news_docs.append(doc)
-                            print(f"      OK Saved: {title[:60]}...")
-                        else:
-                            print(f"      SKIP Too short, skipping")
-                        
-                        time.sleep(0.3)
-                    
-                    except Exception as e:
-                        print(f"      ERROR: {e}")
-                        continue
-        
+            if fetch_cache is not None:
+                changed = fetch_cache.update(link, r.status_code, r.headers, r.content if r.status_code != 304 else None)
+                if known and not changed:
+                    stats["unchanged"] += 1
+                    return None
+            
+            if sink is not None:
+                await sink(link, r.text)
+                return None
+            
+            doc = parse_article(link, r.text)
+            if doc:
+                print(f"      OK Saved: {doc['title'][:60]}...")
+            else:
+                print(f"      SKIP Too short: {link}")
+            return doc
         except Exception as e:
-            print(f"  Error fetching {base_url}: {e}")
+            print(f"      ERROR {link}: {e}")
+            failed.add(link)
+            return None
+    
+    # Parse artikle - SVE (bez limita), konkurentnost i tempo ograničava crawler
+    results = await asyncio.gather(*(fetch_article(link) for link in links))
+    docs = [doc for doc in results if doc]
+    
+    # Neuspjeli članci ostaju van frontier-a da bi se sledeći put ponovo pokušali
+    if frontier is not None:
+        frontier.add(base_url, set(links) - failed)
+        if full_sweep:
+            frontier.mark_full_sweep(base_url)
+    
+    stats.update({
+        "articles": len(links),
+        "saved": len(docs) if sink is None else len(links) - len(failed) - stats["unchanged"],
+        "seconds": time.perf_counter() - start,
+    })
+    return docs, stats
+
+
+async def crawl_sections(bases, fetch_cache: FetchCache = None, known_urls=frozenset(),
+                         frontier: Frontier = None, full_sweep: bool = True, sink=None):
+    """Skrejpuj sve sekcije paralelno, sa jednim dijeljenim (pooled) klijentom."""
+    async with AsyncCrawler() as crawler:
+        async def run(base_url):
+            try:
+                return base_url, *(await scrape_section(
+                    base_url, crawler, fetch_cache, known_urls, frontier, full_sweep, sink
+                ))
+            except Exception as e:
+                print(f"  Error fetching {base_url}: {e}")
+                return base_url, [], {"pages": 0, "articles": 0, "saved": 0, "unchanged": 0,
+                                      "bytes": 0, "seconds": 0.0, "error": str(e)}
+        
+        return await asyncio.gather(*(run(base_url) for base_url in bases))
+
+
+def scrape_cbcg(full_sweep: bool = False, streaming: bool = True):
+    """
+    Scrape cbcg.me i dodaj u lokalni storage.
+    
+    Args:
+        full_sweep: Prođi cijelu arhivu svake sekcije (backfill + provjera izmjena);
+            inače samo nove stranice do prve sa poznatim URL-ovima
+        streaming: Članci prolaze kroz streaming pipeline (apps/functions/pipeline.py)
+            i postaju pretraživi tokom crawl-a; False = stari batch tok
+    """
+    print(f"Scraping cbcg.me ({'full sweep' if full_sweep else 'incremental'})...")
+    
+    # Check existing docs for "once" content
+    store = get_store()
+    existing_urls = store.urls()
+    
+    bases = []
+    for base_url in BASES:
+        # Check if this is "once" content and already scraped
+        if base_url in ONCE_BASES and any(base_url in url for url in existing_urls):
+            print(f"  SKIP - Already scraped (once content): {base_url}")
             continue
+        bases.append(base_url)
+    
+    fetch_cache = FetchCache()
+    frontier = Frontier()
+    for base_url in bases:
+        # Prvi inkrementalni run: frontier iz postojeće baze
+        frontier.seed(base_url, (url for url in existing_urls if url.startswith(base_url)))
+    
+    start = time.perf_counter()
+    if streaming:
+        from apps.functions.pipeline import stream_sections
+        sections, report = asyncio.run(stream_sections(bases, fetch_cache, existing_urls, frontier, full_sweep))
+    else:
+        sections = asyncio.run(crawl_sections(bases, fetch_cache, existing_urls, frontier, full_sweep))
+    elapsed = time.perf_counter() - start
+    fetch_cache.save()
+    frontier.save()
+    
+    news_docs = []
+    total_bytes = 0
+    fetch_unchanged = 0
+    print(f"\n=== CRAWL REPORT ({elapsed:.1f}s) ===")
+    for base_url, docs, stats in sections:
+        news_docs.extend(docs)
+        total_bytes += stats['bytes']
+        fetch_unchanged += stats['unchanged']
+        section = base_url.rsplit('/', 1)[-1]
+        print(f"  {section:<40} pages={stats['pages']:<4} articles={stats['articles']:<5} "
+              f"saved={stats['saved']:<5} unchanged={stats['unchanged']:<5} "
+              f"{stats['bytes'] / 1024:.0f} KB {stats['seconds']:.1f}s")
+    print(f"  Transferred: {total_bytes / 1024 / 1024:.2f} MB")
+    
+    if streaming:
+        # Novi članci su već u bazi i live indexu; izmijenjeni traže rebuild (embeddinzi su u cache-u)
+        if report["rebuild_needed"]:
+            try:
+                print(f"\n  Rebuilding vector index for changed articles...")
+                from apps.ingest.local_storage_vector_multilingual import build_vector_index
+                build_vector_index()
+            except Exception as e:
+                print(f"  WARNING: Could not rebuild vector index: {e}")
+        return report["new"] + report["changed"]
     
     if news_docs:
-        print(f"\n=== CHECKING FOR NEW ARTICLES ===")
-        existing_docs = load_documents()
-        
-        # Mapiraj postojeće URL-ove za brzu provjeru
-        existing_urls = {doc.get("url") for doc in existing_docs if doc.get("url")}
-        existing_titles = {doc.get("title") for doc in existing_docs if doc.get("title")}
+        print(f"\n=== CHECKING FOR NEW / CHANGED ARTICLES ===")
+        # Hash sadržaja po URL-u i naslovi iz baze (bez učitavanja cijele baze)
+        existing_hashes = store.hashes_by_url()
+        existing_titles = store.titles()
         
-        print(f"  Existing in database: {len(existing_docs)} documents")
+        print(f"  Existing in database: {store.count()} documents")
         print(f"  Scraped today: {len(news_docs)} articles")
         
-        # Pronađi nove - razlika u URL-u ILI u naslovu
+        # Novi = nepoznat URL (i naslov); izmijenjeni = poznat URL sa drugačijim hash-om sadržaja
         new_docs = []
-        skipped = []
+        changed_docs = []
+        unchanged = fetch_unchanged
         
         for doc in news_docs:
             doc_url = doc.get("url", "")
-            doc_title = doc.get("title", "")
             
-            # Provjeri da li postoji
-            if doc_url in existing_urls:
-                skipped.append(f"URL: {doc_url[:60]}...")
-            elif doc_title in existing_titles:
-                skipped.append(f"Title: {doc_title[:60]}...")
+            if doc_url in existing_hashes:
+                if existing_hashes[doc_url] == content_hash(doc):
+                    unchanged += 1
+                else:
+                    changed_docs.append(doc)
+            elif doc.get("title", "") in existing_titles:
+                unchanged += 1
             else:
                 new_docs.append(doc)
         
         print(f"\n  RESULTS:")
-        print(f"  - New articles found: {len(new_docs)}")
-        print(f"  - Already in database: {len(skipped)}")
+        print(f"  - New: {len(new_docs)}, changed: {len(changed_docs)}, unchanged: {unchanged}")
         
-        if new_docs:
-            print(f"\n  Adding new articles to database...")
-            all_docs = existing_docs + new_docs
-            save_documents(all_docs)
-            print(f"  SUCCESS: Total documents now: {len(all_docs)}")
+        if new_docs or changed_docs:
+            print(f"\n  Upserting new/changed articles to database...")
+            # Id je izveden iz URL-a, pa izmijenjen članak zamjenjuje stari red
+            save_documents(new_docs + changed_docs)
+            print(f"  SUCCESS: Total documents now: {store.count()}")
             
-            # Prikaži prve 3 nove (sanitize za Windows console)
-            for i, doc in enumerate(new_docs[:3], 1):
+            # Prikaži prve 3 nove/izmijenjene (sanitize za Windows console)
+            for i, doc in enumerate((new_docs + changed_docs)[:3], 1):
                 title = doc.get('title', 'No title')
                 safe_title = title.encode('ascii', 'ignore').decode('ascii')
                 print(f"    {i}. {safe_title[:70]}")
             
-            # Rebuild vector index
+            # Rebuild vector index (re-embeduju se samo passage-i kojih nema u embedding cache-u)
             try:
                 print(f"\n  Rebuilding vector index...")
-                from apps.ingest.local_storage_vector import build_vector_index
+                from apps.ingest.local_storage_vector_multilingual import build_vector_index
                 build_vector_index()
                 print(f"  Vector index rebuilt successfully!")
             except Exception as e:
                 print(f"  WARNING: Could not rebuild vector index: {e}")
         else:
-            print(f"\n  INFO: No new articles - database is up to date!")
+            print(f"\n  INFO: No new or changed articles - database is up to date!")
+    elif fetch_unchanged:
+        print(f"\n  INFO: No new or changed articles ({fetch_unchanged} unchanged)")
     else:
         print("\n  ERROR: No articles scraped (check website or network)")
     
@@ -285,4 +365,5 @@ def scrape_cbcg():
 
 
 if __name__ == "__main__":
-    scrape_cbcg()
+    # --full: periodični full sweep cijele arhive; --batch: bez streaming pipeline-a
+    scrape_cbcg(full_sweep="--full" in sys.argv, streaming="--batch" not in sys.argv)
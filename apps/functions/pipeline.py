@@ -0,0 +1,251 @@
+"""
+Streaming ingest pipeline: crawler -> ekstrakcija -> embedding -> index writer.
+
+Faze su povezane ograničenim asyncio redovima: pun red usporava prethodnu fazu
+(backpressure), a svaki novi članak postaje pretraživ čim ga index writer
+objavi (prvi odmah, dalje batch-ovano po LIVE_INDEX_PUBLISH_*), ne tek na kraju crawl-a.
+Greška jedne stavke se loguje i ne zaustavlja fazu; ako faza ipak padne, ostale
+se otkazuju (inače bi se redovi napunili i crawl bi visio na put()).
+"""
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from apps.functions.fetch_cache import FetchCache
+from apps.functions.frontier import Frontier
+from apps.functions.local_scraper import crawl_sections, parse_article
+from apps.ingest import local_storage_vector_multilingual as vector_store
+from apps.ingest.doc_store import DocStore, content_hash, get_store
+
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "32"))
+PIPELINE_EMBED_BATCH = int(os.getenv("PIPELINE_EMBED_BATCH", "16"))
+# Koliko često write faza poziva flush index writer-a (sekunde); writer sam batch-uje objave
+FLUSH_SECONDS = float(os.getenv("PIPELINE_FLUSH_SECONDS", "5"))
+
+_DONE = object()
+
+
+class StageStats:
+    """Broj obrađenih stavki i vrijeme rada jedne faze."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+
+    @contextmanager
+    def work(self, items: int = 1):
+        start = time.perf_counter()
+        yield
+        self.busy += time.perf_counter() - start
+        self.items += items
+
+    def report(self, wall: float) -> str:
+        rate = self.items / wall if wall else 0.0
+        line = f"  {self.name:<10} items={self.items:<6} {rate:>7.2f}/s"
+        if self.busy:
+            line += f"  busy={100 * self.busy / wall:.0f}%"
+        return line
+
+
+class Pipeline:
+    """Jedan streaming run; counts: new / changed / unchanged / skipped / failed."""
+
+    def __init__(self, store: Optional[DocStore] = None, writer=None, queue_size: int = PIPELINE_QUEUE_SIZE,
+                 embed_batch: int = PIPELINE_EMBED_BATCH, flush_seconds: float = FLUSH_SECONDS):
+        self.store = store or get_store()
+        self.writer = writer if writer is not None else vector_store.LiveIndexWriter()
+        self.html_q = asyncio.Queue(queue_size)
+        self.doc_q = asyncio.Queue(queue_size)
+        self.write_q = asyncio.Queue(queue_size)
+        self.embed_batch = embed_batch
+        self.flush_seconds = flush_seconds
+        self.existing_hashes = self.store.hashes_by_url()
+        self.existing_titles = self.store.titles()
+        self.embedding_cache = vector_store.load_embedding_cache()
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0, "skipped": 0, "failed": 0}
+        self.stages = {name: StageStats(name) for name in ("fetch", "extract", "embed", "write")}
+        self.first_searchable: Optional[float] = None
+        self.embed_failed = False
+        self.flush_failed = False
+        self.fetch_cache: Optional[FetchCache] = None
+
+    async def sink(self, link: str, html: str):
+        """Ulaz iz crawler-a (await na punom redu = backpressure na preuzimanje)."""
+        self.stages["fetch"].items += 1
+        await self.html_q.put((link, html))
+
+    async def extract(self):
+        while (item := await self.html_q.get()) is not _DONE:
+            link, html = item
+            try:
+                with self.stages["extract"].work():
+                    doc = parse_article(link, html)
+            except Exception as e:
+                print(f"      ERROR extract {link}: {e}")
+                doc = None
+            if doc is None:
+                self.counts["skipped"] += 1
+                continue
+            if link in self.existing_hashes:
+                if self.existing_hashes[link] == content_hash(doc):
+                    self.counts["unchanged"] += 1
+                    continue
+                kind = "changed"
+            elif doc["title"] in self.existing_titles:
+                self.counts["unchanged"] += 1
+                continue
+            else:
+                kind = "new"
+            self.counts[kind] += 1
+            await self.doc_q.put((doc, kind))
+        await self.doc_q.put(_DONE)
+
+    def _embed(self, batch) -> List[Dict]:
+        """Embedding passage-a batch-a (u pozadinskoj niti; cache preskače poznate tekstove)."""
+        items = []
+        missing = {}
+        for doc, kind in batch:
+            pairs = vector_store.doc_passage_texts(doc)
+            keys = [vector_store.cache_key(text) for _, text in pairs]
+            missing.update({key: text for key, (_, text) in zip(keys, pairs) if key not in self.embedding_cache})
+            items.append((doc, kind, [passage for passage, _ in pairs], keys))
+        if missing:
+            vectors = vector_store.encode_passages(list(missing.values()), batch_size=32)
+            for key, vector in zip(missing, vectors):
+                self.embedding_cache[key] = np.asarray(vector, dtype='float32')
+        return [
+            (doc, kind, passages, np.array([self.embedding_cache[key] for key in keys], dtype='float32'))
+            for doc, kind, passages, keys in items
+        ]
+
+    async def embed(self):
+        done = False
+        while not done:
+            batch = []
+            item = await self.doc_q.get()
+            # Skupi batch od onoga što je već u redu (bez čekanja na pun batch)
+            while item is not _DONE:
+                batch.append(item)
+                if len(batch) >= self.embed_batch or self.doc_q.empty():
+                    break
+                item = self.doc_q.get_nowait()
+            done = item is _DONE
+            if batch:
+                try:
+                    with self.stages["embed"].work(len(batch)):
+                        embedded = await asyncio.to_thread(self._embed, batch)
+                except Exception as e:
+                    # Bez vektora dokumenti ipak idu u bazu; index ih dobija u rebuild-u
+                    print(f"      ERROR embed ({len(batch)} docs): {e}")
+                    self.embed_failed = True
+                    embedded = [(doc, kind, None, None) for doc, kind in batch]
+                for entry in embedded:
+                    await self.write_q.put(entry)
+        await self.write_q.put(_DONE)
+
+    def _flush(self, force: bool = False):
+        try:
+            if self.writer.available and self.writer.flush(force=force) and self.first_searchable is None:
+                self.first_searchable = time.perf_counter()
+        except Exception as e:
+            # Live index zaostaje; dokumenti su u bazi, index ih dobija u rebuild-u
+            print(f"      ERROR index flush: {e}")
+            self.flush_failed = True
+
+    async def write(self):
+        last_flush = time.perf_counter()
+        while True:
+            if not self.write_q.empty():
+                item = self.write_q.get_nowait()
+            else:
+                try:
+                    timeout = max(0.0, self.flush_seconds - (time.perf_counter() - last_flush))
+                    item = await asyncio.wait_for(self.write_q.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    item = None
+            # Red prazan ceo flush interval: objavi odmah, bez čekanja publish praga writer-a
+            idle = item is None
+            if item is _DONE:
+                break
+            if item is not None:
+                doc, kind, passages, vectors = item
+                try:
+                    with self.stages["write"].work():
+                        self.store.upsert([doc])
+                        # Novi dokumenti idu direktno u live index; izmijenjeni čekaju rebuild na kraju
+                        if kind == "new" and self.writer.available and vectors is not None:
+                            self.writer.add(doc, passages, vectors)
+                except Exception as e:
+                    print(f"      ERROR write {doc['url']}: {e}")
+                    self.counts["failed"] += 1
+                    # Sledeći run članak preuzima ponovo (ne vidi ga kao nepromijenjen)
+                    if self.fetch_cache is not None:
+                        self.fetch_cache.forget(doc["url"])
+            if time.perf_counter() - last_flush >= self.flush_seconds:
+                await asyncio.to_thread(self._flush, idle)
+                last_flush = time.perf_counter()
+        await asyncio.to_thread(self._flush, True)
+
+    async def run(self, bases, fetch_cache: FetchCache = None, known_urls=frozenset(),
+                  frontier: Frontier = None, full_sweep: bool = True):
+        """
+        Pokreni crawl i sve faze paralelno.
+
+        Returns:
+            (sections, report) - sections kao crawl_sections, report sa counts, throughput i latencijom
+        """
+        start = time.perf_counter()
+        self.fetch_cache = fetch_cache
+        consumers = [asyncio.create_task(coro) for coro in (self.extract(), self.embed(), self.write())]
+        crawl = asyncio.create_task(
+            crawl_sections(bases, fetch_cache, known_urls, frontier, full_sweep, sink=self.sink)
+        )
+
+        def stop_on_error(task):
+            # Pala faza više ne prazni svoj red - otkaži crawl i ostale faze
+            if not task.cancelled() and task.exception() is not None:
+                for other in (crawl, *consumers):
+                    other.cancel()
+
+        for task in consumers:
+            task.add_done_callback(stop_on_error)
+        try:
+            sections = await crawl
+        finally:
+            # Faza koja je završila prije _DONE je pala (ili otkazana) - put() bi čekao zauvijek
+            if not any(task.done() for task in consumers):
+                await self.html_q.put(_DONE)
+            results = await asyncio.gather(*consumers, return_exceptions=True)
+            vector_store.save_embedding_cache(self.embedding_cache)
+            errors = [r for r in results if isinstance(r, Exception)]
+            if errors:
+                raise errors[0]
+
+        wall = time.perf_counter() - start
+        report = {
+            **self.counts,
+            "seconds": wall,
+            "first_searchable": self.first_searchable - start if self.first_searchable else None,
+            "rebuild_needed": (self.counts["changed"] > 0 or self.embed_failed or self.flush_failed
+                               or (self.counts["new"] > 0 and not self.writer.available)),
+        }
+        print(f"\n=== PIPELINE ({wall:.1f}s) ===")
+        for stage in self.stages.values():
+            print(stage.report(wall))
+        print(f"  new={self.counts['new']} changed={self.counts['changed']} "
+              f"unchanged={self.counts['unchanged']} skipped={self.counts['skipped']} failed={self.counts['failed']}")
+        if report["first_searchable"] is not None:
+            print(f"  First new article searchable after {report['first_searchable']:.1f}s")
+        return sections, report
+
+
+async def stream_sections(bases, fetch_cache: FetchCache = None, known_urls=frozenset(),
+                          frontier: Frontier = None, full_sweep: bool = True, **pipeline_kwargs):
+    """Streaming varijanta crawl_sections (redovi se prave unutar event loop-a)."""
+    pipeline = Pipeline(**pipeline_kwargs)
+    return await pipeline.run(bases, fetch_cache, known_urls, frontier, full_sweep)
@@ -3,15 +3,26 @@ Etički scraper za cbcg.me sa throttling-om i delta-detekcijom.
 """
 import httpx
 import time
-import hashlib
+import json
 import os
-import uuid
-from datetime import datetime
-from typing import Set
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Set
 from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import HttpResponseError
 from azure.search.documents import SearchClient
 from dotenv import load_dotenv
 
+try:
+    from apps.functions.extract import body_digest, extract_article, doc_id_for_url
+    from apps.functions.fetch_cache import FetchCache
+    from apps.functions.atomic_file import atomic_write
+except ImportError:  # Azure Functions: root aplikacije je apps/functions
+    from extract import body_digest, extract_article, doc_id_for_url
+    from fetch_cache import FetchCache
+    from atomic_file import atomic_write
+
 load_dotenv()
 
 SEARCH_ENDPOINT = os.environ["AZURE_SEARCH_ENDPOINT"]
@@ -26,18 +37,43 @@ BASES = [
 # User-Agent za etično ponašanje
 HEADERS = {"User-Agent": "cbcgbot/1.0"}
 
+# Fetch cache (ETag / Last-Modified / hash) - Functions sandbox ima upisiv temp direktorijum
+FETCH_CACHE_FILE = Path(os.getenv("FETCH_CACHE_FILE", Path(tempfile.gettempdir()) / "cbcg_fetch_cache.json"))
+
+# Lokalna kopija id -> {url, hash, published_at} iz news indeksa (inkrementalni sync)
+KNOWN_DOCS_FILE = Path(os.getenv("KNOWN_DOCS_FILE", Path(tempfile.gettempdir()) / "cbcg_known_docs.json"))
+# Pun sync indeksa najmanje jednom u ovom periodu; inače samo dokumenti od watermark-a
+KNOWN_DOCS_FULL_SYNC_HOURS = float(os.getenv("KNOWN_DOCS_FULL_SYNC_HOURS", "168"))
+SYNC_OVERLAP_DAYS = 7
+SYNC_PAGE_SIZE = 1000
+
+# Preuzeti bajtovi u tekućem run-u
+bytes_received = 0
+
 
-def fetch(url: str, timeout: float = 30.0) -> tuple[str, str]:
+def make_client(timeout: float = 30.0, transport: Optional[httpx.BaseTransport] = None) -> httpx.Client:
+    """Jedan klijent (connection pool, keep-alive) za cijeli run."""
+    return httpx.Client(timeout=timeout, headers=HEADERS, follow_redirects=True, transport=transport)
+
+
+def fetch(client: httpx.Client, url: str, cache: Optional[FetchCache] = None) -> Optional[tuple[str, str]]:
     """
-    HTTP fetch sa throttling.
+    HTTP fetch preko dijeljenog klijenta.
+    
+    Sa `cache` šalje uslovni zahtjev (If-None-Match / If-Modified-Since).
     
     Returns:
-        (html_text, final_url)
+        (html_text, final_url), ili None ako se sadržaj nije promijenio (304 / isti hash)
     """
-    with httpx.Client(timeout=timeout, headers=HEADERS, follow_redirects=True) as client:
-        r = client.get(url)
+    global bytes_received
+    headers = cache.conditional_headers(url) if cache else {}
+    r = client.get(url, headers=headers)
+    if r.status_code != 304:
         r.raise_for_status()
-        return r.text, str(r.url)
+    bytes_received += r.num_bytes_downloaded or len(r.content)
+    if cache and not cache.update(url, r.status_code, r.headers, r.content if r.status_code != 304 else None):
+        return None
+    return r.text, str(r.url)
 
 
 def find_article_links(html: str, base_url: str) -> list[str]:
@@ -54,110 +90,309 @@ def find_article_links(html: str, base_url: str) -> list[str]:
     for a in dom.css("a"):
         href = a.attributes.get("href", "")
         if "/saopstenja/" in href or "/aktuelno/" in href:
-            full_url = httpx.URL(href, base=base_url).human_repr()
+            full_url = str(httpx.URL(base_url).join(href))
             if full_url not in links:
                 links.append(full_url)
     
     return links
 
 
-def parse_article(html: str) -> tuple[str, str, str, str]:
+def parse_article(html: str, url: Optional[str] = None) -> tuple[str, str, str, str]:
     """
-    Parsiranje članka (naslov, datum, body, hash).
+    Parsiranje članka (naslov, datum, body, hash) - dijeljena ekstrakcija iz extract.py.
     
     Returns:
         (title, published_at, body, digest)
     """
-    from selectolax.parser import HTMLParser
-    
-    dom = HTMLParser(html)
-    
-    # Naslov
-    title_el = dom.css_first("h1")
-    title = title_el.text(strip=True) if title_el else ""
-    
-    # Datum
-    time_el = dom.css_first("time")
-    published_at = time_el.attributes.get("datetime", "") if time_el else ""
-    
-    # Body
-    paragraphs = [p.text(strip=True) for p in dom.css("p") if p.text(strip=True)]
-    body = "\n".join(paragraphs)
+    article = extract_article(html, url)
+    body = article["body"]
     
     # Hash za deduplikaciju
-    digest = hashlib.sha256(body.encode("utf-8")).hexdigest()
+    digest = body_digest(body)
     
-    return title, published_at, body, digest
+    return article["title"], article["published_at"] or "", body, digest
 
 
-def load_seen_hashes(search_client: SearchClient, top: int = 100) -> Set[str]:
+def normalize_date(value: Optional[str]) -> Optional[str]:
+    """ISO published_at (bez zone, do sekunde) za poređenje; None ako se ne može parsirati."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat(timespec="seconds")
+
+
+SYNC_SELECT = ["id", "url", "hash", "published_at"]
+
+
+def iter_index_docs(search_client: SearchClient, filter: Optional[str] = None) -> Iterator[Dict]:
     """
-    Učitaj postojeće hash-eve za delta-detekciju.
+    Svi dokumenti indeksa (samo id/url/hash/published_at), stranica po stranica.
+    
+    Paginacija po ključu (order by id, id gt poslednji) - stabilan poredak stranica
+    i bez ograničenja skip-a. Indeksi napravljeni prije sortable id-a (atribut postojećeg
+    polja se ne može promijeniti bez rekreiranja indeksa) odbijaju order by id - za njih
+    se paginira skip-om.
     """
-    seen = set()
+    last_id = None
+    while True:
+        page_filter = filter
+        if last_id is not None:
+            key_filter = "id gt '{}'".format(last_id.replace("'", "''"))
+            page_filter = f"({filter}) and {key_filter}" if filter else key_filter
+        try:
+            page = list(search_client.search(
+                search_text="*",
+                select=SYNC_SELECT,
+                filter=page_filter,
+                order_by=["id asc"],
+                top=SYNC_PAGE_SIZE
+            ))
+        except HttpResponseError as e:
+            if last_id is not None:
+                raise
+            print(f"Keyset sync not possible ({e.message}) - id is not sortable, paging with skip")
+            yield from _iter_index_docs_skip(search_client, filter)
+            return
+        yield from page
+        if len(page) < SYNC_PAGE_SIZE:
+            break
+        last_id = page[-1]["id"]
+
+
+def _iter_index_docs_skip(search_client: SearchClient, filter: Optional[str] = None) -> Iterator[Dict]:
+    """Paginacija skip-om (indeks bez sortable id-a; Azure dozvoljava skip do 100000)."""
+    skip = 0
+    while True:
+        page = list(search_client.search(
+            search_text="*",
+            select=SYNC_SELECT,
+            filter=filter,
+            top=SYNC_PAGE_SIZE,
+            skip=skip
+        ))
+        yield from page
+        if len(page) < SYNC_PAGE_SIZE:
+            break
+        skip += SYNC_PAGE_SIZE
+
+
+class KnownDocs:
+    """
+    Kompletan skup poznatih članaka za O(1) dedupe (po id-u i URL-u, pa po hash-u body-ja).
     
-    try:
-        results = search_client.search(search_text="*", top=top, order_by=["search.score() desc"])
-        for doc in results:
-            if "hash" in doc:
-                seen.add(doc["hash"])
-    except Exception as e:
-        print(f"Error loading seen hashes: {e}")
+    Čuva se u temp direktorijumu između run-ova; sync sa indeksom je inkrementalan
+    (published_at >= watermark - SYNC_OVERLAP_DAYS), uz periodični pun sync.
+    """
+    
+    def __init__(self, path: Path = KNOWN_DOCS_FILE):
+        self.path = Path(path)
+        self.docs: Dict[str, Dict] = {}
+        self.watermark: Optional[str] = None
+        self.full_sync_at: Optional[str] = None
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    state = json.load(f)
+                self.docs = state["docs"]
+                self.watermark = normalize_date(state.get("watermark"))
+                self.full_sync_at = state.get("full_sync_at")
+            except Exception as e:
+                print(f"Known docs state not loaded ({e}) - full sync")
+        self._reindex()
+    
+    def _reindex(self):
+        self.ids_by_hash: Dict[str, Set[str]] = {}
+        self.ids_by_url: Dict[str, Set[str]] = {}
+        for doc_id, entry in self.docs.items():
+            self._link(doc_id, entry)
+    
+    def _link(self, doc_id: str, entry: Dict):
+        if entry.get("hash"):
+            self.ids_by_hash.setdefault(entry["hash"], set()).add(doc_id)
+        self.ids_by_url.setdefault(entry.get("url"), set()).add(doc_id)
+    
+    def _unlink(self, doc_id: str, entry: Dict):
+        for index, key in ((self.ids_by_hash, entry.get("hash")), (self.ids_by_url, entry.get("url"))):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del index[key]
+    
+    def add(self, doc_id: str, url: Optional[str], digest: Optional[str], published_at: Optional[str]):
+        if doc_id in self.docs:
+            self._unlink(doc_id, self.docs[doc_id])
+        self.docs[doc_id] = {"url": url, "hash": digest, "published_at": published_at}
+        self._link(doc_id, self.docs[doc_id])
+        published = normalize_date(published_at)
+        if published and (self.watermark is None or published > self.watermark):
+            self.watermark = published
+    
+    def remove(self, doc_id: str):
+        entry = self.docs.pop(doc_id, None)
+        if entry:
+            self._unlink(doc_id, entry)
     
-    return seen
+    def is_duplicate_body(self, digest: str) -> bool:
+        """
+        Isti body kao dokument bez URL-a (stari unosi koji se ne mogu upariti po URL-u).
+        Isti body pod drugim poznatim URL-om je legitiman duplikat i upload-uje se.
+        """
+        return any(self.docs[doc_id].get("url") is None for doc_id in self.ids_by_hash.get(digest, ()))
+    
+    def needs_full_sync(self) -> bool:
+        if not self.full_sync_at:
+            return True
+        age = datetime.utcnow() - datetime.fromisoformat(self.full_sync_at)
+        return age > timedelta(hours=KNOWN_DOCS_FULL_SYNC_HOURS)
+    
+    def sync(self, search_client: SearchClient) -> int:
+        """Povuci iz indeksa dokumente kojih nema lokalno. Vraća broj pročitanih dokumenata."""
+        full = self.needs_full_sync() or self.watermark is None
+        previous = (dict(self.docs), self.watermark)
+        if full:
+            self.docs = {}
+            self._reindex()
+            filter = None
+        else:
+            since = (datetime.fromisoformat(self.watermark) - timedelta(days=SYNC_OVERLAP_DAYS)).isoformat()
+            filter = f"published_at ge '{since}'"
+        
+        count = 0
+        try:
+            for doc in iter_index_docs(search_client, filter):
+                self.add(doc["id"], doc.get("url"), doc.get("hash"), doc.get("published_at"))
+                count += 1
+        except Exception:
+            # Prekinut sync ne ostavlja polovičan skup - vraća se prethodno stanje
+            self.docs, self.watermark = previous
+            self._reindex()
+            raise
+        
+        if full:
+            self.full_sync_at = datetime.utcnow().isoformat()
+        print(f"Known docs {'full' if full else 'incremental'} sync: read {count}, total {len(self.docs)}")
+        return count
+    
+    def save(self):
+        """Atomično snimanje (atomic_write)."""
+        with atomic_write(self.path) as f:
+            json.dump({"docs": self.docs, "watermark": self.watermark, "full_sync_at": self.full_sync_at}, f)
 
 
-def run_scrape():
+def run_scrape(search: Optional[SearchClient] = None, transport: Optional[httpx.BaseTransport] = None):
     """
     Glavna funkcija scrapera.
     """
-    search = SearchClient(SEARCH_ENDPOINT, NEWS_INDEX, AzureKeyCredential(SEARCH_KEY))
+    global bytes_received
+    bytes_received = 0
+    search = search or SearchClient(SEARCH_ENDPOINT, NEWS_INDEX, AzureKeyCredential(SEARCH_KEY))
     
-    # Delta-detekcija
-    seen_hashes = load_seen_hashes(search)
+    # Delta-detekcija: stabilan id iz URL-a + hash body-ja, kompletan lokalni skup
+    known = KnownDocs(KNOWN_DOCS_FILE)
+    try:
+        known.sync(search)
+    except Exception as e:
+        # Scrape ide dalje sa lokalnim stanjem (id iz URL-a -> upsert ne duplira); sync se ponavlja sledeći put
+        print(f"Known docs sync failed ({e}) - continuing with local state ({len(known.docs)} docs)")
+    fetch_cache = FetchCache(FETCH_CACHE_FILE)
+    unchanged = 0
+    new = 0
+    changed = 0
     
     to_upload = []
+    fetched_urls = {}  # doc id -> URL u fetch cache-u (prije redirect-a)
+    legacy_by_doc = {}  # doc id -> stari id-evi istog URL-a (brišu se tek kad upload uspije)
     
-    for base in BASES:
-        try:
-            html, base_final = fetch(base)
-            links = find_article_links(html, base_final)
-            
-            for u in links[:50]:  # Safety limit
-                try:
-                    art_html, final_url = fetch(u)
-                    title, published_at, body, digest = parse_article(art_html)
+    with make_client(transport=transport) as client:
+        for base in BASES:
+            try:
+                html, base_final = fetch(client, base)
+                links = find_article_links(html, base_final)
+                
+                for u in links[:50]:  # Safety limit
+                    try:
+                        fetched = fetch(client, u, cache=fetch_cache)
+                        if fetched is None:
+                            unchanged += 1
+                            continue
+                        art_html, final_url = fetched
+                        title, published_at, body, digest = parse_article(art_html, final_url)
+                        
+                        # Dedupe prvo po id-u i URL-u, tek onda po hash-u body-ja
+                        doc_id = doc_id_for_url(final_url)
+                        legacy_ids = known.ids_by_url.get(final_url, set()) - {doc_id}
+                        if doc_id in known.docs:
+                            if known.docs[doc_id]["hash"] == digest and not legacy_ids:
+                                unchanged += 1
+                                continue
+                            changed += 1
+                        elif legacy_ids:
+                            # Isti URL pod starim (uuid4) id-em: novi ključ, stari dokumenti se brišu
+                            changed += 1
+                        elif known.is_duplicate_body(digest):
+                            unchanged += 1
+                            continue
+                        else:
+                            new += 1
+                        legacy_by_doc[doc_id] = legacy_ids
+                        
+                        doc = {
+                            "id": doc_id,
+                            "title": title or final_url,
+                            "url": final_url,
+                            "published_at": published_at or datetime.utcnow().isoformat(),
+                            "body": body,
+                            "hash": digest
+                        }
+                        
+                        to_upload.append(doc)
+                        fetched_urls[doc_id] = u
+                        
+                        # Throttle
+                        time.sleep(0.7)
                     
-                    # Skip ako već postoji
-                    if digest in seen_hashes:
+                    except Exception as e:
+                        print(f"Error processing {u}: {e}")
+                        fetch_cache.forget(u)
                         continue
-                    
-                    doc = {
-                        "id": str(uuid.uuid4()),
-                        "title": title or final_url,
-                        "url": final_url,
-                        "published_at": published_at or datetime.utcnow().isoformat(),
-                        "body": body,
-                        "hash": digest
-                    }
-                    
-                    to_upload.append(doc)
-                    
-                    # Throttle
-                    time.sleep(0.7)
-                
-                except Exception as e:
-                    print(f"Error processing {u}: {e}")
-                    continue
-        
-        except Exception as e:
-            print(f"Error processing base {base}: {e}")
-            continue
+            
+            except Exception as e:
+                print(f"Error processing base {base}: {e}")
+                continue
     
-    # Upload novih članaka
+    print(f"New: {new}, changed: {changed}, unchanged (304/same hash): {unchanged}, "
+          f"transferred: {bytes_received / 1024:.0f} KB")
+    
+    # Upsert novih i izmijenjenih članaka (id iz URL-a -> izmjena zamjenjuje postojeći dokument).
+    # Fetch cache se snima tek posle upload-a: ako upload pukne, ETag/hash nisu zapamćeni
+    # i sledeći run članke preuzima i šalje ponovo; odbijeni ključevi se zaboravljaju.
+    failed = set()
     if to_upload:
-        search.upload_documents(to_upload)
-        print(f"Uploaded {len(to_upload)} new articles")
+        results = search.merge_or_upload_documents(to_upload) or []
+        failed = {result.key for result in results if not result.succeeded}
+        for doc in to_upload:
+            if doc["id"] in failed:
+                fetch_cache.forget(fetched_urls[doc["id"]])
+            else:
+                known.add(doc["id"], doc["url"], doc["hash"], doc["published_at"])
+        print(f"Upserted {len(to_upload) - len(failed)} articles" + (f", {len(failed)} failed" if failed else ""))
     else:
-        print("No new articles to upload")
+        print("No new or changed articles to upload")
+    fetch_cache.save()
+    
+    stale_ids = [old_id for doc_id, legacy_ids in legacy_by_doc.items() if doc_id not in failed
+                 for old_id in legacy_ids]
+    if stale_ids:
+        search.delete_documents([{"id": old_id} for old_id in stale_ids])
+        for old_id in stale_ids:
+            known.remove(old_id)
+        print(f"Deleted {len(stale_ids)} duplicate articles with legacy ids")
+    
+    known.save()
 
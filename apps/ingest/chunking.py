@@ -1,42 +1,95 @@
 """
 Chunking tekstualnih dokumenata sa overlap strategijom.
+
+Tekst se dijeli na rečenice (spans u originalnom tekstu), broj tokena se računa
+jednom po rečenici, a prozor se pomjera sa tekućim zbirom - linearno u dužini teksta.
+Overlap je cijele rečenice (nikad pola riječi).
 """
+import os
 import re
-from typing import List
+from typing import Callable, Iterator, List, Tuple
+
+from apps.ingest.embedding_batches import estimate_tokens
+
+# Limit po segmentu: multilingual-e5-large prima najviše 512 tokena (uz naslov kao prefix)
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "400"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+
+SENTENCE_RE = re.compile(r'\S.*?(?:[\.\!\?](?=\s)|$)', re.DOTALL)
+WORD_RE = re.compile(r'\S+')
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """(start, end) pozicije rečenica u tekstu."""
+    return [m.span() for m in SENTENCE_RE.finditer(text)]
+
+
+def _split_long(text: str, start: int, end: int, max_tokens: int, count_tokens) -> List[Tuple[int, int, int]]:
+    """Predugačku rečenicu podijeli po riječima na dijelove do max_tokens."""
+    pieces = []
+    piece_start = None
+    piece_end = start
+    piece_tokens = 0
+    for m in WORD_RE.finditer(text, start, end):
+        tokens = count_tokens(m.group())
+        if piece_start is not None and piece_tokens + tokens > max_tokens:
+            pieces.append((piece_start, piece_end, piece_tokens))
+            piece_start = None
+            piece_tokens = 0
+        if piece_start is None:
+            piece_start = m.start()
+        piece_end = m.end()
+        piece_tokens += tokens
+    if piece_start is not None:
+        pieces.append((piece_start, piece_end, piece_tokens))
+    return pieces
 
 
-def chunk(text: str, max_len: int = 1200, overlap: int = 150) -> List[str]:
+def chunk(
+    text: str,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    count_tokens: Callable[[str], int] = estimate_tokens
+) -> Iterator[str]:
     """
     Podela teksta na segmente sa overlap.
-    
+
     Args:
         text: Input tekst
-        max_len: Maksimalna dužina segmenta
-        overlap: Dužina overlap-a između segmenata
-        
-    Returns:
-        Lista segmenata
+        max_tokens: Maksimalan broj tokena po segmentu
+        overlap_tokens: Najviše tokena (cijele rečenice) ponovljenih iz prethodnog segmenta
+        count_tokens: Brojač tokena (podrazumijevano tiktoken ili procjena)
+
+    Yields:
+        Segmenti teksta
     """
-    # Grubo deljenje po rečenicama
-    sentences = re.split(r'(?<=[\.\!\?])\s+', text.strip())
-    
-    buf = []
-    cur = 0
-    
-    for s in sentences:
-        if cur + len(s) > max_len and buf:
-            # Emituj segment
-            yield " ".join(buf)
-            
-            # Overlap: poslednjih ~overlap karaktera
-            tail = (" ".join(buf))[-overlap:]
-            buf = [tail, s]
-            cur = len(tail) + len(s)
+    # Rečenice sa brojem tokena (jednom po rečenici); predugačke se dijele po riječima
+    units = []
+    for start, end in sentence_spans(text):
+        tokens = count_tokens(text[start:end])
+        if tokens > max_tokens:
+            units.extend(_split_long(text, start, end, max_tokens, count_tokens))
         else:
-            buf.append(s)
-            cur += len(s)
-    
-    # Poslednji segment
-    if buf:
-        yield " ".join(buf)
+            units.append((start, end, tokens))
+
+    if not units:
+        return
 
+    i = 0
+    window_tokens = 0
+    for j, (_, _, tokens) in enumerate(units):
+        if window_tokens + tokens > max_tokens and j > i:
+            yield text[units[i][0]:units[j - 1][1]]
+
+            # Overlap: poslednje rečenice prozora dok staju u overlap_tokens (i uz novu rečenicu)
+            k = j
+            overlap = 0
+            while k - 1 > i and overlap + units[k - 1][2] <= min(overlap_tokens, max_tokens - tokens):
+                k -= 1
+                overlap += units[k][2]
+            i = k
+            window_tokens = overlap
+        window_tokens += tokens
+
+    # Poslednji segment
+    yield text[units[i][0]:units[-1][1]]
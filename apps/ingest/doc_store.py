@@ -0,0 +1,199 @@
+"""
+Document store na SQLite-u (WAL mod) umjesto prepisivanja cijelog parsed_data.json.
+
+- upsert po id-u (jedan red po dokumentu, bez prepisivanja ostatka baze)
+- čitaoci (API proces) vide poslednji commit-ovan snapshot dok scraper piše
+- iter_documents() čita u batch-evima za build indeksa
+- jednokratna migracija iz postojećeg data/parsed_data.json
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+# Relativna putanja iz env-a je relativna na PROJECT_ROOT (ne na radni direktorijum)
+DOC_STORE_FILE = PROJECT_ROOT / os.getenv("DOC_STORE_FILE", "data/documents.db")
+LEGACY_JSON_FILE = PROJECT_ROOT / "data" / "parsed_data.json"
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    url TEXT,
+    type TEXT,
+    published_at TEXT,
+    content_hash TEXT,
+    data TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_url ON documents(url);
+CREATE INDEX IF NOT EXISTS idx_documents_published_at ON documents(published_at);
+"""
+
+UPSERT_SQL = """
+INSERT INTO documents (id, url, type, published_at, content_hash, data, updated_at)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(id) DO UPDATE SET
+    url = excluded.url,
+    type = excluded.type,
+    published_at = excluded.published_at,
+    content_hash = excluded.content_hash,
+    data = excluded.data,
+    updated_at = excluded.updated_at
+"""
+
+
+def content_hash(doc: Dict) -> str:
+    """Hash naslova i sadržaja (detekcija izmjena)."""
+    text = f"{doc.get('title', '')}\n{doc.get('content', '')}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _doc_id(doc: Dict) -> str:
+    if doc.get("id"):
+        return str(doc["id"])
+    key = doc.get("url") or doc.get("content", "")
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class DocStore:
+    """
+    SQLite document store.
+
+    Konekcija se otvara po operaciji, pa je store bezbjedan za više niti i procesa.
+    """
+
+    def __init__(self, path: Path = DOC_STORE_FILE, legacy_json: Optional[Path] = LEGACY_JSON_FILE):
+        self.path = Path(path)
+        self.legacy_json = Path(legacy_json) if legacy_json else None
+        self._init_schema()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_schema(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+            conn.executescript(SCHEMA)
+            migrated = self._migrate_json(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        if migrated:
+            print(f"Migrated {migrated} documents from {self.legacy_json} to {self.path}")
+
+    def _migrate_json(self, conn) -> int:
+        """Jednokratni uvoz iz parsed_data.json (JSON fajl ostaje netaknut)."""
+        if not self.legacy_json or not self.legacy_json.exists():
+            return 0
+        with open(self.legacy_json, 'r', encoding='utf-8') as f:
+            docs = json.load(f)
+        return self._upsert(conn, docs)
+
+    @staticmethod
+    def _upsert(conn, docs: Iterable[Dict]) -> int:
+        now = datetime.now().isoformat()
+        rows = []
+        for doc in docs:
+            doc_id = _doc_id(doc)
+            doc = {**doc, "id": doc_id}
+            rows.append((
+                doc_id,
+                doc.get("url"),
+                doc.get("type"),
+                doc.get("published_at"),
+                content_hash(doc),
+                json.dumps(doc, ensure_ascii=False),
+                now
+            ))
+        conn.executemany(UPSERT_SQL, rows)
+        return len(rows)
+
+    def upsert(self, docs: Iterable[Dict]) -> int:
+        """Dodaj ili zamijeni dokumente po id-u (jedna transakcija). Vraća broj upisanih."""
+        with self._connect() as conn:
+            return self._upsert(conn, docs)
+
+    def delete(self, ids: Iterable[str]) -> int:
+        with self._connect() as conn:
+            cur = conn.executemany("DELETE FROM documents WHERE id = ?", [(i,) for i in ids])
+            return cur.rowcount
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def urls(self) -> Set[str]:
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT url FROM documents WHERE url IS NOT NULL")}
+
+    def ids_by_source(self, source: str) -> Set[str]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id FROM documents WHERE json_extract(data, '$.source') = ?", (source,))
+            return {row[0] for row in rows}
+
+    def titles(self) -> Set[str]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT json_extract(data, '$.title') FROM documents")
+            return {row[0] for row in rows if row[0]}
+
+    def hashes_by_url(self) -> Dict[str, str]:
+        """url -> content_hash (za detekciju izmijenjenih članaka)."""
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT url, content_hash FROM documents WHERE url IS NOT NULL"))
+
+    def iter_documents(self, batch_size: int = 500, since: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Streaming čitanje dokumenata u redosledu upisa.
+
+        Args:
+            batch_size: Redova po fetch-u
+            since: Samo dokumenti sa published_at >= since (ISO; range scan po indeksu na published_at)
+        """
+        with self._connect() as conn:
+            if since is not None:
+                cur = conn.execute(
+                    "SELECT data FROM documents WHERE published_at >= ? ORDER BY rowid", (since,)
+                )
+            else:
+                cur = conn.execute("SELECT data FROM documents ORDER BY rowid")
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for (data,) in rows:
+                    yield json.loads(data)
+
+    def load_all(self) -> List[Dict]:
+        return list(self.iter_documents())
+
+
+_stores: Dict[Path, DocStore] = {}
+
+
+def get_store(path: Path = DOC_STORE_FILE) -> DocStore:
+    """Dijeljena instanca po putanji (šema/migracija se provjeravaju jednom)."""
+    path = Path(path)
+    if path not in _stores:
+        _stores[path] = DocStore(path)
+    return _stores[path]
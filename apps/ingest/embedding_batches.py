@@ -0,0 +1,182 @@
+"""
+Batch embedding helperi: pakovanje inputa po API limitima, paralelni
+worker pool i backoff za rate limit greške.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Sequence
+
+# OpenAI embeddings API limiti (po zahtjevu)
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_INPUT = 8191
+MAX_TOKENS_PER_REQUEST = 300_000
+
+# Greške koje ima smisla ponoviti (throttling i prolazni serverski problemi)
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError"}
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Broj tokena za tekst.
+    Bez tiktoken-a koristi konzervativnu procjenu (~3 karaktera po tokenu za naš jezik).
+    """
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 3 + 1
+
+
+def pack_batches(
+    texts: Sequence[str],
+    max_inputs: int = MAX_INPUTS_PER_REQUEST,
+    max_tokens: int = MAX_TOKENS_PER_REQUEST
+) -> List[List[int]]:
+    """
+    Pakuje tekstove u batch-eve tako da svaki zahtjev ostane ispod API limita.
+
+    Args:
+        texts: Tekstovi za embedding
+        max_inputs: Maksimalan broj inputa po zahtjevu
+        max_tokens: Maksimalan ukupan broj tokena po zahtjevu
+
+    Returns:
+        Lista batch-eva, svaki batch je lista indeksa u `texts`
+    """
+    batches = []
+    cur = []
+    cur_tokens = 0
+
+    for i, text in enumerate(texts):
+        tokens = min(estimate_tokens(text), MAX_TOKENS_PER_INPUT)
+        if cur and (len(cur) >= max_inputs or cur_tokens + tokens > max_tokens):
+            batches.append(cur)
+            cur = []
+            cur_tokens = 0
+        cur.append(i)
+        cur_tokens += tokens
+
+    if cur:
+        batches.append(cur)
+
+    return batches
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Da li je greška privremena (rate limit, timeout, 5xx)."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status in RETRYABLE_STATUS or type(exc).__name__ in RETRYABLE_ERRORS
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    """Pročitaj Retry-After (ili retry-after-ms) iz HTTP odgovora ako postoji."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def call_with_backoff(
+    fn: Callable,
+    *args,
+    max_retries: int = 6,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    sleep: Callable[[float], None] = time.sleep
+):
+    """
+    Poziva `fn(*args)` i ponavlja na rate limit / prolazne greške.
+    Poštuje Retry-After header, inače eksponencijalni backoff sa jitter-om.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn(*args)
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = min(max_delay, base_delay * (2 ** attempt))
+                delay = delay * (0.5 + random.random() / 2)
+            print(f"    Rate limit/prolazna greška ({type(e).__name__}), ponovo za {delay:.1f}s...")
+            sleep(delay)
+            attempt += 1
+
+
+def embed_in_batches(
+    texts: Sequence[str],
+    embed_fn: Callable[[List[str]], List[List[float]]],
+    workers: int = 4,
+    on_batch_done: Optional[Callable[[List[int], List[List[float]]], None]] = None,
+    max_inputs: int = MAX_INPUTS_PER_REQUEST,
+    max_tokens: int = MAX_TOKENS_PER_REQUEST,
+    max_retries: int = 6
+) -> List[Optional[List[float]]]:
+    """
+    Paralelno generisanje embeddinga kroz ograničen pool worker-a.
+
+    Args:
+        texts: Tekstovi za embedding
+        embed_fn: Funkcija koja prima listu tekstova i vraća listu vektora (istim redom)
+        workers: Broj paralelnih zahtjeva
+        on_batch_done: Callback (indeksi, vektori) posle svakog završenog batch-a;
+            poziva se serijski, pa je bezbjedno upisivati u cache
+        max_inputs: Maksimalan broj inputa po zahtjevu
+        max_tokens: Maksimalan broj tokena po zahtjevu
+        max_retries: Broj ponavljanja po batch-u
+
+    Returns:
+        Vektori istim redom kao `texts` (None za batch-eve koji nisu uspjeli)
+    """
+    results: List[Optional[List[float]]] = [None] * len(texts)
+    batches = pack_batches(texts, max_inputs=max_inputs, max_tokens=max_tokens)
+    if not batches:
+        return results
+
+    lock = threading.Lock()
+    done = 0
+    failed = 0
+
+    def run(indices: List[int]):
+        return call_with_backoff(embed_fn, [texts[i] for i in indices], max_retries=max_retries)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run, indices): indices for indices in batches}
+        for future in as_completed(futures):
+            indices = futures[future]
+            try:
+                vectors = future.result()
+            except Exception as e:
+                failed += len(indices)
+                print(f"    ERROR: batch od {len(indices)} tekstova nije uspio: {e}")
+                continue
+
+            with lock:
+                for i, vec in zip(indices, vectors):
+                    results[i] = vec
+                if on_batch_done:
+                    on_batch_done(indices, vectors)
+                done += len(indices)
+            print(f"  Embedded {done}/{len(texts)} texts ({len(batches)} batches, {workers} workers)")
+
+    if failed:
+        print(f"  WARNING: {failed} tekstova bez embeddinga - ponovno pokretanje nastavlja od cache-a")
+
+    return results
@@ -0,0 +1,375 @@
+"""
+Encoder backend-i za multilingual-e5-large.
+
+- torch: SentenceTransformer (PyTorch) - referentna implementacija
+- onnx:  eksportovan ONNX graf sa dinamičkom int8 kvantizacijom, ONNX Runtime na CPU
+
+Backend se bira preko ENCODER_BACKEND. Oba vraćaju L2 normalizovane vektore
+(mean pooling kao u SentenceTransformer konfiguraciji e5 modela), pa su
+kompatibilni sa postojećim indeksom.
+
+Torch backend se učitava iz lokalnog artefakta (ENCODER_MODEL_PATH, pravi ga
+scripts/bake_encoder_model.py) u offline modu, bez preuzimanja sa Hugging Face hub-a.
+
+Za build indeksa encode_passages_parallel() sortira tekstove po dužini u batch-eve
+sa sličnim brojem tokena (manje padding-a) i enkodira ih u pool-u procesa.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+import numpy as np
+
+from apps.ingest.embedding_batches import estimate_tokens
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+
+MODEL_NAME = "intfloat/multilingual-e5-large"
+MAX_SEQ_LENGTH = 512
+
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch").lower()
+# Lokalni SentenceTransformer artefakt (ako postoji, hub se ne kontaktira); relativne putanje
+# iz env-a su relativne na PROJECT_ROOT (ne na radni direktorijum gunicorn-a)
+ENCODER_MODEL_PATH = PROJECT_ROOT / os.getenv("ENCODER_MODEL_PATH", "data/models/multilingual-e5-large")
+ONNX_MODEL_DIR = PROJECT_ROOT / os.getenv("ONNX_MODEL_DIR", "data/onnx/multilingual-e5-large")
+ONNX_MODEL_FILE = "model_int8.onnx"
+# 0 = ONNX Runtime bira sam (sva jezgra)
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+# Procesi za encode_passages_parallel (0 = cpu_count // 4); jezgra se dijele ravnomjerno među njima.
+# Svaki proces drži svoju kopiju modela (~2.2 GB za e5-large).
+ENCODER_WORKERS = int(os.getenv("ENCODER_WORKERS", "0"))
+# Padding budžet po batch-u (batch * najduži tekst u tokenima)
+ENCODE_BATCH_TOKENS = int(os.getenv("ENCODE_BATCH_TOKENS", str(32 * MAX_SEQ_LENGTH)))
+
+_encoders = {}
+_encoders_lock = threading.Lock()
+
+
+def mean_pool(last_hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Mean pooling preko tokena (bez padding-a) + L2 normalizacija."""
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (last_hidden * mask).sum(axis=1)
+    counts = np.clip(mask.sum(axis=1), 1e-9, None)
+    pooled = summed / counts
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+class TorchEncoder:
+    """PyTorch SentenceTransformer backend."""
+
+    name = "torch"
+
+    def __init__(self, model_name: Optional[str] = None):
+        local = model_name is None and model_artifact_exists()
+        if local:
+            # huggingface_hub čita HF_HUB_OFFLINE pri importu - postavlja se prije njega
+            os.environ.setdefault("HF_HUB_OFFLINE", "1")
+            os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+        elif model_name is None:
+            print(f"UPOZORENJE: encoder artefakt ne postoji ({ENCODER_MODEL_PATH}) - učitavam {MODEL_NAME} "
+                  f"sa Hugging Face hub-a (napravi ga: python scripts/bake_encoder_model.py)")
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(
+            str(ENCODER_MODEL_PATH) if local else model_name or MODEL_NAME,
+            local_files_only=local
+        )
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        embeddings = self.model.encode(
+            list(texts),
+            batch_size=batch_size,
+            show_progress_bar=show_progress_bar,
+            normalize_embeddings=True
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class OnnxEncoder:
+    """ONNX Runtime backend (int8 dinamički kvantizovan graf)."""
+
+    name = "onnx"
+
+    def __init__(self, model_dir: Path = ONNX_MODEL_DIR, model_file: str = ONNX_MODEL_FILE):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = Path(model_dir) / model_file
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"ONNX model ne postoji: {model_path}. Pokreni: python scripts/export_onnx_encoder.py"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_THREADS > 0:
+            options.intra_op_num_threads = ONNX_THREADS
+
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        texts = list(texts)
+        out = []
+        for i in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                texts[i:i + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=MAX_SEQ_LENGTH,
+                return_tensors="np"
+            )
+            feeds = {name: batch[name].astype(np.int64) for name in self.input_names if name in batch}
+            last_hidden = self.session.run(None, feeds)[0]
+            out.append(mean_pool(last_hidden, batch["attention_mask"]))
+            if show_progress_bar:
+                print(f"  Encoded {min(i + batch_size, len(texts))}/{len(texts)}")
+        if not out:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.concatenate(out, axis=0)
+
+
+def model_artifact_exists(path: Path = None) -> bool:
+    """Da li je SentenceTransformer artefakt sačuvan lokalno (modules.json je u korijenu)."""
+    return (Path(path or ENCODER_MODEL_PATH) / "modules.json").exists()
+
+
+def get_encoder(backend: Optional[str] = None):
+    """Lazy učitavanje encoder-a (jedan po backend-u po procesu; upit i warmup čekaju isto učitavanje)."""
+    backend = (backend or ENCODER_BACKEND).lower()
+    with _encoders_lock:
+        if backend not in _encoders:
+            if backend == "torch":
+                _encoders[backend] = TorchEncoder()
+            elif backend == "onnx":
+                _encoders[backend] = OnnxEncoder()
+            else:
+                raise ValueError(f"Nepoznat encoder backend: {backend} (torch ili onnx)")
+        return _encoders[backend]
+
+
+def encoder_loaded(backend: Optional[str] = None) -> bool:
+    """Da li je encoder već učitan u ovom procesu (bez učitavanja)."""
+    return (backend or ENCODER_BACKEND).lower() in _encoders
+
+
+def encode_query(text: str, backend: Optional[str] = None) -> np.ndarray:
+    """Embedding upita (E5 prefix "query: ")."""
+    return get_encoder(backend).encode([f"query: {text}"])[0]
+
+
+def encode_passages(
+    texts: Sequence[str],
+    batch_size: int = 32,
+    show_progress_bar: bool = False,
+    backend: Optional[str] = None
+) -> np.ndarray:
+    """Embedding dokumenata (E5 prefix "passage: ")."""
+    return get_encoder(backend).encode(
+        [f"passage: {text}" for text in texts],
+        batch_size=batch_size,
+        show_progress_bar=show_progress_bar
+    )
+
+
+def length_buckets(
+    texts: Sequence[str],
+    batch_size: int = 32,
+    max_batch_tokens: int = ENCODE_BATCH_TOKENS,
+    count_tokens: Callable[[str], int] = estimate_tokens
+) -> List[List[int]]:
+    """
+    Podijeli tekstove u batch-eve sličnih dužina (najduži prvi).
+
+    Batch raste dok batch * najduži tekst ne pređe max_batch_tokens, pa kratki tekstovi
+    (naslovi) idu u veće batch-eve (najviše 8 * batch_size), a dugi u manje.
+
+    Returns:
+        Liste indeksa u originalnom redosledu tekstova
+    """
+    lengths = [min(count_tokens(text), MAX_SEQ_LENGTH) for text in texts]
+    order = sorted(range(len(texts)), key=lambda i: -lengths[i])
+    max_items = 8 * batch_size
+    batches = []
+    current = []
+    for i in order:
+        if current and (len(current) >= max_items or (len(current) + 1) * max(lengths[current[0]], 1) > max_batch_tokens):
+            batches.append(current)
+            current = []
+        current.append(i)
+    if current:
+        batches.append(current)
+    return batches
+
+
+_worker_encoder = None
+
+
+def _init_worker(backend: str, threads: int, factory: Optional[Callable] = None):
+    """Inicijalizacija worker procesa: podjela jezgara i jedan encoder po procesu."""
+    global _worker_encoder, ONNX_THREADS
+    ONNX_THREADS = threads
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_encoder = factory() if factory else get_encoder(backend)
+
+
+def _timed_encode(encoder, texts: List[str]):
+    """Jedan batch: (pid, sekunde, vektori)."""
+    start = time.perf_counter()
+    vectors = encoder.encode(texts, batch_size=len(texts))
+    return os.getpid(), time.perf_counter() - start, np.asarray(vectors, dtype=np.float32)
+
+
+def _encode_batch(texts: List[str]):
+    return _timed_encode(_worker_encoder, texts)
+
+
+def encode_passages_parallel(
+    texts: Sequence[str],
+    workers: int = ENCODER_WORKERS,
+    batch_size: int = 32,
+    backend: Optional[str] = None,
+    factory: Optional[Callable] = None,
+    show_progress_bar: bool = False
+) -> np.ndarray:
+    """
+    Embedding dokumenata (E5 prefix "passage: ") za build indeksa.
+
+    Tekstovi se grupišu po dužini (length_buckets) i enkodiraju u pool-u procesa
+    (spawn - bez fork-a procesa sa već učitanim torch-em); rezultat je u redosledu ulaza.
+
+    Args:
+        texts: Tekstovi passage-a
+        workers: Broj procesa (0 = auto, 1 = u ovom procesu)
+        batch_size: Osnovna veličina batch-a za length_buckets
+        backend: torch ili onnx (podrazumijevano ENCODER_BACKEND)
+        factory: Pravi encoder u worker-u umjesto get_encoder(backend) (testovi)
+        show_progress_bar: Ispis napretka po batch-u
+
+    Returns:
+        Matrica vektora (len(texts) x dimenzija)
+    """
+    prefixed = [f"passage: {text}" for text in texts]
+    if not prefixed:
+        return np.zeros((0, 0), dtype=np.float32)
+    cores = os.cpu_count() or 1
+    workers = workers or max(1, cores // 4)
+    batches = length_buckets(prefixed, batch_size)
+    workers = min(workers, len(batches))
+    threads = max(1, cores // workers)
+    jobs = [[prefixed[i] for i in batch] for batch in batches]
+
+    start = time.perf_counter()
+    if workers == 1:
+        encoder = factory() if factory else get_encoder(backend)
+        results = (_timed_encode(encoder, job) for job in jobs)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(backend or ENCODER_BACKEND, threads, factory)
+        )
+        results = pool.map(_encode_batch, jobs)
+
+    out = None
+    busy = defaultdict(float)
+    done = 0
+    try:
+        for batch, (pid, seconds, vectors) in zip(batches, results):
+            if out is None:
+                out = np.empty((len(prefixed), vectors.shape[1]), dtype=np.float32)
+            out[batch] = vectors
+            busy[pid] += seconds
+            done += len(batch)
+            if show_progress_bar:
+                print(f"  Encoded {done}/{len(prefixed)}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    wall = time.perf_counter() - start
+    used_cores = min(cores, workers * threads)
+    print(f"Encoded {len(prefixed)} passages in {wall:.1f}s with {workers} worker(s) x {threads} thread(s): "
+          f"{len(prefixed) / wall:.1f}/s, {len(prefixed) / wall / used_cores:.2f}/s per core, "
+          f"{len(batches)} length buckets")
+    for pid, seconds in sorted(busy.items()):
+        print(f"  worker {pid}: busy {100 * seconds / wall:.0f}%")
+    return out
+
+
+def save_model_artifact(path: Path = ENCODER_MODEL_PATH, model_name: str = MODEL_NAME) -> Path:
+    """Preuzmi model sa hub-a i sačuvaj kao lokalni artefakt za offline učitavanje (build/deploy korak)."""
+    from sentence_transformers import SentenceTransformer
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    print(f"Saving {model_name} -> {path}")
+    SentenceTransformer(model_name).save(str(path))
+    return path
+
+
+def export_onnx(model_dir: Path = ONNX_MODEL_DIR, model_name: str = MODEL_NAME, quantize: bool = True) -> Path:
+    """
+    Eksportuj transformer dio modela u ONNX i (opciono) dinamički kvantizuj u int8.
+
+    Pooling i normalizacija rade se u numpy (mean_pool), pa graf vraća last_hidden_state.
+
+    Returns:
+        Putanja do modela koji koristi OnnxEncoder
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    tokenizer.save_pretrained(str(model_dir))
+
+    sample = tokenizer(["query: primjer upita"], return_tensors="pt")
+    fp32_path = model_dir / "model.onnx"
+
+    print(f"Exporting {model_name} -> {fp32_path}")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            str(fp32_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=17,
+        )
+
+    if not quantize:
+        return fp32_path
+
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    int8_path = model_dir / ONNX_MODEL_FILE
+    print(f"Quantizing (dynamic int8) -> {int8_path}")
+    # model.onnx je > 2 GB pa koristi external data format
+    quantize_dynamic(
+        str(fp32_path),
+        str(int8_path),
+        weight_type=QuantType.QInt8,
+        use_external_data_format=True,
+    )
+    return int8_path
@@ -0,0 +1,127 @@
+"""
+Verzionisane generacije indeksa sa atomičnim objavljivanjem.
+
+Svaki build piše u novi direktorijum generacije (nikad preko fajlova koje API čita):
+
+    data/index_multilingual/
+        CURRENT                      <- ime aktivne generacije (mijenja se os.replace-om)
+        gen-20250101-030000-000000/
+            index.faiss
+            metadata.pkl
+            vectors.npy              (opciono, fp16/fp32 za re-scoring)
+            manifest.json            <- sha256 i veličina svakog fajla + opis build-a
+
+Čitaoci prate CURRENT: dok se nova generacija piše vide staru, a posle swap-a
+kompletnu novu (manifest se piše poslednji, CURRENT tek posle njega).
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from apps.functions.atomic_file import atomic_write
+
+INDEX_KEEP_GENERATIONS = int(os.getenv("INDEX_KEEP_GENERATIONS", "3"))
+
+CURRENT_FILE = "CURRENT"
+MANIFEST_FILE = "manifest.json"
+GENERATION_PREFIX = "gen-"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def new_generation(root: Path) -> Path:
+    """Napravi prazan direktorijum nove generacije (ime je sortabilno po vremenu)."""
+    root.mkdir(parents=True, exist_ok=True)
+    while True:
+        gen_dir = root / f"{GENERATION_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        try:
+            gen_dir.mkdir()
+            return gen_dir
+        except FileExistsError:
+            continue
+
+
+def write_manifest(gen_dir: Path, info: Optional[Dict] = None) -> Dict:
+    """Checksum-ovi svih fajlova generacije + opis build-a; manifest se piše poslednji."""
+    files = {
+        path.name: {"sha256": file_sha256(path), "bytes": path.stat().st_size}
+        for path in sorted(gen_dir.iterdir())
+        if path.is_file() and path.name != MANIFEST_FILE
+    }
+    manifest = {
+        "generation": gen_dir.name,
+        "created_at": datetime.now().isoformat(),
+        **(info or {}),
+        "files": files,
+    }
+    with atomic_write(gen_dir / MANIFEST_FILE) as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def read_manifest(gen_dir: Path) -> Optional[Dict]:
+    try:
+        with open(gen_dir / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def verify(gen_dir: Path) -> bool:
+    """Da li su svi fajlovi iz manifesta prisutni i neoštećeni (veličina + sha256)."""
+    manifest = read_manifest(gen_dir)
+    if manifest is None:
+        return False
+    for name, meta in manifest["files"].items():
+        path = gen_dir / name
+        if not path.exists() or path.stat().st_size != meta["bytes"] or file_sha256(path) != meta["sha256"]:
+            return False
+    return True
+
+
+def publish(root: Path, gen_dir: Path, keep: int = INDEX_KEEP_GENERATIONS):
+    """Atomično prebaci CURRENT na generaciju i ukloni stare generacije."""
+    if read_manifest(gen_dir) is None:
+        raise ValueError(f"Generacija {gen_dir} nema manifest - ne objavljujem")
+    with atomic_write(root / CURRENT_FILE) as f:
+        f.write(gen_dir.name)
+    prune(root, keep)
+
+
+def current_generation(root: Path) -> Optional[Path]:
+    """Direktorijum aktivne generacije ili None (još nije objavljena nijedna)."""
+    try:
+        name = (root / CURRENT_FILE).read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+    gen_dir = root / name
+    return gen_dir if name and gen_dir.is_dir() else None
+
+
+def generations(root: Path) -> List[Path]:
+    if not root.exists():
+        return []
+    return sorted(path for path in root.iterdir() if path.is_dir() and path.name.startswith(GENERATION_PREFIX))
+
+
+def prune(root: Path, keep: int = INDEX_KEEP_GENERATIONS):
+    """
+    Obriši generacije starije od poslednjih `keep` (aktivna se nikad ne briše).
+
+    Procesi koji još drže staru generaciju (memmap) na Linux-u nastavljaju da je čitaju;
+    gdje OS ne dozvoljava brisanje otvorenih fajlova, generacija ostaje za sledeći put.
+    """
+    current = current_generation(root)
+    old = [path for path in generations(root) if path != current]
+    for gen_dir in old[:max(0, len(old) - max(keep - 1, 0))]:
+        shutil.rmtree(gen_dir, ignore_errors=True)
@@ -0,0 +1,206 @@
+"""
+Paralelni ingest direktorijuma sa PDF dokumentima (propisi, izvještaji...).
+
+- PDF-ovi se parsiraju PyMuPDF-om u process pool-u
+- parsirane stranice se keširaju po sha256 fajla (nepromijenjen fajl se ne parsira ponovo)
+- kako koji fajl stigne: chunking -> upsert u document store -> batch embedding
+  u pozadinskoj niti (embedding cache multilingual indeksa), paralelno sa parsiranjem
+
+    python -m apps.ingest.ingest_dir data/pdf [--workers 4] [--no-embed] [--build-index]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from apps.functions.atomic_file import atomic_write
+from apps.ingest.chunking import chunk
+from apps.ingest.doc_store import DocStore, get_store
+from apps.ingest.parse_pdf import extract_pdf, pdf_title
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
+PDF_CACHE_DIR = Path(os.getenv("PDF_CACHE_DIR", PROJECT_ROOT / "data" / "pdf_cache"))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 2)))
+EMBED_BATCH_SIZE = 64
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_pdf_cached(path: str, cache_dir: str) -> Dict:
+    """
+    Parsiraj PDF (u worker procesu) ili vrati stranice iz cache-a.
+
+    Returns:
+        {"sha256", "title", "pages": [{"page", "text"}], "cached": bool}
+    """
+    sha = file_sha256(Path(path))
+    cache_file = Path(cache_dir) / f"{sha}.json"
+    if cache_file.exists():
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return {**json.load(f), "cached": True}
+
+    parsed = {"sha256": sha, "title": pdf_title(path), "pages": list(extract_pdf(path))}
+    with atomic_write(cache_file) as f:
+        json.dump(parsed, f, ensure_ascii=False)
+    return {**parsed, "cached": False}
+
+
+def pdf_source(path: Path, directory: Path) -> str:
+    """Source fajla: putanja relativna na ingest direktorijum, bez ekstenzije (pdf:propisi/odluka)."""
+    return f"pdf:{path.relative_to(directory).with_suffix('').as_posix()}"
+
+
+def pages_to_docs(path: Path, parsed: Dict, source: str) -> List[Dict]:
+    """
+    Chunk-uj stranice u dokumente.
+
+    Id-evi su stabilni za isti sadržaj i putanju fajla; ista kopija PDF-a u dva
+    poddirektorijuma daje različite id-eve (ne pregazi tuđe chunk-ove).
+    """
+    title = parsed["title"] or re.sub(r'[_\-]+', ' ', path.stem)
+    key = hashlib.sha256(f"{source}\n{parsed['sha256']}".encode('utf-8')).hexdigest()[:16]
+    docs = []
+    for page in parsed["pages"]:
+        for i, seg in enumerate(chunk(page["text"])):
+            if not seg.strip():
+                continue
+            docs.append({
+                "id": f"pdf_{key}_p{page['page']}_{i}",
+                "title": title,
+                "content": seg,
+                "source": source,
+                "page": page["page"],
+                "type": "pdf"
+            })
+    return docs
+
+
+class PassageEmbedder:
+    """Batch embedding passage-a u pozadinskoj niti, upisuje u embedding cache multilingual indeksa."""
+
+    def __init__(self, batch_size: int = EMBED_BATCH_SIZE):
+        from apps.ingest import local_storage_vector_multilingual as vector_store
+        self.vector_store = vector_store
+        self.cache = vector_store.load_embedding_cache()
+        self.batch_size = batch_size
+        self.pending = {}
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.futures = []
+        self.embedded = 0
+
+    def add(self, docs: List[Dict]):
+        for doc in docs:
+            for _, text in self.vector_store.doc_passage_texts(doc):
+                key = self.vector_store.cache_key(text)
+                if key not in self.cache:
+                    self.pending[key] = text
+        while len(self.pending) >= self.batch_size:
+            self._submit(self.batch_size)
+
+    def _submit(self, n: int):
+        batch = [self.pending.popitem() for _ in range(min(n, len(self.pending)))]
+        self.futures.append(self.executor.submit(self._embed, batch))
+
+    def _embed(self, batch):
+        vectors = self.vector_store.encode_passages([text for _, text in batch], batch_size=32)
+        for (key, _), vector in zip(batch, vectors):
+            self.cache[key] = vector.astype('float32')
+        self.embedded += len(batch)
+
+    def close(self):
+        if self.pending:
+            self._submit(len(self.pending))
+        for future in self.futures:
+            future.result()
+        self.executor.shutdown()
+        self.vector_store.save_embedding_cache(self.cache)
+
+
+def ingest_directory(
+    directory: str,
+    workers: int = INGEST_WORKERS,
+    embed: bool = True,
+    store: Optional[DocStore] = None,
+    cache_dir: Path = PDF_CACHE_DIR
+) -> Dict:
+    """
+    Ingest svih PDF-ova iz direktorijuma (rekurzivno).
+
+    Returns:
+        Statistika: files, parsed, cached, unchanged, failed, chunks, embedded, seconds
+    """
+    store = store or get_store()
+    files = sorted(Path(directory).rglob("*.pdf"))
+    stats = {"files": len(files), "parsed": 0, "cached": 0, "unchanged": 0, "failed": 0, "chunks": 0, "embedded": 0}
+    print(f"Ingesting {len(files)} PDF files from {directory} ({workers} workers)")
+
+    start = time.perf_counter()
+    embedder = PassageEmbedder() if embed else None
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(parse_pdf_cached, str(path), str(cache_dir)): path for path in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                parsed = future.result()
+            except Exception as e:
+                print(f"  ERROR {path.name}: {e}")
+                stats["failed"] += 1
+                continue
+
+            stats["cached" if parsed["cached"] else "parsed"] += 1
+            source = pdf_source(path, Path(directory))
+            docs = pages_to_docs(path, parsed, source)
+            existing_ids = store.ids_by_source(source)
+            new_ids = {doc["id"] for doc in docs}
+
+            if parsed["cached"] and existing_ids == new_ids:
+                stats["unchanged"] += 1
+                print(f"  = {path.name} (unchanged)")
+                continue
+
+            # Izmijenjen fajl: ukloni chunk-ove prethodne verzije
+            store.delete(existing_ids - new_ids)
+            store.upsert(docs)
+            stats["chunks"] += len(docs)
+            print(f"  + {path.name}: {len(parsed['pages'])} pages, {len(docs)} chunks")
+
+            if embedder:
+                embedder.add(docs)
+
+    if embedder:
+        embedder.close()
+        stats["embedded"] = embedder.embedded
+
+    stats["seconds"] = round(time.perf_counter() - start, 1)
+    print(f"Done: {stats}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paralelni ingest PDF direktorijuma")
+    parser.add_argument("directory")
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS)
+    parser.add_argument("--no-embed", action="store_true", help="Samo parsiranje i document store")
+    parser.add_argument("--build-index", action="store_true", help="Posle ingest-a rebuild multilingual FAISS indeksa")
+    args = parser.parse_args()
+
+    ingest_directory(args.directory, workers=args.workers, embed=not args.no_embed)
+
+    if args.build_index:
+        from apps.ingest.local_storage_vector_multilingual import build_vector_index
+        build_vector_index()
+
+
+if __name__ == "__main__":
+    main()
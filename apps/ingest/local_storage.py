@@ -1,12 +1,16 @@
 """
 Local storage za parsed data (bez Azure).
+
+Dokumenti su u SQLite document store-u (apps/ingest/doc_store.py);
+parsed_data.json se koristi samo za jednokratnu migraciju.
 """
-import json
 import hashlib
 from pathlib import Path
-from typing import List, Dict
+from typing import Iterator, List, Dict, Optional
 from datetime import datetime, timedelta
 
+from apps.ingest.doc_store import get_store, DOC_STORE_FILE
+
 
 # Koristi apsolutne putanje relativne na lokaciju projekta
 PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
@@ -14,23 +18,22 @@ STORAGE_FILE = PROJECT_ROOT / "data" / "parsed_data.json"
 
 
 def save_documents(docs: List[Dict]):
-    """Sačuvaj dokumente u JSON."""
-    STORAGE_FILE.parent.mkdir(exist_ok=True)
-    with open(STORAGE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(docs, f, ensure_ascii=False, indent=2)
-    print(f"Saved {len(docs)} documents to {STORAGE_FILE}")
+    """Upsert dokumenata po id-u (postojeći dokumenti van liste ostaju u bazi)."""
+    count = get_store().upsert(docs)
+    print(f"Saved {count} documents to {DOC_STORE_FILE}")
 
 
 def load_documents() -> List[Dict]:
-    """Učitaj dokumente iz JSON."""
-    if not STORAGE_FILE.exists():
-        return []
-    
-    with open(STORAGE_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Učitaj sve dokumente iz document store-a."""
+    return get_store().load_all()
+
+
+def iter_documents() -> Iterator[Dict]:
+    """Streaming iterator kroz dokumente (build indeksa bez cijele liste u memoriji)."""
+    return get_store().iter_documents()
 
 
-def search_documents(query: str, k: int = 8) -> List[Dict]:
+def search_documents(query: str, k: int = 8, since: Optional[datetime] = None) -> List[Dict]:
     """
     Simple keyword search kroz lokalne dokumente.
     Prioritizuje news dokumente ako odgovaraju query.
@@ -38,11 +41,15 @@ def search_documents(query: str, k: int = 8) -> List[Dict]:
     Args:
         query: Search query
         k: Max number of results
+        since: Samo dokumenti objavljeni od ovog trenutka (čita se samo taj raspon iz baze)
         
     Returns:
         List of matching documents
     """
-    docs = load_documents()
+    if since is not None:
+        docs = list(get_store().iter_documents(since=since.isoformat()))
+    else:
+        docs = load_documents()
     
     if not docs:
         return []
@@ -1,11 +1,10 @@
 """
 Vector-based storage za parsed data koristeći FAISS + OpenAI embeddings.
 """
-import json
 import os
 import pickle
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 from datetime import datetime
 import faiss
 import numpy as np
@@ -13,6 +12,11 @@ from openai import OpenAI
 from dotenv import load_dotenv
 import hashlib
 
+from apps.functions.atomic_file import atomic_write
+from apps.ingest import local_storage
+from apps.ingest.embedding_batches import embed_in_batches
+from apps.ingest.metadata_filter import MetadataBitmaps
+
 load_dotenv()
 
 # Storage files
@@ -28,9 +32,15 @@ client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 EMBEDDING_MODEL = "text-embedding-3-small"  # Ispravno ime modela
 EMBEDDING_DIM = 1536  # Dimenzija za text-embedding-3-small
 
+# Broj paralelnih embedding zahtjeva tokom build-a
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "4"))
+
 # Global embedding cache (in-memory)
 _embedding_cache = {}
 
+# Bitmape atributa za metadata filtere: ((mtime indeksa, broj redova metadata), MetadataBitmaps)
+_filter_cache = None
+
 
 def load_embedding_cache():
     """Učitaj embedding cache ako postoji."""
@@ -45,11 +55,10 @@ def load_embedding_cache():
 
 
 def save_embedding_cache():
-    """Sačuvaj embedding cache."""
+    """Sačuvaj embedding cache (atomično - prekinut build ne kvari cache)."""
     global _embedding_cache
     if _embedding_cache:
-        EMBEDDING_CACHE_FILE.parent.mkdir(exist_ok=True)
-        with open(EMBEDDING_CACHE_FILE, 'wb') as f:
+        with atomic_write(EMBEDDING_CACHE_FILE, 'wb') as f:
             pickle.dump(_embedding_cache, f)
 
 
@@ -87,21 +96,59 @@ def get_embedding(text: str) -> np.ndarray:
         return np.zeros(EMBEDDING_DIM, dtype=np.float32)
 
 
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    """Jedan embeddings zahtjev za više tekstova (retry radi embed_in_batches)."""
+    response = client.with_options(max_retries=0).embeddings.create(
+        model=EMBEDDING_MODEL,
+        input=texts
+    )
+    return [d.embedding for d in sorted(response.data, key=lambda d: d.index)]
+
+
+def get_embeddings(texts: List[str]) -> List[np.ndarray]:
+    """
+    Batch verzija get_embedding za build indeksa.
+    Tekstovi koji nisu u cache-u idu u batch zahtjeve (paralelno, sa backoff-om),
+    a cache se snima posle svakog batch-a pa se prekinut build nastavlja gdje je stao.
+    """
+    global _embedding_cache
+
+    keys = [hashlib.sha256(text.encode('utf-8')).hexdigest() for text in texts]
+
+    # Jedinstveni tekstovi koji nisu u cache-u
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in _embedding_cache and key not in missing:
+            missing[key] = text
+
+    if missing:
+        print(f"  {len(texts) - len(missing)} cached, embedding {len(missing)} new texts...")
+        missing_keys = list(missing.keys())
+
+        def on_batch_done(indices, vectors):
+            for i, vec in zip(indices, vectors):
+                _embedding_cache[missing_keys[i]] = np.array(vec, dtype=np.float32)
+            save_embedding_cache()
+
+        embed_in_batches(
+            list(missing.values()),
+            _embed_batch,
+            workers=EMBED_WORKERS,
+            on_batch_done=on_batch_done
+        )
+
+    zeros = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    return [_embedding_cache.get(key, zeros) for key in keys]
+
+
 def load_documents() -> List[Dict]:
-    """Učitaj dokumente iz JSON."""
-    if not STORAGE_FILE.exists():
-        return []
-    
-    with open(STORAGE_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Učitaj dokumente iz document store-a."""
+    return local_storage.load_documents()
 
 
 def save_documents(docs: List[Dict]):
-    """Sačuvaj dokumente u JSON."""
-    STORAGE_FILE.parent.mkdir(exist_ok=True)
-    with open(STORAGE_FILE, 'w', encoding='utf-8') as f:
-        json.dump(docs, f, ensure_ascii=False, indent=2)
-    print(f"Saved {len(docs)} documents to {STORAGE_FILE}")
+    """Upsert dokumenata u document store."""
+    local_storage.save_documents(docs)
 
 
 def build_vector_index():
@@ -121,7 +168,7 @@ def build_vector_index():
     # Kreiraj FAISS index
     index = faiss.IndexFlatIP(EMBEDDING_DIM)  # Inner product za cosine similarity
     
-    embeddings = []
+    texts = []
     metadata = []
     
     for i, doc in enumerate(docs):
@@ -129,21 +176,20 @@ def build_vector_index():
         text_to_embed = f"{doc.get('title', '')} {doc.get('content', '')}"
         
         # Limit na 8000 karaktera zbog embedding API limita
-        text_to_embed = text_to_embed[:8000]
-        
-        embedding = get_embedding(text_to_embed)
-        embeddings.append(embedding)
+        texts.append(text_to_embed[:8000])
         metadata.append({
             'doc_id': i,
             'title': doc.get('title', ''),
             'url': doc.get('url', ''),
             'source': doc.get('source', ''),
             'page': doc.get('page'),
-            'type': doc.get('type', 'unknown')
+            'type': doc.get('type', 'unknown'),
+            'lang': doc.get('lang'),
+            'published_at': doc.get('published_at')
         })
-        
-        if (i + 1) % 50 == 0:
-            print(f"  Processed {i + 1}/{len(docs)} documents...")
+    
+    # Batch embedding (paralelni zahtjevi, nastavlja od cache-a ako je build prekinut)
+    embeddings = get_embeddings(texts)
     
     # Normalizuj embeddings za cosine similarity
     embeddings = np.array(embeddings, dtype=np.float32)
@@ -161,13 +207,29 @@ def build_vector_index():
     print(f"SUCCESS: Vector index saved with {len(docs)} documents indexed")
 
 
-def search_documents(query: str, k: int = 8) -> List[Dict]:
+def _bitmaps(metadata: List[Dict]) -> MetadataBitmaps:
+    """
+    Bitmape atributa po redu indeksa, iz metadata snimljenih uz index (red i = metadata[i]).
+
+    Document store se posle build-a mijenja (novi/obrisani dokumenti), pa se ne koristi
+    za filtere. Metadata starijih build-ova nemaju lang/published_at - za te filtere rebuild.
+    """
+    global _filter_cache
+    key = (VECTOR_INDEX_FILE.stat().st_mtime_ns, len(metadata))
+    if _filter_cache is None or _filter_cache[0] != key:
+        _filter_cache = (key, MetadataBitmaps(metadata))
+    return _filter_cache[1]
+
+
+def search_documents(query: str, k: int = 8, filters: Optional[Dict] = None) -> List[Dict]:
     """
     Semantic search kroz lokalne dokumente koristeći FAISS + OpenAI embeddings.
     
     Args:
         query: Search query
         k: Max number of results
+        filters: Strukturirani filteri (type, source, lang, date_from, date_to),
+            primjenjuju se unutar FAISS pretrage
         
     Returns:
         List of matching documents
@@ -190,15 +252,19 @@ def search_documents(query: str, k: int = 8) -> List[Dict]:
     query_embedding = np.array([query_embedding], dtype=np.float32)
     faiss.normalize_L2(query_embedding)
     
-    # Search
-    distances, indices = index.search(query_embedding, min(k * 2, len(docs)))
+    # Search (filteri kao IDSelector - FAISS vraća samo dozvoljene redove)
+    params, allowed = _bitmaps(metadata).search_params(filters) if filters else (None, index.ntotal)
+    if allowed == 0:
+        return []
+    distances, indices = index.search(query_embedding, min(k * 2, allowed), params=params)
     
     # Get results sa scoring po datumu
     scored_results = []
     seen_urls = set()
     
     for idx, distance in zip(indices[0], distances[0]):
-        if idx >= len(metadata) or idx >= len(docs):
+        # -1 = FAISS nije našao dovoljno redova
+        if idx < 0 or idx >= len(metadata) or idx >= len(docs):
             continue
         
         doc = docs[idx]
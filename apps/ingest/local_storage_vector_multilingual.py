@@ -2,33 +2,97 @@
 Vector storage sa MULTILINGUAL embedding modelom optimizovanim za srpski/crnogorski jezik.
 Koristi intfloat/multilingual-e5-large umesto OpenAI embeddings.
 """
+import hashlib
 import os
 import pickle
+import threading
+import time
 import numpy as np
 import faiss
 from pathlib import Path
-from typing import List, Dict
-from sentence_transformers import SentenceTransformer
-from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+from datetime import datetime, timedelta
+
+from apps.functions.atomic_file import atomic_write
+from apps.ingest import encoders, index_generations, local_storage
+from apps.ingest.chunking import chunk
+from apps.ingest.metadata_filter import MetadataBitmaps
+from apps.ingest.encoders import MODEL_NAME, get_encoder, encode_query, encode_passages, encode_passages_parallel
+from apps.ingest.quantization import build_index, search_with_rescore, index_nbytes
 
 # Paths - koristi apsolutne putanje relativne na lokaciju projekta
 PROJECT_ROOT = Path(__file__).parent.parent.parent.absolute()
 DATA_DIR = PROJECT_ROOT / "data"
 STORAGE_FILE = DATA_DIR / "parsed_data.json"
+# Verzionisane generacije indeksa (build piše novu generaciju, CURRENT pokazuje aktivnu)
+INDEX_DIR = DATA_DIR / "index_multilingual"
+INDEX_NAME = "index.faiss"
+METADATA_NAME = "metadata.pkl"
+VECTORS_NAME = "vectors.npy"
+# Generacije napravljene prije VECTOR_RESCORE_DTYPE (uvijek float32)
+LEGACY_VECTORS_NAME = "vectors.f32.npy"
+# Stari raspored (jedan set fajlova u data/) - čita se dok ne postoji nijedna generacija
 VECTOR_INDEX_FILE = DATA_DIR / "vector_index_multilingual.faiss"
 DOCS_METADATA_FILE = DATA_DIR / "docs_metadata_multilingual.pkl"
+# Float32 vektori za tačan re-scoring kvantizovanog indeksa (čitaju se kao memmap)
+VECTORS_FILE = DATA_DIR / "vector_index_multilingual.f32.npy"
+# Embedding cache (hash teksta passage-a -> vektor): rebuild re-embeduje samo nove/izmijenjene
+EMBEDDING_CACHE_FILE = DATA_DIR / "embedding_cache_multilingual.pkl"
+
+# Kvantizacija indeksa: none (float32), fp16, int8 (FAISS SQ) ili pq (product quantization)
+QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+PQ_M = int(os.getenv("VECTOR_PQ_M", "64"))
+# Shortlist za re-scoring = k * RESCORE_FACTOR
+RESCORE_FACTOR = int(os.getenv("VECTOR_RESCORE_FACTOR", "4"))
+# Vektori za re-scoring kvantizovanog indeksa: fp16 (pola float32 veličine, skorovi se računaju
+# u float32), fp32, none (bez sidecar fajla i bez re-scoring-a - najmanji otisak na disku) ili
+# auto: fp16 sidecar samo uz pq - uz fp16/int8 index bi sidecar bio veći ili jednak samom indeksu
+RESCORE_DTYPE = os.getenv("VECTOR_RESCORE_DTYPE", "auto").lower()
+RESCORE_DTYPES = {"fp16": "float16", "fp32": "float32", "none": None}
+AUTO_RESCORE_DTYPES = {"fp16": "none", "int8": "none", "pq": "fp16"}
+
+# Granularnost indeksa: passage (članci podijeljeni chunk-om, svaki passage poseban vektor)
+# ili document (cio članak = jedan vektor, staro ponašanje)
+INDEX_GRANULARITY = os.getenv("INDEX_GRANULARITY", "passage").lower()
+# Koliko passage-a se traži po traženom dokumentu i koliko ih se vraća po dokumentu
+PASSAGE_FANOUT = int(os.getenv("PASSAGE_FANOUT", "4"))
+MAX_PASSAGES_PER_DOC = int(os.getenv("MAX_PASSAGES_PER_DOC", "2"))
+
+# Vremenske particije: mjesečni bucket-i po published_at; upit sa `since` pretražuje
+# samo particije mjeseci od `since` do danas (stariji mjeseci ispadaju sami)
+RECENT_DAYS = int(os.getenv("RECENT_DAYS", "90"))
+
+# Live index (streaming ingest): nova generacija najčešće svakih N sekundi ili kad se skupi N
+# dokumenata. Svaka objava je kompletna generacija i pun reload u API-ju, a generacija koja se
+# još učitava ne smije ispasti iz INDEX_KEEP_GENERATIONS poslednjih.
+LIVE_INDEX_PUBLISH_SECONDS = float(os.getenv("LIVE_INDEX_PUBLISH_SECONDS", "30"))
+LIVE_INDEX_PUBLISH_DOCS = int(os.getenv("LIVE_INDEX_PUBLISH_DOCS", "500"))
+
+# Multilingual model (MODEL_NAME) - NAJBOLJI za srpski/crnogorski jezik
+# Encoder backend (torch ili onnx) bira se preko ENCODER_BACKEND i učitava lazy
+
+# Učitan index (cache dok se ne objavi nova generacija) i pozadinski reload
+_index_cache = None
+_reload_lock = threading.Lock()
+_reload_thread = None
+# Prvo (blokirajuće) učitavanje: warmup i prvi upit čekaju isto čitanje, ne čitaju dvaput
+_load_lock = threading.Lock()
+# Mjesečne particije učitanog indeksa: (index, redovi po mjesecu, {mjesec: (redovi, flat index)})
+_partition_cache = None
+_partition_lock = threading.Lock()
+# Passage-i učitanog indeksa po dokumentu (id ili url): (index, {ključ: [passage tekstovi]})
+_doc_passages_cache = None
+# Bitmape atributa (type, source, lang, datum) učitanog indeksa: (index, MetadataBitmaps)
+_filter_cache = None
+_filter_lock = threading.Lock()
+
+# Generacije koje nisu prošle provjeru (ne pokušavaju se ponovo pri svakom upitu)
+_rejected = set()
 
-# Multilingual model - NAJBOLJI za srpski/crnogorski jezik
-MODEL_NAME = "intfloat/multilingual-e5-large"
-# Model se ucitava lazy - samo kada je potreban
-model = None
 
 def get_model():
-    """Lazy load model samo kada je potreban."""
-    global model
-    if model is None:
-        model = SentenceTransformer(MODEL_NAME)
-    return model
+    """Lazy load PyTorch SentenceTransformer modela (referentni backend)."""
+    return get_encoder("torch").model
 
 
 def get_embedding(text: str) -> np.ndarray:
@@ -38,18 +102,104 @@ def get_embedding(text: str) -> np.ndarray:
     """
     # E5 modeli zahtevaju prefix "query: " za upite i "passage: " za dokumente
     # Za jednostavnost, koristim "passage: " za sve (dobro radi u praksi)
-    m = get_model()
-    embedding = m.encode(f"passage: {text}", normalize_embeddings=True)
-    return embedding
+    return encode_passages([text])[0]
+
+
+def cache_key(text: str) -> str:
+    """
+    Ključ embedding cache-a: model i backend (torch ili int8 ONNX daju različite vektore).
+    Kvantizacija indeksa nije dio ključa - cache čuva float32 vektore prije kvantizacije.
+    """
+    variant = f"{MODEL_NAME}\n{encoders.ENCODER_BACKEND}"
+    return hashlib.sha256(f"{variant}\n{text}".encode('utf-8')).hexdigest()
+
+
+def load_embedding_cache() -> Dict[str, np.ndarray]:
+    """Učitaj embedding cache (prazan ako ne postoji ili je oštećen)."""
+    if EMBEDDING_CACHE_FILE.exists():
+        try:
+            with open(EMBEDDING_CACHE_FILE, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"UPOZORENJE: embedding cache nije učitan ({e}) - re-embedding svega")
+    return {}
+
+
+def save_embedding_cache(cache: Dict[str, np.ndarray]):
+    """Atomično snimanje cache-a (atomic_write)."""
+    with atomic_write(EMBEDDING_CACHE_FILE, 'wb') as f:
+        pickle.dump(cache, f)
+
+
+def doc_passage_texts(doc: Dict) -> List[tuple]:
+    """
+    Tekstovi za embedding jednog dokumenta.
+    
+    Returns:
+        Lista (passage, tekst za embedding); za document granularnost passage je None
+    """
+    # Kombinuj naslov + content za bolji embedding
+    title = doc.get('title', '')
+    content = doc.get('content', '')
+    if INDEX_GRANULARITY == "passage":
+        return [(passage, f"{title}. {passage}") for passage in (list(chunk(content)) or [""])]
+    return [(None, f"{title}. {content}")]
+
+
+def embed_passages_cached(texts: List[str]) -> np.ndarray:
+    """
+    Embedding passage-a uz cache po hash-u teksta.
+    
+    Enkodiraju se samo tekstovi kojih nema u cache-u (novi ili izmijenjeni članci);
+    cache se potom svodi na trenutne tekstove i atomično snima.
+    """
+    cache = load_embedding_cache()
+    
+    keys = [cache_key(text) for text in texts]
+    missing = list({key: text for key, text in zip(keys, texts) if key not in cache}.items())
+    print(f"Embedding {len(missing)} new/changed passages ({len(texts) - len(missing)} cached)")
+    
+    if missing:
+        # Build: length bucketing + pool procesa (ENCODER_WORKERS), rezultat u redosledu ulaza
+        vectors = encode_passages_parallel([text for _, text in missing], batch_size=32, show_progress_bar=True)
+        for (key, _), vector in zip(missing, vectors):
+            cache[key] = np.asarray(vector, dtype='float32')
+    
+    current = set(keys)
+    save_embedding_cache({key: vector for key, vector in cache.items() if key in current})
+    
+    return np.array([cache[key] for key in keys], dtype='float32')
 
 
 def load_documents():
-    """Load documents from JSON."""
-    import json
-    if not STORAGE_FILE.exists():
-        return []
-    with open(STORAGE_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load documents from the document store."""
+    return local_storage.load_documents()
+
+
+def rescore_dtype(kind: Optional[str] = None) -> str:
+    """
+    Efektivni VECTOR_RESCORE_DTYPE za kvantizaciju indeksa (auto se razrješava po vrsti indeksa).
+
+    Args:
+        kind: Kvantizacija (podrazumijevano VECTOR_QUANTIZATION)
+
+    Returns:
+        fp16, fp32 ili none
+    """
+    kind = kind or QUANTIZATION
+    if kind == "none":
+        return "none"
+    if RESCORE_DTYPE == "auto":
+        return AUTO_RESCORE_DTYPES.get(kind, "none")
+    if RESCORE_DTYPE not in RESCORE_DTYPES:
+        raise ValueError(f"Nepoznat VECTOR_RESCORE_DTYPE: {RESCORE_DTYPE} (auto, fp16, fp32 ili none)")
+    return RESCORE_DTYPE
+
+
+def rescore_vectors(embeddings: np.ndarray) -> Optional[np.ndarray]:
+    """Sidecar vektori za re-scoring (samo uz kvantizovan index, u dtype-u iz rescore_dtype())."""
+    dtype = RESCORE_DTYPES[rescore_dtype()]
+    return embeddings.astype(dtype) if dtype else None
 
 
 def build_vector_index():
@@ -68,47 +218,373 @@ def build_vector_index():
     
     # Pripremi tekstove za embedding
     texts = []
-    metadata = []
+    passages = []
     
-    for doc in docs:
-        # Kombinuj naslov + content za bolji embedding
-        title = doc.get('title', '')
-        content = doc.get('content', '')
-        combined_text = f"{title}. {content}"
-        
-        texts.append(combined_text)
-        metadata.append(doc)
+    for doc_idx, doc in enumerate(docs):
+        # Svaki passage je poseban vektor sa pokazivačem na roditeljski dokument
+        for passage, text in doc_passage_texts(doc):
+            texts.append(text)
+            if passage is not None:
+                passages.append({"parent": doc_idx, "text": passage})
+    
+    if INDEX_GRANULARITY == "passage":
+        print(f"Passages: {len(passages)} (avg {len(passages) / len(docs):.1f} per document)")
+        metadata = {"granularity": "passage", "docs": docs, "passages": passages}
+    else:
+        metadata = docs
     
     # Generiši embeddings (batch processing za brzinu)
     print("Generating embeddings...")
-    m = get_model()
-    embeddings = m.encode(
-        [f"passage: {text}" for text in texts],
-        show_progress_bar=True,
-        batch_size=32,
-        normalize_embeddings=True
-    )
-    
-    embeddings_array = np.array(embeddings, dtype='float32')
+    embeddings_array = embed_passages_cached(texts)
     
     # Napravi FAISS index (Inner Product za normalized embeddings = cosine similarity)
     dimension = embeddings_array.shape[1]
-    index = faiss.IndexFlatIP(dimension)  # Inner Product za normalized vectors
-    index.add(embeddings_array)
+    index = build_index(embeddings_array, kind=QUANTIZATION, pq_m=PQ_M)
     
-    # Sačuvaj index i metadata
-    DATA_DIR.mkdir(exist_ok=True)
-    faiss.write_index(index, str(VECTOR_INDEX_FILE))
+    # Nova generacija (index + metadata + vektori za re-scoring kvantizovanog indeksa) pa atomičan swap
+    vectors = rescore_vectors(embeddings_array)
+    gen_dir = write_generation(index, metadata, vectors)
+    
+    print(f"[OK] Index generation published: {gen_dir}")
+    print(f"[OK] Dimension: {dimension}, Documents: {len(docs)}, Vectors: {len(texts)}")
+    rescore_mb = vectors.nbytes / 1024 / 1024 if vectors is not None else 0.0
+    print(f"[OK] Quantization: {QUANTIZATION}, index size: {index_nbytes(index) / 1024 / 1024:.1f} MB "
+          f"+ re-scoring vektori {rescore_mb:.1f} MB ({rescore_dtype() if vectors is not None else 'bez'}) "
+          f"(float32: {embeddings_array.nbytes / 1024 / 1024:.1f} MB)")
+
+
+def write_generation(index, metadata, vectors: Optional[np.ndarray] = None) -> Path:
+    """
+    Upiši index, metadata i (opciono) float vektore u novu generaciju i objavi je.
     
-    with open(DOCS_METADATA_FILE, 'wb') as f:
+    Returns:
+        Direktorijum objavljene generacije
+    """
+    gen_dir = index_generations.new_generation(INDEX_DIR)
+    faiss.write_index(index, str(gen_dir / INDEX_NAME))
+    with open(gen_dir / METADATA_NAME, 'wb') as f:
         pickle.dump(metadata, f)
+    if vectors is not None:
+        np.save(gen_dir / VECTORS_NAME, vectors)
+    
+    docs = metadata["docs"] if isinstance(metadata, dict) else metadata
+    index_generations.write_manifest(gen_dir, {
+        "model": MODEL_NAME,
+        "quantization": QUANTIZATION,
+        "granularity": "passage" if isinstance(metadata, dict) else "document",
+        "documents": len(docs),
+        "vectors": int(index.ntotal),
+    })
+    index_generations.publish(INDEX_DIR, gen_dir)
+    return gen_dir
+
+
+def index_files() -> Optional[Tuple[str, Path, Path, Path]]:
+    """
+    Fajlovi aktivnog indeksa.
+    
+    Returns:
+        (ključ verzije, index, metadata, vektori) ili None ako index ne postoji;
+        ključ je ime generacije (ili mtime za stari raspored bez generacija)
+    """
+    gen_dir = index_generations.current_generation(INDEX_DIR)
+    if gen_dir is not None:
+        return _generation_files(gen_dir)
+    if VECTOR_INDEX_FILE.exists() and DOCS_METADATA_FILE.exists():
+        return f"legacy:{VECTOR_INDEX_FILE.stat().st_mtime}", VECTOR_INDEX_FILE, DOCS_METADATA_FILE, VECTORS_FILE
+    return None
+
+
+def _generation_files(gen_dir: Path) -> Tuple[str, Path, Path, Path]:
+    vectors_file = gen_dir / VECTORS_NAME
+    if not vectors_file.exists() and (gen_dir / LEGACY_VECTORS_NAME).exists():
+        vectors_file = gen_dir / LEGACY_VECTORS_NAME
+    return gen_dir.name, gen_dir / INDEX_NAME, gen_dir / METADATA_NAME, vectors_file
+
+
+def _read_metadata(metadata_file: Path):
+    """(docs, passages) - stari format je lista dokumenata (jedan vektor po dokumentu)."""
+    with open(metadata_file, 'rb') as f:
+        metadata = pickle.load(f)
+    if isinstance(metadata, dict):
+        return metadata["docs"], metadata["passages"]
+    return metadata, None
+
+
+class LiveIndexWriter:
+    """
+    Dodavanje novih dokumenata u postojeći FAISS index bez rebuild-a (streaming ingest).
+    
+    flush() objavljuje novu generaciju (write_generation) - prvu odmah, a sledeće batch-ovano
+    po LIVE_INDEX_PUBLISH_SECONDS / LIVE_INDEX_PUBLISH_DOCS; API je preuzima u pozadini.
+    """
+    
+    def __init__(self, publish_seconds: float = LIVE_INDEX_PUBLISH_SECONDS,
+                 publish_docs: int = LIVE_INDEX_PUBLISH_DOCS):
+        self.index = None
+        self.docs = None
+        self.passages = None
+        self.vectors = None
+        self.pending = 0
+        self.publish_seconds = publish_seconds
+        self.publish_docs = publish_docs
+        self.last_publish = None
+        files = index_files()
+        if files is None:
+            return
+        _, index_file, metadata_file, vectors_file = files
+        
+        docs, passages = _read_metadata(metadata_file)
+        
+        # Index druge granularnosti se ne dopunjava - potreban je rebuild
+        if (passages is not None) != (INDEX_GRANULARITY == "passage"):
+            print("Live index: granularnost se ne poklapa sa INDEX_GRANULARITY - preskačem")
+            return
+        
+        self.index = faiss.read_index(str(index_file))
+        self.docs = list(docs)
+        self.passages = list(passages) if passages is not None else None
+        if vectors_file.exists():
+            self.vectors = np.load(vectors_file)
+    
+    @property
+    def available(self) -> bool:
+        return self.index is not None
+    
+    def add(self, doc: Dict, passages: List[str], vectors: np.ndarray):
+        """Dodaj dokument i vektore njegovih passage-a (passages je [None] za document granularnost)."""
+        parent = len(self.docs)
+        self.docs.append(doc)
+        if self.passages is not None:
+            self.passages.extend({"parent": parent, "text": passage} for passage in passages)
+        vectors = np.asarray(vectors, dtype='float32')
+        self.index.add(vectors)
+        if self.vectors is not None:
+            self.vectors = np.vstack([self.vectors, vectors.astype(self.vectors.dtype)])
+        self.pending += 1
     
-    print(f"[OK] FAISS index saved: {VECTOR_INDEX_FILE}")
-    print(f"[OK] Metadata saved: {DOCS_METADATA_FILE}")
-    print(f"[OK] Dimension: {dimension}, Documents: {len(docs)}")
+    def flush(self, force: bool = False) -> int:
+        """
+        Objavi promjene kao novu generaciju ako je batch spreman.
+        
+        Args:
+            force: Objavi odmah (kraj ingest-a)
+        
+        Returns:
+            Broj objavljenih dokumenata (0 ako objava još čeka)
+        """
+        if not self.pending:
+            return 0
+        due = (force or self.last_publish is None or self.pending >= self.publish_docs
+               or time.monotonic() - self.last_publish >= self.publish_seconds)
+        if not due:
+            return 0
+        metadata = ({"granularity": "passage", "docs": self.docs, "passages": self.passages}
+                    if self.passages is not None else self.docs)
+        write_generation(self.index, metadata, self.vectors)
+        self.last_publish = time.monotonic()
+        flushed, self.pending = self.pending, 0
+        return flushed
+
+
+def _read_index(files) -> tuple:
+    """Učitaj (ključ, index, docs, passages, vectors) iz fajlova jedne verzije."""
+    key, index_file, metadata_file, vectors_file = files
+    index = faiss.read_index(str(index_file))
+    docs, passages = _read_metadata(metadata_file)
+    
+    vectors = None
+    if vectors_file.exists():
+        vectors = np.load(vectors_file, mmap_mode='r')
+        if vectors.shape[0] != index.ntotal:
+            print("UPOZORENJE: Float vektori ne odgovaraju indeksu - re-scoring isključen")
+            vectors = None
+    
+    return key, index, docs, passages, vectors
+
+
+def _verified(files) -> bool:
+    """Generacija mora da prođe provjeru checksum-a iz manifesta (stari raspored nema manifest)."""
+    key = files[0]
+    if key.startswith("legacy:") or index_generations.verify(INDEX_DIR / key):
+        return True
+    _rejected.add(key)
+    print(f"UPOZORENJE: Generacija indeksa {key} ne odgovara manifestu - preskačem")
+    return False
 
 
-def search_documents(query: str, k: int = 5) -> List[Dict]:
+def _reload(files):
+    """Pozadinski reload: nova generacija zamjenjuje staru tek kad je potpuno učitana."""
+    global _index_cache
+    try:
+        if _verified(files):
+            _index_cache = _read_index(files)
+            print(f"Index reloaded: {files[0]}")
+    except Exception as e:
+        _rejected.add(files[0])
+        print(f"UPOZORENJE: Reload indeksa {files[0]} nije uspio ({e}) - ostaje {_index_cache[0]}")
+
+
+def is_warm() -> bool:
+    """Encoder i index su već u memoriji - upit ne plaća učitavanje (hladan start)."""
+    return _index_cache is not None and encoders.encoder_loaded()
+
+
+def _load_index(block: bool = False):
+    """
+    Učitaj index, dokumente, passage-e i (opciono) float vektore za re-scoring.
+    
+    Rezultat se kešira po generaciji. Kad se objavi nova, učitava se u pozadinskoj
+    niti, a upiti do tada koriste prethodnu (bez pauze i bez restarta procesa).
+    
+    Args:
+        block: Sačekaj učitavanje nove generacije umjesto vraćanja prethodne
+    
+    Returns:
+        (index, docs, passages, vectors) - passages je None za document-level index
+    """
+    global _index_cache, _reload_thread
+    files = index_files()
+    cache = _index_cache
+    if cache is not None and (files is None or cache[0] == files[0] or files[0] in _rejected):
+        return cache[1:]
+    
+    if files is None:
+        raise FileNotFoundError(f"Multilingual index ne postoji ({INDEX_DIR})")
+    if cache is None or block:
+        with _load_lock:
+            if _index_cache is not cache and _index_cache[0] == files[0]:
+                return _index_cache[1:]
+            # Prvo učitavanje: oštećena generacija -> najnovija ispravna prethodna
+            if _verified(files):
+                _index_cache = _read_index(files)
+            else:
+                for gen_dir in reversed(index_generations.generations(INDEX_DIR)):
+                    if index_generations.verify(gen_dir):
+                        _index_cache = _read_index(_generation_files(gen_dir))
+                        break
+                else:
+                    raise RuntimeError(f"Nijedna generacija u {INDEX_DIR} ne prolazi provjeru manifesta")
+            return _index_cache[1:]
+    
+    with _reload_lock:
+        if _reload_thread is None or not _reload_thread.is_alive():
+            _reload_thread = threading.Thread(target=_reload, args=(files,), daemon=True)
+            _reload_thread.start()
+    return cache[1:]
+
+
+def month_bucket(published_at) -> Optional[str]:
+    """Particija dokumenta: "YYYY-MM" iz ISO published_at (None za dokumente bez datuma)."""
+    if not published_at or len(published_at) < 7 or published_at[4] != "-":
+        return None
+    return published_at[:7]
+
+
+def recent_buckets(since: datetime, now: Optional[datetime] = None) -> List[str]:
+    """Mjeseci od `since` do `now` (uključivo)."""
+    now = now or datetime.now()
+    year, month = since.year, since.month
+    buckets = []
+    while (year, month) <= (now.year, now.month):
+        buckets.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return buckets
+
+
+def _reconstruct(index, vectors, rows: np.ndarray) -> np.ndarray:
+    """Vektori redova: float vektori za re-scoring ako postoje, inače iz samog indeksa."""
+    if vectors is not None:
+        return np.asarray(vectors[rows], dtype='float32')
+    return np.vstack([index.reconstruct(int(row)) for row in rows]).astype('float32')
+
+
+def _partitions(index, docs, passages, vectors, buckets: List[str]) -> List[tuple]:
+    """
+    Flat index po mjesecu za tražene bucket-e (pravi se jednom po generaciji, lazy).
+    
+    Returns:
+        Lista (redovi u glavnom indeksu, flat index) za bucket-e koji imaju dokumente
+    """
+    global _partition_cache
+    with _partition_lock:
+        if _partition_cache is None or _partition_cache[0] is not index:
+            month_rows = {}
+            parents = [p["parent"] for p in passages] if passages is not None else range(len(docs))
+            for row, doc_idx in enumerate(parents):
+                bucket = month_bucket(docs[doc_idx].get("published_at"))
+                if bucket:
+                    month_rows.setdefault(bucket, []).append(row)
+            _partition_cache = (index, {m: np.array(r, dtype='int64') for m, r in month_rows.items()}, {})
+        
+        _, month_rows, built = _partition_cache
+        out = []
+        for bucket in buckets:
+            if bucket not in month_rows:
+                continue
+            if bucket not in built:
+                rows = month_rows[bucket]
+                sub_index = faiss.IndexFlatIP(index.d)
+                sub_index.add(_reconstruct(index, vectors, rows))
+                built[bucket] = (rows, sub_index)
+            out.append(built[bucket])
+        return out
+
+
+def _search_partitions(partitions: List[tuple], query_vector: np.ndarray, n_rows: int):
+    """Tačna pretraga mjesečnih particija, spojena u (distances, indices) glavnog indeksa."""
+    scored = []
+    for rows, sub_index in partitions:
+        distances, ids = sub_index.search(query_vector, min(n_rows, sub_index.ntotal))
+        scored.extend((float(d), int(rows[i])) for d, i in zip(distances[0], ids[0]) if i >= 0)
+    scored.sort(reverse=True)
+    scored = scored[:n_rows]
+    return (np.array([[d for d, _ in scored]], dtype='float32'),
+            np.array([[row for _, row in scored]], dtype='int64'))
+
+
+def _doc_key(doc: Dict) -> Optional[str]:
+    return doc.get("id") or doc.get("url") or None
+
+
+def indexed_passages(doc: Dict) -> Optional[List[str]]:
+    """
+    Passage-i dokumenta iz već učitanog passage indeksa (bez ponovnog chunk-ovanja).
+    
+    Returns:
+        Passage tekstovi u redosledu iz članka ili None (index nije učitan / dokument nije u njemu)
+    """
+    global _doc_passages_cache
+    cache = _index_cache
+    key = _doc_key(doc)
+    if cache is None or cache[3] is None or key is None:
+        return None
+    _, index, docs, passages, _ = cache
+    if _doc_passages_cache is None or _doc_passages_cache[0] is not index:
+        by_parent = {}
+        for passage in passages:
+            by_parent.setdefault(passage["parent"], []).append(passage["text"])
+        _doc_passages_cache = (index, {
+            _doc_key(docs[parent]): texts for parent, texts in by_parent.items() if _doc_key(docs[parent])
+        })
+    return _doc_passages_cache[1].get(key)
+
+
+def _bitmaps(index, docs, passages) -> MetadataBitmaps:
+    """Bitmape atributa po redu indeksa (prave se jednom po generaciji)."""
+    global _filter_cache
+    with _filter_lock:
+        if _filter_cache is None or _filter_cache[0] is not index:
+            _filter_cache = (index, MetadataBitmaps.for_index(docs, passages))
+        return _filter_cache[1]
+
+
+def search_documents(
+    query: str,
+    k: int = 5,
+    since: Optional[datetime] = None,
+    filters: Optional[Dict] = None
+) -> List[Dict]:
     """
     Pretraži dokumente koristeći multilingual semantic search.
     BOLJI za srpski/crnogorski od OpenAI!
@@ -116,64 +592,106 @@ def search_documents(query: str, k: int = 5) -> List[Dict]:
     Args:
         query: Upit korisnika
         k: Broj rezultata
+        since: Samo dokumenti objavljeni od ovog trenutka (pretražuju se samo
+            mjesečne particije od `since` do danas)
+        filters: Strukturirani filteri (type, source, lang, date_from, date_to) -
+            primjenjuju se unutar FAISS pretrage (IDSelector), pa stiže punih k
     
     Returns:
         Lista dokumenata rangiranih po relevantnosti
     """
     # Proveri da li postoji index
-    if not VECTOR_INDEX_FILE.exists() or not DOCS_METADATA_FILE.exists():
+    if index_files() is None:
         print("UPOZORENJE: Multilingual FAISS index ne postoji! Pokreni build_vector_index()")
         return []
     
     # Učitaj index i metadata
-    index = faiss.read_index(str(VECTOR_INDEX_FILE))
-    with open(DOCS_METADATA_FILE, 'rb') as f:
-        metadata = pickle.load(f)
+    index, docs, passages, vectors = _load_index()
     
     # Generiši embedding za query (sa "query: " prefixom za E5 model)
-    m = get_model()
-    query_embedding = m.encode(
-        f"query: {query}",
-        normalize_embeddings=True
-    )
+    query_embedding = encode_query(query)
     query_vector = np.array([query_embedding], dtype='float32')
     
-    # Pretraži FAISS index
-    distances, indices = index.search(query_vector, k)
+    # Passage index: traži više passage-a pa agregiraj po dokumentu
+    n_rows = k * PASSAGE_FANOUT if passages is not None else k
+    
+    if filters:
+        # `since` postaje donja granica datuma istog selektora (umjesto particija)
+        if since is not None and not filters.get("date_from"):
+            filters = {**filters, "date_from": since}
+        params, allowed = _bitmaps(index, docs, passages).search_params(filters)
+        if allowed == 0:
+            return []
+        distances, indices = search_with_rescore(
+            index, query_vector, min(n_rows, allowed), vectors=vectors,
+            rescore_factor=RESCORE_FACTOR, params=params
+        )
+    elif since is not None:
+        # Recency upit: samo particije skorijih mjeseci (+ tačna granica datuma ispod)
+        partitions = _partitions(index, docs, passages, vectors, recent_buckets(since))
+        distances, indices = _search_partitions(partitions, query_vector, n_rows)
+    else:
+        # Pretraži FAISS index (kvantizovani index: shortlist + tačan re-scoring)
+        distances, indices = search_with_rescore(
+            index, query_vector, n_rows, vectors=vectors, rescore_factor=RESCORE_FACTOR
+        )
+    since_iso = since.isoformat() if since is not None else None
+    
+    # Agregacija po dokumentu: skor = najbolji passage, čuvaj najbolje passage-e
+    hits = {}
+    for distance, row in zip(distances[0], indices[0]):
+        if passages is not None:
+            if not 0 <= row < len(passages):
+                continue
+            doc_idx = passages[row]["parent"]
+        else:
+            doc_idx = row
+        if not 0 <= doc_idx < len(docs):
+            continue
+        if since_iso and (docs[doc_idx].get("published_at") or "") < since_iso:
+            continue
+        
+        if doc_idx not in hits:
+            if len(hits) >= k:
+                continue
+            hits[doc_idx] = (float(distance), [])
+        if passages is not None and len(hits[doc_idx][1]) < MAX_PASSAGES_PER_DOC:
+            hits[doc_idx][1].append(passages[row]["text"])
     
     # Pripremi rezultate sa dodatnim skoringom
     results = []
     now = datetime.now()
     
-    for idx, (distance, doc_idx) in enumerate(zip(distances[0], indices[0])):
-        if doc_idx < len(metadata):
-            doc = metadata[doc_idx].copy()
-            
-            # Bazni skor od FAISS (cosine similarity za normalized vectors)
-            base_score = float(distance)
-            
-            # Bonus za novije članke (prioritet skorijim informacijama)
-            date_bonus = 0
-            published_at = doc.get('published_at')
-            if published_at:
-                try:
-                    pub_date = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
-                    days_old = (now - pub_date.replace(tzinfo=None) if pub_date.tzinfo else now - pub_date).days
-                    
-                    if days_old <= 30:
-                        date_bonus = 0.15  # Vrlo nov
-                    elif days_old <= 90:
-                        date_bonus = 0.10  # Nov
-                    elif days_old <= 365:
-                        date_bonus = 0.05  # Relativno nov
-                except:
-                    pass
-            
-            # Kombinovani skor
-            final_score = base_score + date_bonus
-            doc['_score'] = final_score
-            
-            results.append(doc)
+    for doc_idx, (distance, doc_passages) in hits.items():
+        doc = docs[doc_idx].copy()
+        if doc_passages:
+            doc['_passages'] = doc_passages
+        
+        # Bazni skor od FAISS (cosine similarity za normalized vectors)
+        base_score = float(distance)
+        
+        # Bonus za novije članke (prioritet skorijim informacijama)
+        date_bonus = 0
+        published_at = doc.get('published_at')
+        if published_at:
+            try:
+                pub_date = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
+                days_old = (now - pub_date.replace(tzinfo=None) if pub_date.tzinfo else now - pub_date).days
+                
+                if days_old <= 30:
+                    date_bonus = 0.15  # Vrlo nov
+                elif days_old <= 90:
+                    date_bonus = 0.10  # Nov
+                elif days_old <= 365:
+                    date_bonus = 0.05  # Relativno nov
+            except:
+                pass
+        
+        # Kombinovani skor
+        final_score = base_score + date_bonus
+        doc['_score'] = final_score
+        
+        results.append(doc)
     
     # Sortiraj po finalnom skoru
     results.sort(key=lambda x: x.get('_score', 0), reverse=True)
@@ -0,0 +1,91 @@
+"""
+Strukturirani filteri za vektorsku pretragu (type, source, lang, raspon datuma).
+
+Za svaki red indeksa (passage ili dokument) unaprijed se prave bitmape po vrijednosti
+atributa; filter je AND tih bitmapa i ide u FAISS kao IDSelectorBitmap, pa index vraća
+punih k pogodaka među dozvoljenim redovima (bez over-fetch-a i filtriranja posle).
+
+    filters = {"type": "news", "lang": ["sr", "me"], "date_from": "2025-01-01"}
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import faiss
+import numpy as np
+
+FILTER_FIELDS = ("type", "source", "lang")
+DATE_FIELDS = ("date_from", "date_to")
+
+FilterValue = Union[str, Sequence[str]]
+
+
+def _iso(value) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def validate_filters(filters: Optional[Dict]) -> Dict:
+    unknown = set(filters or {}) - set(FILTER_FIELDS) - set(DATE_FIELDS)
+    if unknown:
+        raise ValueError(f"Nepoznati filteri: {', '.join(sorted(unknown))} "
+                         f"(dozvoljeno: {', '.join(FILTER_FIELDS + DATE_FIELDS)})")
+    return {key: value for key, value in (filters or {}).items() if value is not None}
+
+
+class MetadataBitmaps:
+    """Bitmape po vrijednosti atributa i niz datuma, za redove jednog indeksa."""
+
+    def __init__(self, row_docs: Sequence[Dict]):
+        self.n = len(row_docs)
+        self.bitmaps: Dict[str, Dict[str, np.ndarray]] = {}
+        for field in FILTER_FIELDS:
+            values = np.array([str(doc.get(field) or "") for doc in row_docs], dtype=object)
+            self.bitmaps[field] = {value: values == value for value in set(values.tolist())}
+        # ISO stringovi se porede leksikografski; bez datuma = "" (ispada iz svakog raspona)
+        self.dates = np.array([doc.get("published_at") or "" for doc in row_docs], dtype=str)
+
+    @classmethod
+    def for_index(cls, docs: List[Dict], passages: Optional[List[Dict]] = None) -> "MetadataBitmaps":
+        """Redovi passage indeksa nasljeđuju atribute roditeljskog dokumenta."""
+        if passages is None:
+            return cls(docs)
+        return cls([docs[p["parent"]] for p in passages])
+
+    def mask(self, filters: Optional[Dict]) -> Optional[np.ndarray]:
+        """AND svih filtera kao bool niz po redovima (None = bez filtera)."""
+        filters = validate_filters(filters)
+        if not filters:
+            return None
+        mask = np.ones(self.n, dtype=bool)
+        for field in FILTER_FIELDS:
+            if field not in filters:
+                continue
+            wanted = [filters[field]] if isinstance(filters[field], str) else list(filters[field])
+            field_mask = np.zeros(self.n, dtype=bool)
+            for value in wanted:
+                if value in self.bitmaps[field]:
+                    field_mask |= self.bitmaps[field][value]
+            mask &= field_mask
+        if "date_from" in filters:
+            mask &= self.dates >= _iso(filters["date_from"])
+        if "date_to" in filters:
+            # Gornja granica je uključiva i za datum bez vremena ("2025-03-31" pokriva cio dan)
+            mask &= (self.dates != "") & (self.dates <= _iso(filters["date_to"]) + "￿")
+        return mask
+
+    def search_params(self, filters: Optional[Dict]) -> Tuple[Optional[faiss.SearchParameters], int]:
+        """
+        FAISS parametri pretrage sa IDSelectorBitmap za filtere.
+
+        Returns:
+            (params ili None bez filtera, broj dozvoljenih redova)
+        """
+        mask = self.mask(filters)
+        if mask is None:
+            return None, self.n
+        bits = np.packbits(mask, bitorder='little')
+        params = faiss.SearchParameters(sel=faiss.IDSelectorBitmap(self.n, faiss.swig_ptr(bits)))
+        # Selector čita bitmapu preko pokazivača - niz mora živjeti koliko i params
+        params.bitmap_ref = bits
+        # Indeksi bez podrške za selector (IndexPQ) filtriraju shortlist ovom maskom
+        params.allowed_mask = mask
+        return params, int(mask.sum())
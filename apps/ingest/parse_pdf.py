@@ -21,3 +21,9 @@ def extract_pdf(path: str) -> Iterator[Dict]:
         yield {"page": i + 1, "text": text}
     doc.close()
 
+
+
+def pdf_title(path: str) -> str:
+    """Naslov iz PDF metapodataka (prazan string ako ga nema)."""
+    with fitz.open(path) as doc:
+        return (doc.metadata or {}).get("title") or ""
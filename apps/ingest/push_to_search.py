@@ -1,20 +1,26 @@
 """
 Azure AI Search index kreiranje i ingest pipeline.
+
+Ingest je pipeline: embedding batch-a N+1 ide paralelno sa upload-om batch-a N,
+id-evi su izvedeni iz sadržaja pa je ponovni ingest upsert (bez duplikata),
+a chunk-ovi koji već postoje u indeksu se ne embeduju ponovo.
 """
+import hashlib
 import os
-import uuid
+import re
+import time
+from collections import deque
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from azure.core.credentials import AzureKeyCredential
-from azure.search.documents.indexes import SearchIndexClient
-from azure.search.documents.indexes.models import (
-    SearchIndex, SimpleField, SearchFieldDataType, VectorSearch,
-    VectorSearchAlgorithmConfiguration, SearchField, SearchableField,
-    SemanticConfiguration, SemanticSettings, PrioritizedFields
-)
+from azure.core.exceptions import HttpResponseError
 from azure.search.documents import SearchClient
 from openai import OpenAI
-from typing import List
+from typing import Callable, Dict, List, Optional
 from dotenv import load_dotenv
 
+from apps.ingest.embedding_batches import call_with_backoff
+
 load_dotenv()
 
 SEARCH_ENDPOINT = os.environ["AZURE_SEARCH_ENDPOINT"]
@@ -22,11 +28,28 @@ SEARCH_KEY = os.environ["AZURE_SEARCH_API_KEY"]
 FAQ_INDEX = os.environ["AZURE_SEARCH_FAQ_INDEX"]
 NEWS_INDEX = os.environ["AZURE_SEARCH_NEWS_INDEX"]
 
+# Pipeline: veličina batch-a i paralelni embedding / upload zahtjevi
+UPLOAD_BATCH_SIZE = 64
+PUSH_EMBED_CONCURRENCY = int(os.getenv("PUSH_EMBED_CONCURRENCY", "2"))
+PUSH_UPLOAD_CONCURRENCY = int(os.getenv("PUSH_UPLOAD_CONCURRENCY", "2"))
+# Statusi pojedinačnih dokumenata (207 odgovor) koji se ponavljaju
+RETRYABLE_ITEM_STATUS = {409, 422, 429, 503}
+MAX_ITEM_RETRIES = 5
+
 
 def create_index_faq():
     """
     Kreira faq_sepa indeks (hibridni: BM25 + vektori, 3072-D).
     """
+    # Modeli indeksa se uvoze ovdje: imena se mijenjaju između verzija SDK-a,
+    # a ingest/upload ne treba da pada zbog toga
+    from azure.search.documents.indexes import SearchIndexClient
+    from azure.search.documents.indexes.models import (
+        SearchIndex, SimpleField, SearchFieldDataType, VectorSearch,
+        VectorSearchAlgorithmConfiguration, SearchField, SearchableField,
+        SemanticConfiguration, SemanticSettings, PrioritizedFields
+    )
+    
     client = SearchIndexClient(SEARCH_ENDPOINT, AzureKeyCredential(SEARCH_KEY))
     
     index = SearchIndex(
@@ -71,12 +94,18 @@ def create_index_news():
     """
     Kreira news_cbcg indeks (BM25-only, opciono vektori kasnije).
     """
+    from azure.search.documents.indexes import SearchIndexClient
+    from azure.search.documents.indexes.models import (
+        SearchIndex, SimpleField, SearchFieldDataType, SearchableField
+    )
+    
     client = SearchIndexClient(SEARCH_ENDPOINT, AzureKeyCredential(SEARCH_KEY))
     
     index = SearchIndex(
         name=NEWS_INDEX,
         fields=[
-            SimpleField(name="id", type=SearchFieldDataType.String, key=True),
+            # sortable: scraper sync paginira po ključu (order by id)
+            SimpleField(name="id", type=SearchFieldDataType.String, key=True, sortable=True),
             SearchableField(name="title", type=SearchFieldDataType.String, analyzer_name="standard.lucene"),
             SearchableField(name="body", type=SearchFieldDataType.String, analyzer_name="standard.lucene"),
             SimpleField(name="url", type=SearchFieldDataType.String, filterable=True),
@@ -85,7 +114,15 @@ def create_index_news():
         ]
     )
     
-    client.create_or_update_index(index)
+    try:
+        client.create_or_update_index(index)
+    except HttpResponseError as e:
+        # Postojećem polju se atribut (sortable) ne može promijeniti - indeks ostaje kakav jeste,
+        # a scraper sync za njega paginira skip-om. Za keyset sync: obrisati i ponovo napraviti indeks.
+        print(f"WARNING: id is not sortable in existing index {NEWS_INDEX} ({e.message}); "
+              f"recreate the index for keyset sync")
+        index.fields[0].sortable = False
+        client.create_or_update_index(index)
     print(f"Created index: {NEWS_INDEX}")
 
 
@@ -113,49 +150,144 @@ def embed(texts: List[str], model: str = "text-embedding-3-large") -> List[List[
     return [d.embedding for d in resp.data]
 
 
-def ingest_pdf(pdf_path: str):
+def content_id(source: str, page, content: str) -> str:
+    """Id izveden iz sadržaja (isti chunk -> isti id pri svakom ingest-u)."""
+    return hashlib.sha256(f"{source}|{page}|{content}".encode("utf-8")).hexdigest()
+
+
+def existing_ids(search_client: SearchClient, source: str) -> set:
+    """Id-evi dokumenata iz istog izvora koji su već u indeksu."""
+    escaped = source.replace("'", "''")
+    results = search_client.search(search_text="*", filter=f"source eq '{escaped}'", select=["id"])
+    return {doc["id"] for doc in results}
+
+
+def upload_batch(search_client: SearchClient, docs: List[Dict], retry_delay: float = 1.0) -> int:
+    """
+    Upsert batch-a (merge_or_upload) sa ponavljanjem throttle-ovanih dokumenata.
+    
+    Zahtjev u cjelini se ponavlja na 429/5xx (call_with_backoff), a dokumenti
+    odbijeni u 207 odgovoru ponavljaju se pojedinačno.
+    
+    Returns:
+        Broj uspješno upisanih dokumenata
+    """
+    by_id = {doc["id"]: doc for doc in docs}
+    pending = list(docs)
+    uploaded = 0
+    for attempt in range(MAX_ITEM_RETRIES + 1):
+        results = call_with_backoff(search_client.merge_or_upload_documents, pending, base_delay=retry_delay)
+        retry = []
+        for result in results:
+            if result.succeeded:
+                uploaded += 1
+            elif result.status_code in RETRYABLE_ITEM_STATUS and attempt < MAX_ITEM_RETRIES:
+                retry.append(by_id[result.key])
+            else:
+                print(f"  Upload failed for {result.key}: {result.status_code} {result.error_message}")
+        if not retry:
+            break
+        pending = retry
+        time.sleep(retry_delay * (2 ** attempt))
+    return uploaded
+
+
+def push_documents(
+    docs: List[Dict],
+    search_client: SearchClient,
+    embed_fn: Callable[[List[str]], List[List[float]]] = None,
+    batch_size: int = UPLOAD_BATCH_SIZE,
+    embed_workers: int = PUSH_EMBED_CONCURRENCY,
+    upload_workers: int = PUSH_UPLOAD_CONCURRENCY,
+    retry_delay: float = 1.0
+) -> Dict[str, int]:
+    """
+    Pipelined ingest: embedding i upload rade paralelno, svaki sa ograničenom konkurentnošću.
+    
+    Returns:
+        {"batches", "uploaded"}
+    """
+    embed_fn = embed_fn or embed
+    batches = [docs[i:i + batch_size] for i in range(0, len(docs), batch_size)]
+    
+    def embed_batch(batch):
+        vectors = call_with_backoff(embed_fn, [d["content"] for d in batch], base_delay=retry_delay)
+        return [{**doc, "content_vector": vec} for doc, vec in zip(batch, vectors)]
+    
+    uploaded = 0
+    pending_batches = deque(batches)
+    embedding = deque()
+    uploads = deque()
+    with ThreadPoolExecutor(embed_workers) as embed_pool, ThreadPoolExecutor(upload_workers) as upload_pool:
+        for n in range(1, len(batches) + 1):
+            # Embedding do embed_workers batch-eva unaprijed (N+1 dok se N upload-uje)
+            while pending_batches and len(embedding) < embed_workers:
+                embedding.append(embed_pool.submit(embed_batch, pending_batches.popleft()))
+            batch = embedding.popleft().result()
+            
+            # Backpressure: najviše upload_workers upload-a u letu
+            while len(uploads) >= upload_workers:
+                uploaded += uploads.popleft().result()
+            uploads.append(upload_pool.submit(upload_batch, search_client, batch, retry_delay))
+            print(f"Uploading batch {n}/{len(batches)}")
+        
+        while uploads:
+            uploaded += uploads.popleft().result()
+    
+    return {"batches": len(batches), "uploaded": uploaded}
+
+
+def ingest_pdf(pdf_path: str, search_client: Optional[SearchClient] = None, embed_fn=None, **pipeline_kwargs):
     """
     Ingest PDF dokumenta u Azure AI Search.
     
+    Ponovni ingest istog PDF-a je idempotentan: postojeći chunk-ovi se preskaču,
+    a chunk-ovi prethodne verzije kojih više nema brišu se iz indeksa - tek kad je
+    nova verzija kompletno upload-ovana. Source i naslov su iz naziva fajla.
+    
     Args:
         pdf_path: Putanja do PDF fajla
+        search_client: SearchClient (podrazumijevano FAQ indeks iz env-a)
+        embed_fn: Funkcija za embedding (podrazumijevano OpenAI embed)
     """
-    from .parse_pdf import extract_pdf
+    from .parse_pdf import extract_pdf, pdf_title
     from .chunking import chunk
     
+    stem = Path(pdf_path).stem
+    source = f"pdf:{stem}"
+    title = pdf_title(pdf_path) or re.sub(r'[_\-]+', ' ', stem)
     docs = []
     
     # Parse PDF
     for page in extract_pdf(pdf_path):
         for seg in chunk(page["text"]):
-            doc_id = str(uuid.uuid4())
             docs.append({
-                "id": doc_id,
-                "title": "SEPA Q&A",
+                "id": content_id(source, page["page"], seg),
+                "title": title,
                 "content": seg,
-                "source": "pdf:SEPA_QnA",
+                "source": source,
                 "page": page["page"]
             })
     
-    # Batch embedding & upload
-    search_client = SearchClient(SEARCH_ENDPOINT, FAQ_INDEX, AzureKeyCredential(SEARCH_KEY))
+    search_client = search_client or SearchClient(SEARCH_ENDPOINT, FAQ_INDEX, AzureKeyCredential(SEARCH_KEY))
     
-    batch_size = 64
-    for i in range(0, len(docs), batch_size):
-        slice_docs = docs[i:i + batch_size]
-        
-        # Embed
-        vectors = embed([d["content"] for d in slice_docs])
-        
-        # Add vectors to docs
-        for doc, vec in zip(slice_docs, vectors):
-            doc["content_vector"] = vec
-        
-        # Upload
-        search_client.upload_documents(slice_docs)
-        print(f"Uploaded batch {i//batch_size + 1}/{(len(docs)-1)//batch_size + 1}")
+    # Idempotentnost: preskoči chunk-ove koji su već u indeksu, obriši zastarjele
+    present = existing_ids(search_client, source)
+    current = {doc["id"] for doc in docs}
+    to_push = [doc for doc in docs if doc["id"] not in present]
+    stale = present - current
+    print(f"{len(docs)} chunks: {len(to_push)} to upload, {len(docs) - len(to_push)} already indexed, {len(stale)} stale")
+    
+    stats = push_documents(to_push, search_client, embed_fn=embed_fn, **pipeline_kwargs)
+    if stale and stats["uploaded"] < len(to_push):
+        # Nova verzija nije kompletna - stari chunk-ovi ostaju do sledećeg (uspješnog) ingest-a
+        print(f"WARNING: {len(to_push) - stats['uploaded']} chunks failed, keeping {len(stale)} stale chunks")
+        stale = set()
+    if stale:
+        search_client.delete_documents([{"id": doc_id} for doc_id in stale])
     
-    print(f"Ingested {len(docs)} chunks from {pdf_path}")
+    print(f"Ingested {stats['uploaded']} chunks from {pdf_path}")
+    return {**stats, "skipped": len(docs) - len(to_push), "deleted": len(stale)}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,126 @@
+"""
+Kvantizacija FAISS indeksa (fp16 / int8 scalar quantization, product quantization)
+sa tačnim re-scoring-om shortlist-e preko float vektora.
+"""
+from typing import Tuple
+import numpy as np
+import faiss
+
+# none = IndexFlatIP (float32), fp16/int8 = FAISS SQ, pq = product quantization
+QUANTIZATION_KINDS = ("none", "fp16", "int8", "pq")
+
+# PQ treba bar 256 vektora za treniranje (2^8 centroida po sub-kvantizeru)
+PQ_MIN_TRAIN = 256
+
+
+def build_index(vectors: np.ndarray, kind: str = "none", pq_m: int = 64) -> faiss.Index:
+    """
+    Napravi (i istreniraj) FAISS index za normalizovane vektore.
+
+    Args:
+        vectors: float32 matrica (n, d), L2 normalizovana
+        kind: Tip kvantizacije (none, fp16, int8, pq)
+        pq_m: Broj sub-kvantizera za PQ (d mora biti djeljivo sa pq_m)
+
+    Returns:
+        FAISS index sa dodatim vektorima (Inner Product metrika)
+    """
+    if kind not in QUANTIZATION_KINDS:
+        raise ValueError(f"Nepoznata kvantizacija: {kind} (dozvoljeno: {', '.join(QUANTIZATION_KINDS)})")
+
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    n, dimension = vectors.shape
+
+    if kind == "pq" and (n < PQ_MIN_TRAIN or dimension % pq_m != 0):
+        print(f"UPOZORENJE: PQ nije moguć ({n} vektora, d={dimension}, m={pq_m}) - koristim int8")
+        kind = "int8"
+
+    if kind == "none":
+        index = faiss.IndexFlatIP(dimension)
+    elif kind == "fp16":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+    elif kind == "int8":
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+    else:
+        index = faiss.IndexPQ(dimension, pq_m, 8, faiss.METRIC_INNER_PRODUCT)
+
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+def is_quantized(index: faiss.Index) -> bool:
+    """Da li index čuva aproksimirane vektore (treba re-scoring)."""
+    return not isinstance(index, faiss.IndexFlat)
+
+
+def index_nbytes(index: faiss.Index) -> int:
+    """Veličina serijalizovanog indeksa u bajtovima (≈ memorija u RAM-u)."""
+    return int(faiss.serialize_index(index).size)
+
+
+def _search(index: faiss.Index, query_vector: np.ndarray, n: int, params: faiss.SearchParameters = None):
+    """
+    index.search sa params. IndexPQ ne podržava IDSelector ("selector not supported"):
+    za njega se over-fetch-uje proporcionalno selektivnosti filtera (x2 rezerva) pa se
+    kandidati filtriraju bitmapom iz MetadataBitmaps.search_params (params.allowed_mask).
+    """
+    mask = getattr(params, "allowed_mask", None) if params is not None else None
+    if mask is None or not isinstance(index, faiss.IndexPQ):
+        return index.search(query_vector, n, params=params)
+
+    allowed = max(1, int(mask.sum()))
+    fetch = min(index.ntotal, -(-2 * n * index.ntotal // allowed))
+    scores, ids = index.search(query_vector, fetch)
+    keep = ids[0] >= 0
+    keep[keep] = mask[ids[0][keep]]
+    scores, ids = scores[0][keep][:n], ids[0][keep][:n]
+
+    out_scores = np.full((1, n), -np.inf, dtype='float32')
+    out_ids = np.full((1, n), -1, dtype='int64')
+    out_scores[0, :len(ids)] = scores
+    out_ids[0, :len(ids)] = ids
+    return out_scores, out_ids
+
+
+def search_with_rescore(
+    index: faiss.Index,
+    query_vector: np.ndarray,
+    k: int,
+    vectors: np.ndarray = None,
+    rescore_factor: int = 4,
+    params: faiss.SearchParameters = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pretraga sa opcionim tačnim re-scoring-om.
+
+    Kvantizovani index vraća shortlist od k * rescore_factor kandidata,
+    koji se zatim rangiraju tačnim float32 skalarnim proizvodom.
+    `vectors` može biti np.memmap - čitaju se samo redovi iz shortlist-e.
+    `params` (npr. IDSelector iz metadata filtera) važi i za shortlist.
+
+    Returns:
+        (scores, ids) u istom obliku kao faiss `index.search` (1, k)
+    """
+    query_vector = np.asarray(query_vector, dtype='float32').reshape(1, -1)
+
+    if vectors is None or not is_quantized(index):
+        return _search(index, query_vector, k, params)
+
+    shortlist = min(index.ntotal, max(k, k * rescore_factor))
+    _, candidate_ids = _search(index, query_vector, shortlist, params)
+    candidate_ids = candidate_ids[0][candidate_ids[0] >= 0]
+
+    # Tačni skorovi (memmap čita samo potrebne redove, sortirano za sekvencijalni pristup)
+    order = np.argsort(candidate_ids)
+    exact = np.asarray(vectors[candidate_ids[order]], dtype='float32') @ query_vector[0]
+    scores = np.empty_like(exact)
+    scores[order] = exact
+
+    top = np.argsort(-scores)[:k]
+    out_scores = np.full((1, k), -np.inf, dtype='float32')
+    out_ids = np.full((1, k), -1, dtype='int64')
+    out_scores[0, :len(top)] = scores[top]
+    out_ids[0, :len(top)] = candidate_ids[top]
+    return out_scores, out_ids
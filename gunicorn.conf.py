@@ -0,0 +1,46 @@
+"""
+Gunicorn konfiguracija za API (uvicorn worker-i).
+
+    gunicorn -c gunicorn.conf.py apps.api.main:app
+
+Sa GUNICORN_PRELOAD=true (podrazumijevano) master učitava aplikaciju, encoder i index
+prije fork-a, pa worker-i dijele model i index copy-on-write umjesto kopije po worker-u.
+Memorija worker-a: GET /memory (rss, pss, shared, private; uz DEBUG_ENDPOINTS=true).
+"""
+import gc
+import os
+
+# HF tokenizers pravi niti pri prvoj upotrebi - u master-u ih ne sme biti prije fork-a
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = 300
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+
+def when_ready(server):
+    """Master, posle učitavanja aplikacije a prije fork-a worker-a."""
+    if not preload_app:
+        return
+    from apps.api import main
+    if not main.USE_AZURE:
+        from apps.api.preload import preload
+        preload()
+    # Objekti iz master-a u permanentnu generaciju: GC u worker-ima ih ne obilazi
+    # (i ne prlja njihove stranice), pa ostaju dijeljeni
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from apps.api.preload import after_fork
+    threads = after_fork(workers)
+    server.log.info(f"Worker {worker.pid}: {threads} niti za torch/faiss")
+
+
+def post_worker_init(worker):
+    from apps.api.preload import memory_usage
+    usage = memory_usage()
+    worker.log.info(f"Worker {worker.pid} memorija (MB): " +
+                    ", ".join(f"{key} {value}" for key, value in usage.items()))
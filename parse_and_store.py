@@ -1,4 +1,5 @@
-"""Parsiraj PDF i sačuvaj lokalno."""
+"""Parsiraj PDF i sačuvaj lokalno (za cijeli direktorijum: python -m apps.ingest.ingest_dir <dir>)."""
+import hashlib
 import sys
 from pathlib import Path
 
@@ -7,11 +8,20 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from apps.ingest.parse_pdf import extract_pdf
 from apps.ingest.chunking import chunk
+from apps.ingest.doc_store import get_store
 from apps.ingest.local_storage import save_documents
 
+SOURCE = "pdf:SEPA_QnA"
+
+
+def chunk_id(page: int, seg: str) -> str:
+    """Id iz sadržaja (isti chunk -> isti id pri svakom pokretanju, kao push_to_search.content_id)."""
+    digest = hashlib.sha256(f"{SOURCE}|{page}|{seg}".encode("utf-8")).hexdigest()[:16]
+    return f"pdf_page_{page}_{digest}"
+
 
 def parse_pdf_and_store(pdf_path: str):
-    """Parsiraj PDF i sačuvaj u lokalni storage."""
+    """Parsiraj PDF i sačuvaj u lokalni storage (ponovno pokretanje zamjenjuje chunk-ove, ne duplira ih)."""
     print(f"Parsing PDF: {pdf_path}")
     
     docs = []
@@ -23,15 +33,18 @@ def parse_pdf_and_store(pdf_path: str):
         # Chunk tekst
         for seg in chunk(page["text"]):
             doc = {
-                "id": f"pdf_page_{page['page']}_{hash(seg) % 10000}",
+                "id": chunk_id(page["page"], seg),
                 "title": "SEPA Q&A",
                 "content": seg,
-                "source": "pdf:SEPA_QnA",
+                "source": SOURCE,
                 "page": page["page"]
             }
             docs.append(doc)
     
-    # Sačuvaj
+    # Ukloni chunk-ove prethodne verzije (i duplikate starih, nasumičnih id-eva), pa upsert
+    store = get_store()
+    stale = store.ids_by_source(SOURCE) - {doc["id"] for doc in docs}
+    store.delete(stale)
     save_documents(docs)
     
     print(f"\nDone! Parsed {len(docs)} chunks from PDF")
@@ -16,11 +16,11 @@ import time
 from apps.functions.local_scraper import scrape_cbcg
 
 
-def run_scraper():
+def run_scraper(full_sweep: bool = False):
     """Pokreni scraper i logiraj rezultat."""
-    print(f"\n[{datetime.now()}] Running daily scraper...")
+    print(f"\n[{datetime.now()}] Running {'full sweep' if full_sweep else 'daily'} scraper...")
     try:
-        count = scrape_cbcg()
+        count = scrape_cbcg(full_sweep=full_sweep)
         print(f"[{datetime.now()}] ✓ Scraping complete: {count} articles")
     except Exception as e:
         print(f"[{datetime.now()}] ✗ Scraping failed: {e}")
@@ -29,7 +29,7 @@ def run_scraper():
 def main():
     """Pokreni scheduler."""
     print("Starting CBCG scraper scheduler...")
-    print("Will run daily at 2 AM")
+    print("Will run daily at 2 AM (incremental), full sweep Sundays at 3 AM")
     
     scheduler = BackgroundScheduler()
     
@@ -42,6 +42,16 @@ def main():
         replace_existing=True
     )
     
+    # Nedeljom u 3:00 AM full sweep cijele arhive (backfill + izmijenjeni stari članci)
+    scheduler.add_job(
+        run_scraper,
+        trigger=CronTrigger(day_of_week='sun', hour=3, minute=0),
+        kwargs={"full_sweep": True},
+        id='weekly_cbcg_full_sweep',
+        name='Weekly CBCG.me full sweep',
+        replace_existing=True
+    )
+    
     # OPCIJONO: Pokreni i sada (za test)
     print("\nRunning initial scrape now...")
     run_scraper()
@@ -0,0 +1,25 @@
+"""
+Sačuvaj multilingual-e5-large kao lokalni artefakt (build/deploy korak, jednom po image-u).
+
+    python scripts/bake_encoder_model.py [--out data/models/multilingual-e5-large]
+
+API zatim učitava encoder iz ENCODER_MODEL_PATH u offline modu (HF_HUB_OFFLINE=1),
+bez preuzimanja ~2 GB sa Hugging Face hub-a pri startu svake nove replike.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from apps.ingest.encoders import ENCODER_MODEL_PATH, MODEL_NAME, save_model_artifact
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokalni artefakt e5 encodera")
+    parser.add_argument("--out", default=str(ENCODER_MODEL_PATH))
+    parser.add_argument("--model", default=MODEL_NAME)
+    args = parser.parse_args()
+
+    path = save_model_artifact(Path(args.out), args.model)
+    print(f"[OK] Encoder artefakt: {path} (ENCODER_MODEL_PATH={path})")
@@ -0,0 +1,74 @@
+"""
+Benchmark chunking-a: stari karakterni chunker vs token-aware chunk() na sve većim tekstovima.
+
+Tekst se pravi ponavljanjem stranica iz PDF-a (podrazumijevano data/SEPA_QnA.pdf);
+za linearno skaliranje vrijeme po MB treba da ostane približno konstantno.
+
+    python scripts/bench_chunking.py [--pdf data/SEPA_QnA.pdf] [--sizes 1,2,4,8]
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from apps.ingest.chunking import chunk
+from apps.ingest.embedding_batches import estimate_tokens
+
+DEFAULT_PDF = Path(__file__).parent.parent / "data" / "SEPA_QnA.pdf"
+
+
+def legacy_chunk(text: str, max_len: int = 1200, overlap: int = 150):
+    """Stari chunker (karakteri, overlap rep iz ponovljenog join-a)."""
+    sentences = re.split(r'(?<=[\.\!\?])\s+', text.strip())
+    buf = []
+    cur = 0
+    for s in sentences:
+        if cur + len(s) > max_len and buf:
+            yield " ".join(buf)
+            tail = (" ".join(buf))[-overlap:]
+            buf = [tail, s]
+            cur = len(tail) + len(s)
+        else:
+            buf.append(s)
+            cur += len(s)
+    if buf:
+        yield " ".join(buf)
+
+
+def load_text(pdf: Path) -> str:
+    if pdf.exists():
+        from apps.ingest.parse_pdf import extract_pdf
+        return "\n".join(page["text"] for page in extract_pdf(str(pdf)))
+    return "Centralna banka Crne Gore objavljuje podatke o platnom prometu. " * 2000
+
+
+def timed(fn, text):
+    start = time.perf_counter()
+    segments = list(fn(text))
+    return time.perf_counter() - start, segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf", default=str(DEFAULT_PDF))
+    parser.add_argument("--sizes", default="1,2,4,8,16", help="Višestruki osnovnog teksta")
+    args = parser.parse_args()
+
+    base = load_text(Path(args.pdf))
+    print(f"Osnovni tekst: {len(base) / 1024:.0f} KB")
+    print(f"{'x':>4}{'MB':>8}{'legacy s':>10}{'new s':>10}{'new s/MB':>10}{'segm.':>8}{'max tok':>9}")
+
+    for factor in (int(x) for x in args.sizes.split(",")):
+        text = "\n".join([base] * factor)
+        mb = len(text.encode("utf-8")) / 1024 / 1024
+        legacy_s, _ = timed(legacy_chunk, text)
+        new_s, segments = timed(chunk, text)
+        max_tokens = max(estimate_tokens(seg) for seg in segments)
+        print(f"{factor:>4}{mb:>8.2f}{legacy_s:>10.3f}{new_s:>10.3f}{new_s / mb:>10.3f}{len(segments):>8}{max_tokens:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark encoder backend-a: latencija jednog upita i throughput za dokumente,
+torch (SentenceTransformer) vs onnx (int8 ONNX Runtime), plus kosinusna
+sličnost embeddinga u odnosu na torch. Sa --workers upoređuje i build put
+(length bucketing + pool procesa, encode_passages_parallel) sa jednim procesom.
+
+    python scripts/bench_encoder.py --queries 50 --passages 256 [--workers 1,2,4]
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from apps.ingest.encoders import encode_passages_parallel, get_encoder
+
+SAMPLE_QUERIES = [
+    "kako da pošaljem pare u Njemačku",
+    "šta je SEPA",
+    "kad je osnovana centralna banka",
+    "koliko košta instant plaćanje",
+    "guvernerka Centralne banke",
+    "kamatne stope na kredite",
+]
+
+
+def load_passages(n: int):
+    """Tekstovi iz parsed_data.json (ili ponovljeni upiti ako baze nema)."""
+    try:
+        from apps.ingest.local_storage import load_documents
+        docs = load_documents()
+    except Exception:
+        docs = []
+    texts = [f"{d.get('title', '')}. {d.get('content', '')}" for d in docs[:n]]
+    while len(texts) < n:
+        texts.append(" ".join(SAMPLE_QUERIES) * 8)
+    return texts
+
+
+def bench(backend: str, queries, passages, batch_size: int):
+    encoder = get_encoder(backend)
+    encoder.encode(["query: warmup"])
+
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        encoder.encode([f"query: {q}"])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    encoder.encode([f"passage: {p}" for p in passages], batch_size=batch_size)
+    throughput = len(passages) / (time.perf_counter() - start)
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    return statistics.median(latencies), p95, throughput, encoder
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark torch vs onnx encodera")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--passages", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--backends", default="torch,onnx")
+    parser.add_argument("--workers", default="", help="Broj procesa za encode_passages_parallel, npr. 1,2,4")
+    args = parser.parse_args()
+
+    queries = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] for i in range(args.queries)]
+    passages = load_passages(args.passages)
+
+    print(f"{'backend':<8} {'p50 ms':>8} {'p95 ms':>8} {'passages/s':>11} {'min cos':>8}")
+    print("-" * 48)
+
+    reference = None
+    for backend in args.backends.split(","):
+        try:
+            p50, p95, throughput, encoder = bench(backend, queries, passages, args.batch_size)
+        except Exception as e:
+            print(f"{backend:<8} SKIP: {e}")
+            continue
+
+        check = encoder.encode([f"query: {q}" for q in SAMPLE_QUERIES])
+        if reference is None:
+            reference = check
+        min_cos = float(np.min(np.sum(reference * check, axis=1)))
+        print(f"{backend:<8} {p50:>8.1f} {p95:>8.1f} {throughput:>11.1f} {min_cos:>8.4f}")
+
+        for workers in (int(w) for w in args.workers.split(",") if w):
+            start = time.perf_counter()
+            encode_passages_parallel(passages, workers=workers, batch_size=args.batch_size, backend=backend)
+            print(f"{backend:<8} bucketed x{workers}: {len(passages) / (time.perf_counter() - start):.1f} passages/s")
+
+
+if __name__ == "__main__":
+    main()
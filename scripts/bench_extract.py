@@ -0,0 +1,92 @@
+"""
+Benchmark ekstrakcije članaka: stari regex + selectolax parser vs extract_article (jedan prolaz).
+
+Radi nad sačuvanim HTML stranicama (podrazumijevano tests/fixtures/html) i
+prijavljuje vrijeme po stranici i koliko stranica ima pronađen datum objave.
+
+    python scripts/bench_extract.py [--dir data/html] [--repeat 200]
+"""
+import argparse
+import re
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from selectolax.parser import HTMLParser
+
+from apps.functions.extract import extract_article
+
+DEFAULT_DIR = Path(__file__).parent.parent / "tests" / "fixtures" / "html"
+
+
+def legacy_parse(content: str):
+    """Stara logika iz local_scraper (4 DOTALL regexa + selectolax + regex fallback)."""
+    title = "CBCG Saopštenje"
+    for pattern in [
+        r'<h1[^>]*>(.*?)</h1>',
+        r'<title>(.*?)</title>',
+        r'<h2[^>]*class="[^"]*title[^"]*"[^>]*>(.*?)</h2>',
+        r'class="entry-title"[^>]*>(.*?)</',
+    ]:
+        match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
+        if match:
+            title = re.sub(r'<[^>]+>', '', match.group(1)).strip()
+            if len(title) > 10:
+                break
+
+    body = ""
+    for div in HTMLParser(content).css('div.page-text'):
+        body = div.text()
+        if len(body) > 100:
+            break
+    if not body or len(body) < 100:
+        for pattern in [r'<article[^>]*>(.*?)</article>', r'<div[^>]*class="[^"]*content[^"]*"[^>]*>(.*?)</div>']:
+            matches = re.findall(pattern, content, re.DOTALL | re.IGNORECASE)
+            if matches:
+                body = max(matches, key=len)
+                break
+    if body:
+        body = re.sub(r'(Kontakti|Mapa sajta|Najčešće postavljena pitanja|Home|O nama)', '', body, flags=re.IGNORECASE)
+        body = ' '.join(body.split())[:8000]
+
+    # Stari kod je ovdje čitao nedefinisan `html_content` -> datum je uvijek bio None (now)
+    published_at = None
+    return title, body, published_at
+
+
+def bench(fn, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            fn(html)
+    return (time.perf_counter() - start) / (repeat * len(pages)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=str(DEFAULT_DIR), help="Direktorijum sa *.html stranicama")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    pages = [p.read_text(encoding="utf-8", errors="replace") for p in sorted(Path(args.dir).glob("*.html"))]
+    if not pages:
+        print(f"Nema HTML fajlova u {args.dir}")
+        return
+    print(f"{len(pages)} stranica, {sum(len(p) for p in pages) / len(pages) / 1024:.1f} KB prosječno")
+
+    legacy_ms = bench(legacy_parse, pages, args.repeat)
+    new_ms = bench(extract_article, pages, args.repeat)
+    legacy_dates = sum(1 for html in pages if legacy_parse(html)[2])
+    new_dates = sum(1 for html in pages if extract_article(html)["published_at"])
+
+    print(f"{'parser':<16}{'ms/stranica':>12}{'datum':>10}")
+    print(f"{'legacy (regex)':<16}{legacy_ms:>12.3f}{legacy_dates:>7}/{len(pages)}")
+    print(f"{'extract_article':<16}{new_ms:>12.3f}{new_dates:>7}/{len(pages)}")
+    print(f"Ubrzanje: {legacy_ms / new_ms:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark kvantizacije multilingual indeksa: veličina, recall@k i latencija
+za none / fp16 / int8 / pq, sa i bez tačnog re-scoring-a.
+
+"total MB" je ukupan otisak generacije: index + re-scoring sidecar (VECTOR_RESCORE_DTYPE,
+auto po vrsti indeksa) + metadata.pkl aktivnog indeksa (0 ako index još ne postoji).
+
+Koristi vektore iz postojećeg float32 indeksa (data/vector_index_multilingual.faiss),
+a ako ga nema - sintetičke klasterisane vektore iste dimenzije.
+
+    python scripts/bench_quantization.py --queries 200 --k 8
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import faiss
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from apps.ingest import local_storage_vector_multilingual as store
+from apps.ingest.quantization import QUANTIZATION_KINDS, build_index, index_nbytes, search_with_rescore
+
+INDEX_FILE = Path(__file__).parent.parent / "data" / "vector_index_multilingual.faiss"
+
+
+def load_vectors(n_synthetic: int, dimension: int) -> np.ndarray:
+    """Vektori iz postojećeg flat indeksa ili sintetički (klasteri ~ teme članaka)."""
+    if INDEX_FILE.exists():
+        index = faiss.read_index(str(INDEX_FILE))
+        if isinstance(index, faiss.IndexFlat):
+            print(f"Vektori iz {INDEX_FILE} ({index.ntotal} dokumenata)")
+            return index.reconstruct_n(0, index.ntotal)
+
+    print(f"Sintetički vektori: {n_synthetic} x {dimension}")
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(64, dimension)).astype('float32')
+    labels = rng.integers(0, len(centers), size=n_synthetic)
+    vectors = centers[labels] + 0.6 * rng.normal(size=(n_synthetic, dimension)).astype('float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def metadata_nbytes() -> int:
+    """Veličina metadata pickle-a aktivnog indeksa (docs + passages ne zavise od kvantizacije)."""
+    files = store.index_files()
+    if files is None or not files[2].exists():
+        return 0
+    return files[2].stat().st_size
+
+
+def sidecar_nbytes(vectors: np.ndarray, kind: str) -> int:
+    """Veličina re-scoring sidecar-a koji bi build napravio za ovu kvantizaciju."""
+    dtype = store.RESCORE_DTYPES[store.rescore_dtype(kind)]
+    return vectors.size * np.dtype(dtype).itemsize if dtype else 0
+
+
+def make_queries(vectors: np.ndarray, n: int) -> np.ndarray:
+    """Upiti = dokumenti sa šumom (približno parafrazirano pitanje)."""
+    rng = np.random.default_rng(7)
+    picks = rng.choice(len(vectors), size=min(n, len(vectors)), replace=False)
+    queries = vectors[picks] + 0.05 * rng.normal(size=(len(picks), vectors.shape[1])).astype('float32')
+    queries = np.ascontiguousarray(queries, dtype='float32')
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark kvantizacije FAISS indeksa")
+    parser.add_argument("--docs", type=int, default=5000, help="Broj sintetičkih dokumenata")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=8)
+    parser.add_argument("--rescore-factor", type=int, default=4)
+    parser.add_argument("--pq-m", type=int, default=64)
+    args = parser.parse_args()
+
+    vectors = load_vectors(args.docs, args.dim)
+    queries = make_queries(vectors, args.queries)
+
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+    float_bytes = index_nbytes(exact)
+    meta_bytes = metadata_nbytes()
+    print(f"Metadata: {meta_bytes / 1024 / 1024:.2f} MB, VECTOR_RESCORE_DTYPE={store.RESCORE_DTYPE}")
+
+    print(f"\n{'kind':<6} {'size MB':>8} {'ratio':>6} {'sidecar':>8} {'total MB':>9} "
+          f"{'recall@k':>9} {'+rescore':>9} {'ms/q':>7} {'ms/q+rs':>8}")
+    print("-" * 80)
+
+    for kind in QUANTIZATION_KINDS:
+        index = build_index(vectors, kind=kind, pq_m=args.pq_m)
+        size = index_nbytes(index)
+        sidecar = sidecar_nbytes(vectors, kind)
+        total = size + sidecar + meta_bytes
+
+        results = {}
+        for rescore in (False, True):
+            hits = 0
+            start = time.perf_counter()
+            for qi, query in enumerate(queries):
+                _, ids = search_with_rescore(
+                    index, query, args.k,
+                    vectors=vectors if rescore else None,
+                    rescore_factor=args.rescore_factor
+                )
+                hits += len(set(ids[0].tolist()) & set(truth[qi].tolist()))
+            elapsed = (time.perf_counter() - start) * 1000 / len(queries)
+            results[rescore] = (hits / (len(queries) * args.k), elapsed)
+
+        print(f"{kind:<6} {size / 1024 / 1024:>8.2f} {float_bytes / size:>5.1f}x "
+              f"{sidecar / 1024 / 1024:>8.2f} {total / 1024 / 1024:>9.2f} "
+              f"{results[False][0]:>9.3f} {results[True][0]:>9.3f} "
+              f"{results[False][1]:>7.3f} {results[True][1]:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark reranking-a: retrieval k=8 bez rerankera vs top 3 posle cross-encodera.
+
+Mjeri latenciju retrieval-a (uključujući reranker), broj tokena konteksta koji
+ide u gpt-4o i, sa --llm, end-to-end latenciju synthesis poziva.
+
+    python scripts/bench_rerank.py [--llm] [--questions tests/faq_golden_sample.csv]
+"""
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+DEFAULT_QUESTIONS = [
+    "Šta je SEPA?",
+    "Kako da pošaljem pare u Njemačku?",
+    "Koliko traje SEPA transfer?",
+    "Šta je novo u Centralnoj banci?",
+    "Kada je osnovana Centralna banka Crne Gore?",
+]
+
+
+def load_questions(path: str):
+    if path and Path(path).exists():
+        with open(path, encoding="utf-8") as f:
+            return [row["question"] for row in csv.DictReader(f)]
+    return DEFAULT_QUESTIONS
+
+
+def run(questions, rerank: bool, with_llm: bool):
+    from apps.api import reranker
+    from apps.api.retrieval_mock import retrieve
+    from apps.api.rag_pipeline import build_context_blocks, synthesize_answer
+    from apps.ingest.embedding_batches import estimate_tokens
+
+    reranker.RERANK_ENABLED = rerank
+
+    retrieval_ms, total_ms, tokens, n_docs = [], [], [], []
+    for q in questions:
+        start = time.perf_counter()
+        ctx = retrieve(q, k=8)
+        retrieval_ms.append((time.perf_counter() - start) * 1000)
+
+        tokens.append(sum(estimate_tokens(block) for block in build_context_blocks(ctx)))
+        n_docs.append(len(ctx))
+
+        if with_llm:
+            synthesize_answer(q, ctx)
+        total_ms.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "docs": statistics.mean(n_docs),
+        "retrieval_ms": statistics.median(retrieval_ms),
+        "total_ms": statistics.median(total_ms),
+        "ctx_tokens": statistics.mean(tokens),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-encoder rerankera")
+    parser.add_argument("--questions", default="tests/faq_golden_sample.csv")
+    parser.add_argument("--llm", action="store_true", help="Uključi gpt-4o synthesis (troši API)")
+    args = parser.parse_args()
+
+    if not args.llm:
+        # Bez --llm synthesis se ne poziva, ali rag_pipeline pravi klijent pri importu
+        os.environ.setdefault("OPENAI_API_KEY", "bench-no-llm")
+
+    questions = load_questions(args.questions)
+
+    # Zagrijavanje (učitavanje modela i indeksa) da ne ulazi u mjerenje
+    run(questions[:1], rerank=True, with_llm=False)
+
+    baseline = run(questions, rerank=False, with_llm=args.llm)
+    reranked = run(questions, rerank=True, with_llm=args.llm)
+
+    print(f"\n{len(questions)} pitanja" + (" (sa gpt-4o synthesis)" if args.llm else ""))
+    print(f"{'mode':<14} {'docs':>5} {'retrieval ms':>13} {'total ms':>9} {'ctx tokens':>11}")
+    print("-" * 56)
+    for name, r in (("k=8", baseline), ("rerank top3", reranked)):
+        print(f"{name:<14} {r['docs']:>5.1f} {r['retrieval_ms']:>13.1f} {r['total_ms']:>9.1f} {r['ctx_tokens']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
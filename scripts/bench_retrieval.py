@@ -0,0 +1,134 @@
+"""
+Benchmark Azure retrieval-a protiv lokalnog stand-in Search servisa sa zadatim kašnjenjem:
+stari tok (sync SearchClient, FAQ pa NEWS) vs AsyncSearchRetriever (oba indeksa paralelno).
+
+Sa --emulator Azure put ide protiv search emulatora (apps/api/search_emulator.py) napunjenog
+člancima iz lokalnog document store-a i poredi se sa lokalnom keyword pretragom.
+
+    python scripts/bench_retrieval.py [--delay-ms 80] [--queries 30] [--emulator]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from azure.core.credentials import AzureKeyCredential
+from azure.search.documents import SearchClient
+
+from apps.api.retrieval import AsyncSearchRetriever
+
+QUERIES = ["šta je SEPA", "instant plaćanja", "kamatne stope", "SEPA direktno zaduženje"]
+
+
+def make_handler(delay: float):
+    class DelayedSearchHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(delay)
+            data = json.dumps({"value": [
+                {"@search.score": 1.0, "content": "SEPA", "body": "SEPA", "title": "SEPA", "page": 1}
+            ]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return DelayedSearchHandler
+
+
+def summary(name: str, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"{name:<24} p50 {statistics.median(latencies) * 1000:>7.1f} ms   p95 {p95 * 1000:>7.1f} ms")
+
+
+def bench_emulator(queries):
+    """AsyncSearchRetriever -> emulator (ASGI, bez mreže) vs local_storage keyword pretraga nad istim člancima."""
+    import httpx
+
+    from apps.api.search_emulator import EmulatedIndex, create_app, seed_news
+    from apps.ingest.local_storage import search_documents as keyword_search
+
+    app = create_app()
+    app.state.indexes["faq_sepa"] = EmulatedIndex({"name": "faq_sepa", "fields": []})
+    print(f"Emulator: news_cbcg sa {seed_news(app)} članaka")
+
+    async def run_async():
+        retriever = AsyncSearchRetriever("http://emulator", "test", transport=httpx.ASGITransport(app=app))
+        latencies = []
+        for q in queries:
+            start = time.perf_counter()
+            await retriever.retrieve(q, k=8)
+            latencies.append(time.perf_counter() - start)
+        await retriever.aclose()
+        return latencies
+
+    local = []
+    for q in queries:
+        start = time.perf_counter()
+        keyword_search(q, k=8)
+        local.append(time.perf_counter() - start)
+
+    summary("emulator BM25 (Azure put)", asyncio.run(run_async()))
+    summary("lokalna keyword pretraga", local)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay-ms", type=float, default=80)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--emulator", action="store_true", help="Azure put protiv emulatora vs lokalna pretraga")
+    args = parser.parse_args()
+
+    if args.emulator:
+        bench_emulator([QUERIES[i % len(QUERIES)] for i in range(args.queries)])
+        return
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.delay_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_port}"
+    queries = [QUERIES[i % len(QUERIES)] for i in range(args.queries)]
+
+    faq = SearchClient(endpoint, "faq_sepa", AzureKeyCredential("test"))
+    news = SearchClient(endpoint, "news_cbcg", AzureKeyCredential("test"))
+    sequential = []
+    for q in queries:
+        start = time.perf_counter()
+        list(faq.search(q, top=8))
+        list(news.search(q, top=4))
+        sequential.append(time.perf_counter() - start)
+
+    async def run_async():
+        retriever = AsyncSearchRetriever(endpoint, "test", embed_fn=lambda q: [0.0] * 3072)
+        latencies = []
+        for q in queries:
+            start = time.perf_counter()
+            await retriever.retrieve(q, k=8)
+            latencies.append(time.perf_counter() - start)
+        await retriever.aclose()
+        return latencies
+
+    concurrent = asyncio.run(run_async())
+    server.shutdown()
+
+    print(f"Stand-in kašnjenje po upitu: {args.delay_ms:.0f} ms, {args.queries} upita")
+    summary("sync FAQ -> NEWS", sequential)
+    summary("async FAQ || NEWS", concurrent)
+
+
+if __name__ == "__main__":
+    main()
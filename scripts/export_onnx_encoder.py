@@ -0,0 +1,24 @@
+"""
+Eksport multilingual-e5-large u ONNX + dinamička int8 kvantizacija.
+
+    python scripts/export_onnx_encoder.py [--out data/onnx/multilingual-e5-large] [--no-quantize]
+
+Posle eksporta API koristi ONNX backend sa ENCODER_BACKEND=onnx.
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from apps.ingest.encoders import ONNX_MODEL_DIR, export_onnx
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eksport e5 encodera u ONNX")
+    parser.add_argument("--out", default=str(ONNX_MODEL_DIR))
+    parser.add_argument("--no-quantize", action="store_true")
+    args = parser.parse_args()
+
+    path = export_onnx(Path(args.out), quantize=not args.no_quantize)
+    print(f"[OK] ONNX model: {path}")
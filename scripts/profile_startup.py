@@ -0,0 +1,72 @@
+"""
+Profil hladnog starta API-ja: gdje odlazi vrijeme pri `import apps.api.main` (python -X importtime,
+u svježem procesu) i, sa --warmup, koliko traju koraci pozadinskog warmup-a.
+
+    python scripts/profile_startup.py [--top 15] [--module apps.api.main] [--warmup]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def import_profile(module: str):
+    """
+    (wall sekunde, {modul: (self µs, kumulativno µs)}) za import modula u novom interpreteru.
+    """
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    env = {**os.environ, "STARTUP_WARMUP": "false"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if self_us.isdigit():
+            modules[name] = (int(self_us), int(cumulative_us))
+    return float(proc.stdout.strip().splitlines()[-1]), modules
+
+
+def by_package(modules):
+    """Self vrijeme sabrano po top-level paketu (openai, fastapi, numpy, ...)."""
+    totals = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        totals[name.split(".")[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="apps.api.main")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--warmup", action="store_true", help="izmjeri i korake warmup-a (encoder, index, upit)")
+    args = parser.parse_args()
+
+    wall, modules = import_profile(args.module)
+    print(f"import {args.module}: {wall:.2f}s ({len(modules)} modula)\n")
+    print(f"{'paket':<28} {'self ms':>9}")
+    for package, self_us in by_package(modules)[:args.top]:
+        print(f"{package:<28} {self_us / 1000:>9.1f}")
+
+    heavy = [name for name in ("openai", "numpy", "faiss", "torch", "transformers", "sentence_transformers")
+             if name in modules]
+    print(f"\nTeški paketi na putu importa: {', '.join(heavy) or 'nijedan'}")
+
+    if args.warmup:
+        from apps.api.preload import warmup
+        start = time.perf_counter()
+        warmup(local=True)
+        print(f"Warmup ukupno: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
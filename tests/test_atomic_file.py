@@ -0,0 +1,23 @@
+"""
+Test atomičnog upisa: prekinut upis ne ostavlja polovičan ciljni fajl ni tmp fajl.
+"""
+import json
+
+import pytest
+
+from apps.functions.atomic_file import atomic_write
+
+
+def test_atomic_write_replaces_or_keeps_target(tmp_path):
+    target = tmp_path / "state" / "frontier.json"
+    with atomic_write(target) as f:
+        json.dump({"a": 1}, f)
+    assert json.loads(target.read_text(encoding='utf-8')) == {"a": 1}
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(target) as f:
+            f.write('{"a": ')
+            raise RuntimeError("prekid")
+
+    assert json.loads(target.read_text(encoding='utf-8')) == {"a": 1}
+    assert list(target.parent.iterdir()) == [target]
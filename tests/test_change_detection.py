@@ -0,0 +1,50 @@
+"""
+Test detekcije izmjena: stabilni id-evi iz URL-a, hash sadržaja i selektivni re-embedding.
+"""
+import numpy as np
+
+from apps.functions.extract import doc_id_for_url
+from apps.ingest import local_storage_vector_multilingual as store
+from apps.ingest.doc_store import content_hash
+
+
+def test_stable_id_and_content_hash():
+    """Isti URL -> isti id; izmjena sadržaja mijenja hash."""
+    url = "https://www.cbcg.me/me/javnost-rada/aktuelno/saopstenja/clanak-1"
+    doc = {"id": doc_id_for_url(url), "title": "Saopštenje", "content": "Kamatna stopa je 3%."}
+    corrected = {**doc, "content": "Kamatna stopa je 3,5%."}
+
+    assert doc_id_for_url(url) == doc["id"]
+    assert content_hash(doc) != content_hash(corrected)
+
+
+def test_embedding_cache_reembeds_only_changed(tmp_path, monkeypatch):
+    """Drugi build enkodira samo izmijenjen passage."""
+    encoded = []
+
+    def fake_encode(texts, **kwargs):
+        encoded.extend(texts)
+        return np.ones((len(texts), 4), dtype="float32")
+
+    monkeypatch.setattr(store, "EMBEDDING_CACHE_FILE", tmp_path / "cache.pkl")
+    monkeypatch.setattr(store, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(store, "encode_passages_parallel", fake_encode)
+
+    first = store.embed_passages_cached(["a", "b", "c"])
+    assert first.shape == (3, 4) and len(encoded) == 3
+
+    encoded.clear()
+    store.embed_passages_cached(["a", "b izmijenjen", "c"])
+    assert encoded == ["b izmijenjen"]
+
+
+def test_cache_key_depends_on_backend_not_quantization(monkeypatch):
+    """Drugi encoder backend ne pogađa stari embedding; promjena kvantizacije zadržava cache."""
+    monkeypatch.setattr(store.encoders, "ENCODER_BACKEND", "torch")
+    monkeypatch.setattr(store, "QUANTIZATION", "none")
+    torch_key = store.cache_key("Kamatna stopa")
+    monkeypatch.setattr(store, "QUANTIZATION", "int8")
+    assert store.cache_key("Kamatna stopa") == torch_key
+
+    monkeypatch.setattr(store.encoders, "ENCODER_BACKEND", "onnx")
+    assert store.cache_key("Kamatna stopa") != torch_key
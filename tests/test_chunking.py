@@ -0,0 +1,41 @@
+"""
+Test token-aware chunker-a (rečenični overlap, limit tokena, ništa ne nestaje).
+"""
+from apps.ingest.chunking import chunk
+
+
+def words(text):
+    return len(text.split())
+
+
+SENTENCES = [f"Rečenica broj {i} govori o platnom prometu i SEPA transferima." for i in range(40)]
+TEXT = " ".join(SENTENCES)
+
+
+def test_segments_respect_token_limit_and_cover_text():
+    """Svaki segment je ispod limita, a svaka rečenica se pojavljuje u nekom segmentu."""
+    segments = list(chunk(TEXT, max_tokens=60, overlap_tokens=15, count_tokens=words))
+
+    assert len(segments) > 1
+    assert all(words(seg) <= 60 for seg in segments)
+    assert all(any(s in seg for seg in segments) for s in SENTENCES)
+
+
+def test_overlap_is_whole_sentences():
+    """Segment počinje cijelom rečenicom ponovljenom sa kraja prethodnog segmenta."""
+    segments = list(chunk(TEXT, max_tokens=60, overlap_tokens=15, count_tokens=words))
+
+    for prev, cur in zip(segments, segments[1:]):
+        assert cur.startswith("Rečenica broj")
+        first_sentence = cur.split(". ")[0] + "."
+        assert prev.endswith(first_sentence)
+
+
+def test_long_sentence_is_split_by_words():
+    """Rečenica duža od limita dijeli se po riječima; kratak tekst ostaje jedan segment."""
+    long_sentence = " ".join(f"riječ{i}" for i in range(25))
+    segments = list(chunk(long_sentence, max_tokens=10, overlap_tokens=0, count_tokens=words))
+
+    assert [words(seg) for seg in segments] == [10, 10, 5]
+    assert list(chunk("Kratak tekst.")) == ["Kratak tekst."]
+    assert list(chunk("")) == []
@@ -0,0 +1,116 @@
+"""
+Test asinhronog crawlera (token bucket po hostu, paginacija i članci preko MockTransport-a).
+"""
+import asyncio
+import time
+
+import httpx
+
+from apps.functions.crawler import AsyncCrawler
+from apps.functions.local_scraper import scrape_section
+
+BASE = "https://www.cbcg.me/me/javnost-rada/aktuelno/saopstenja"
+ARTICLE_BODY = "Centralna banka Crne Gore saopštava da je platni sistem stabilan. " * 5
+
+
+def fake_site(request: httpx.Request) -> httpx.Response:
+    url = str(request.url)
+    if "page=" in url:
+        # Obje stranice listinga vraćaju iste linkove -> paginacija staje na 2. stranici
+        links = "".join(f'<a href="/me/javnost-rada/aktuelno/saopstenja/clanak-{i}">x</a>' for i in range(5))
+        return httpx.Response(200, text=f"<html><body>{links}</body></html>")
+    return httpx.Response(
+        200,
+        text=f"<html><h1>Saopštenje broj {url[-1]} za javnost</h1><div class='page-text'>{ARTICLE_BODY}</div></html>"
+    )
+
+
+def test_scrape_section_fetches_all_articles():
+    """Sekcija vraća sve članke i statistiku po sekciji."""
+    async def run():
+        async with AsyncCrawler(rate_per_host=1000, burst=100, transport=httpx.MockTransport(fake_site)) as crawler:
+            return await scrape_section(BASE, crawler)
+
+    docs, stats = asyncio.run(run())
+
+    assert len(docs) == 5
+    assert stats["pages"] == 2 and stats["articles"] == 5 and stats["saved"] == 5
+    assert all(doc["id"].startswith("cbcg_") for doc in docs)
+
+
+def test_rate_limit_per_host():
+    """Token bucket ograničava broj zahtjeva u sekundi po hostu."""
+    async def run():
+        async with AsyncCrawler(rate_per_host=40, burst=1, transport=httpx.MockTransport(fake_site)) as crawler:
+            start = time.perf_counter()
+            await asyncio.gather(*(crawler.get(f"{BASE}/clanak-{i}") for i in range(9)))
+            return time.perf_counter() - start, crawler.requests
+
+    elapsed, requests = asyncio.run(run())
+
+    assert requests == 9
+    assert elapsed >= 8 / 40 * 0.9
+
+
+def test_conditional_fetch_skips_unchanged_articles(tmp_path):
+    """Drugi run šalje If-None-Match; 304 preskače parsiranje poznatih članaka."""
+    from apps.functions.fetch_cache import FetchCache
+
+    def site_with_etag(request: httpx.Request) -> httpx.Response:
+        if "page=" in str(request.url):
+            return fake_site(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        r = fake_site(request)
+        return httpx.Response(200, text=r.text, headers={"ETag": '"v1"'})
+
+    async def run(cache, known_urls):
+        async with AsyncCrawler(rate_per_host=1000, burst=100, transport=httpx.MockTransport(site_with_etag)) as crawler:
+            return await scrape_section(BASE, crawler, cache, known_urls)
+
+    cache = FetchCache(tmp_path / "fetch_cache.json")
+    docs, first = asyncio.run(run(cache, frozenset()))
+    cache.save()
+
+    cache = FetchCache(tmp_path / "fetch_cache.json")
+    again, second = asyncio.run(run(cache, frozenset(doc["url"] for doc in docs)))
+
+    assert first["saved"] == 5 and first["unchanged"] == 0
+    assert second["saved"] == 0 and second["unchanged"] == 5
+    assert second["bytes"] < first["bytes"]
+
+
+def test_incremental_crawl_stops_at_known_page(tmp_path):
+    """Inkrementalni crawl staje na prvoj stranici sa samo poznatim URL-ovima i preuzima samo nove članke."""
+    from apps.functions.frontier import Frontier
+
+    requested = []
+
+    def paged_site(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        requested.append(url)
+        if "page=" in url:
+            # Stranica N sadrži članke 10*N .. 10*N+4 (stranica 1 su najnoviji)
+            page = int(url.split("page=")[1])
+            links = "".join(
+                f'<a href="/me/javnost-rada/aktuelno/saopstenja/clanak-{page * 10 + i}">x</a>' for i in range(5)
+            )
+            return httpx.Response(200, text=f"<html><body>{links}</body></html>")
+        return httpx.Response(
+            200,
+            text=f"<html><h1>Saopštenje broj {url[-2:]} za javnost</h1><div class='page-text'>{ARTICLE_BODY}</div></html>"
+        )
+
+    frontier = Frontier(tmp_path / "frontier.json")
+    frontier.add(BASE, [f"https://www.cbcg.me/me/javnost-rada/aktuelno/saopstenja/clanak-{20 + i}" for i in range(5)])
+
+    async def run():
+        async with AsyncCrawler(rate_per_host=1000, burst=100, transport=httpx.MockTransport(paged_site)) as crawler:
+            return await scrape_section(BASE, crawler, frontier=frontier, full_sweep=False)
+
+    docs, stats = asyncio.run(run())
+
+    assert stats["pages"] == 2
+    assert not any("page=3" in url for url in requested)
+    assert len(docs) == 5
+    assert len(frontier.known(BASE)) == 10
@@ -0,0 +1,66 @@
+"""
+Test SQLite document store-a (migracija iz JSON-a, upsert po id-u, čitanje tokom upisa).
+"""
+import json
+import sqlite3
+
+from apps.ingest.doc_store import DocStore
+
+
+def make_doc(i, content="Sadržaj"):
+    return {"id": f"cbcg_{i}", "title": f"Naslov {i}", "content": content, "url": f"https://www.cbcg.me/me/{i}"}
+
+
+def test_migration_and_upsert(tmp_path):
+    """Jednokratna migracija iz parsed_data.json, upsert zamjenjuje samo ključane dokumente."""
+    legacy = tmp_path / "parsed_data.json"
+    legacy.write_text(json.dumps([make_doc(i) for i in range(3)]), encoding="utf-8")
+
+    store = DocStore(tmp_path / "documents.db", legacy_json=legacy)
+    assert store.count() == 3
+
+    store.upsert([make_doc(1, content="Izmijenjen sadržaj"), make_doc(3)])
+    docs = store.load_all()
+
+    assert [doc["id"] for doc in docs] == ["cbcg_0", "cbcg_1", "cbcg_2", "cbcg_3"]
+    assert store.get("cbcg_1")["content"] == "Izmijenjen sadržaj"
+
+    # Ponovno otvaranje ne migrira ponovo (JSON se ignoriše posle prve migracije)
+    legacy.write_text(json.dumps([make_doc(9)]), encoding="utf-8")
+    assert DocStore(tmp_path / "documents.db", legacy_json=legacy).count() == 4
+
+
+def test_readers_see_committed_snapshot_during_write(tmp_path):
+    """WAL: čitalac vidi poslednji commit dok je transakcija upisa otvorena."""
+    store = DocStore(tmp_path / "documents.db", legacy_json=None)
+    store.upsert([make_doc(0)])
+
+    writer = sqlite3.connect(tmp_path / "documents.db")
+    writer.execute("BEGIN IMMEDIATE")
+    writer.execute("DELETE FROM documents")
+
+    assert [doc["id"] for doc in store.iter_documents()] == ["cbcg_0"]
+
+    writer.commit()
+    writer.close()
+    assert store.count() == 0
+
+
+def test_parse_and_store_rerun_replaces_chunks(tmp_path, monkeypatch):
+    """Ponovno parsiranje PDF-a daje iste id-eve; stari (nasumični) id-evi izvora se brišu."""
+    import parse_and_store
+    from apps.ingest import local_storage
+
+    store = DocStore(tmp_path / "documents.db", legacy_json=None)
+    store.upsert([{"id": "pdf_page_1_1234", "title": "SEPA Q&A", "content": "stari", "source": "pdf:SEPA_QnA"},
+                  make_doc(0)])
+    monkeypatch.setattr(parse_and_store, "get_store", lambda: store)
+    monkeypatch.setattr(local_storage, "get_store", lambda: store)
+    monkeypatch.setattr(parse_and_store, "extract_pdf",
+                        lambda path: [{"page": 1, "text": "SEPA pitanje."}, {"page": 2, "text": "SEPA odgovor."}])
+
+    first = parse_and_store.parse_pdf_and_store("sepa.pdf")
+    parse_and_store.parse_pdf_and_store("sepa.pdf")
+
+    assert store.count() == len(first) + 1
+    assert store.ids_by_source("pdf:SEPA_QnA") == {doc["id"] for doc in first}
@@ -0,0 +1,65 @@
+"""
+Test batch embedding helpera (pakovanje, backoff, redoslijed rezultata).
+"""
+import threading
+
+from apps.ingest.embedding_batches import (
+    pack_batches, call_with_backoff, embed_in_batches, estimate_tokens
+)
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+
+def test_pack_batches_respects_limits():
+    """Batch-evi ne prelaze broj inputa ni token budžet."""
+    texts = ["rijec " * 50] * 25
+    per_text = estimate_tokens(texts[0])
+    batches = pack_batches(texts, max_inputs=10, max_tokens=per_text * 4)
+
+    assert sorted(i for b in batches for i in b) == list(range(25))
+    assert all(len(b) <= 4 for b in batches)
+
+
+def test_call_with_backoff_retries_rate_limit():
+    """Rate limit greška se ponavlja, ostale greške ne."""
+    calls = []
+    sleeps = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise FakeRateLimitError("429")
+        return "ok"
+
+    assert call_with_backoff(flaky, sleep=sleeps.append) == "ok"
+    assert len(calls) == 3 and len(sleeps) == 2
+
+    def broken():
+        raise ValueError("bad input")
+
+    try:
+        call_with_backoff(broken, sleep=sleeps.append)
+        assert False, "ValueError se ne smije ponavljati"
+    except ValueError:
+        pass
+
+
+def test_embed_in_batches_keeps_order_and_reports_batches():
+    """Rezultati su istim redom kao ulaz, callback dobija svaki batch."""
+    texts = [f"tekst {i}" for i in range(57)]
+    seen = []
+    lock = threading.Lock()
+
+    def fake_embed(batch):
+        return [[float(t.split()[1])] for t in batch]
+
+    def on_batch_done(indices, vectors):
+        with lock:
+            seen.extend(indices)
+
+    vectors = embed_in_batches(texts, fake_embed, workers=4, on_batch_done=on_batch_done, max_inputs=8)
+
+    assert [v[0] for v in vectors] == [float(i) for i in range(57)]
+    assert sorted(seen) == list(range(57))
@@ -0,0 +1,138 @@
+"""
+Test kompatibilnosti encoder backend-a sa postojećim (torch) indeksom.
+"""
+import numpy as np
+import pytest
+
+from apps.ingest.encoders import (
+    ONNX_MODEL_DIR, ONNX_MODEL_FILE, encode_passages_parallel, length_buckets, mean_pool
+)
+
+# Minimalna kosinusna sličnost ONNX int8 vs torch embeddinga
+ONNX_COSINE_TOLERANCE = 0.98
+
+SAMPLE_TEXTS = [
+    "query: kako da pošaljem pare u Njemačku",
+    "query: šta je SEPA",
+    "passage: Crna Gora je postala operativni dio SEPA zone 7. oktobra 2025. godine.",
+    "passage: Centralna banka Crne Gore osnovana je 11. marta 2001. godine.",
+]
+
+
+def test_mean_pool_ignores_padding():
+    """Padding tokeni ne utiču na embedding, rezultat je normalizovan."""
+    hidden = np.array([[[1.0, 0.0], [3.0, 0.0], [100.0, 100.0]]], dtype=np.float32)
+    mask = np.array([[1, 1, 0]])
+    pooled = mean_pool(hidden, mask)
+
+    np.testing.assert_allclose(pooled, [[1.0, 0.0]], atol=1e-6)
+
+
+class LengthEncoder:
+    """Lažni encoder: vektor = [dužina teksta, 1] (provjera redosleda rezultata)."""
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        return np.array([[len(text), 1.0] for text in texts], dtype=np.float32)
+
+
+def test_length_buckets_group_similar_lengths():
+    """Batch-evi su sortirani po dužini; kratki tekstovi idu u veće batch-eve."""
+    texts = ["kratko"] * 40 + ["dugačak tekst članka " * 60] * 10
+    batches = length_buckets(texts, batch_size=8, max_batch_tokens=8 * 512)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(texts)))
+    assert set(batches[0]) <= set(range(40, 50))
+    assert len(batches[-1]) > 8
+
+
+def test_parallel_encoding_keeps_input_order():
+    """Rezultat iz pool-a procesa je u redosledu ulaza, isto kao u jednom procesu."""
+    texts = [f"tekst {'x' * (i * 37 % 300)}" for i in range(60)]
+    expected = np.array([[len(f"passage: {text}"), 1.0] for text in texts], dtype=np.float32)
+
+    single = encode_passages_parallel(texts, workers=1, batch_size=4, factory=LengthEncoder)
+    parallel = encode_passages_parallel(texts, workers=2, batch_size=4, factory=LengthEncoder)
+
+    np.testing.assert_array_equal(single, expected)
+    np.testing.assert_array_equal(parallel, expected)
+
+
+def test_get_encoder_loads_once_under_concurrency(monkeypatch):
+    """Warmup nit i prvi upit istovremeno: model se učitava jednom, oba dobijaju isti encoder."""
+    import threading
+    import time
+
+    from apps.ingest import encoders
+
+    created = []
+
+    class SlowEncoder:
+        def __init__(self):
+            time.sleep(0.05)
+            created.append(self)
+
+    monkeypatch.setattr(encoders, "OnnxEncoder", SlowEncoder)
+    monkeypatch.setattr(encoders, "_encoders", {})
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(encoders.get_encoder("onnx"))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1 and all(result is created[0] for result in results)
+
+
+def test_model_artifact_detection(tmp_path):
+    """Lokalni artefakt = direktorijum sa modules.json (SentenceTransformer.save)."""
+    from apps.ingest.encoders import model_artifact_exists
+
+    assert not model_artifact_exists(tmp_path)
+    (tmp_path / "modules.json").write_text("[]")
+    assert model_artifact_exists(tmp_path)
+
+
+def test_onnx_embeddings_match_torch():
+    """ONNX int8 embeddingi su u toleranciji od torch embeddinga (isti indeks radi)."""
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("sentence_transformers")
+    if not (ONNX_MODEL_DIR / ONNX_MODEL_FILE).exists():
+        pytest.skip("ONNX model nije eksportovan (scripts/export_onnx_encoder.py)")
+
+    from apps.ingest.encoders import get_encoder
+
+    torch_vecs = get_encoder("torch").encode(SAMPLE_TEXTS)
+    onnx_vecs = get_encoder("onnx").encode(SAMPLE_TEXTS)
+
+    cosines = np.sum(torch_vecs * onnx_vecs, axis=1)
+    assert cosines.min() >= ONNX_COSINE_TOLERANCE
+
+    # Rangiranje passage-a za upite ostaje isto
+    assert np.array_equal(
+        np.argmax(torch_vecs[:2] @ torch_vecs[2:].T, axis=1),
+        np.argmax(onnx_vecs[:2] @ torch_vecs[2:].T, axis=1)
+    )
+
+
+def test_torch_encoder_warns_on_hub_fallback(tmp_path, monkeypatch, capsys):
+    """Bez lokalnog artefakta model se učitava sa hub-a i to se loguje; sa artefaktom offline."""
+    import sys
+    import types
+    from apps.ingest import encoders
+
+    loaded = []
+    fake = types.SimpleNamespace(SentenceTransformer=lambda name, local_files_only: loaded.append((name, local_files_only)))
+    monkeypatch.setitem(sys.modules, "sentence_transformers", fake)
+    monkeypatch.setattr(encoders, "ENCODER_MODEL_PATH", tmp_path)
+    monkeypatch.delenv("HF_HUB_OFFLINE", raising=False)
+    monkeypatch.delenv("TRANSFORMERS_OFFLINE", raising=False)
+
+    encoders.TorchEncoder()
+    assert loaded[-1] == (encoders.MODEL_NAME, False)
+    assert "UPOZORENJE" in capsys.readouterr().out
+
+    (tmp_path / "modules.json").write_text("[]")
+    encoders.TorchEncoder()
+    assert loaded[-1] == (str(tmp_path), True)
+    assert "UPOZORENJE" not in capsys.readouterr().out
+    assert encoders.ENCODER_MODEL_PATH.is_absolute()
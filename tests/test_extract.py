@@ -0,0 +1,46 @@
+"""
+Test ekstrakcije članka (jedan selectolax prolaz) nad HTML fixture-ima.
+"""
+from pathlib import Path
+
+from apps.functions.extract import extract_article
+from apps.functions.local_scraper import parse_article
+
+FIXTURES = Path(__file__).parent / "fixtures" / "html"
+
+
+def read(name: str) -> str:
+    return (FIXTURES / name).read_text(encoding="utf-8")
+
+
+def test_extract_cbcg_article():
+    """Naslov, page-text body bez navigacije, datum DD/MM/YYYY i jezik iz <html lang>."""
+    article = extract_article(read("saopstenje_me.html"), "https://www.cbcg.me/me/javnost-rada/aktuelno/saopstenja/x")
+
+    assert article["title"] == "Saopštenje sa sjednice Savjeta Centralne banke"
+    assert article["body"].startswith("Savjet Centralne banke Crne Gore održao je danas")
+    assert "Mapa sajta" not in article["body"]
+    assert article["published_at"] == "2025-11-06T00:00:00"
+    assert article["lang"] == "sr"
+
+
+def test_extract_time_datetime_and_url_lang():
+    """<time datetime> kao datum, jezik iz URL-a kad <html lang> nedostaje."""
+    article = extract_article(read("press_release_en.html"), "https://www.cbcg.me/en/javnost-rada/aktuelno/saopstenja/x")
+
+    assert article["published_at"] == "2025-03-14T10:30:00"
+    assert article["lang"] == "en"
+    assert "IMF" not in article["body"] and "International Monetary Fund" in article["body"]
+
+
+def test_fallback_body_and_missing_date():
+    """Bez page-text div-a body dolazi iz <article>; bez datuma published_at je None."""
+    article = extract_article(read("bez_page_text.html"))
+
+    assert article["title"] == "Instant plaćanja u Crnoj Gori od naredne godine"
+    assert "instant plaćanja" in article["body"]
+    assert "<p>" not in article["body"]
+    assert article["published_at"] is None
+
+    doc = parse_article("https://www.cbcg.me/me/x", read("saopstenje_me.html"))
+    assert doc["published_at"] == "2025-11-06T00:00:00"
@@ -0,0 +1,104 @@
+"""
+Test verzionisanih generacija indeksa: manifest, atomičan swap i reload u API procesu.
+"""
+import faiss
+import numpy as np
+
+from apps.ingest import index_generations
+from apps.ingest import local_storage_vector_multilingual as store
+
+
+def make_index(n: int):
+    index = faiss.IndexFlatIP(4)
+    index.add(np.eye(4, dtype='float32')[:n])
+    docs = [{"id": f"d{i}", "title": f"Dokument {i}"} for i in range(n)]
+    return index, docs
+
+
+def use_tmp_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "INDEX_DIR", tmp_path / "index")
+    monkeypatch.setattr(store, "VECTOR_INDEX_FILE", tmp_path / "legacy.faiss")
+    monkeypatch.setattr(store, "DOCS_METADATA_FILE", tmp_path / "legacy.pkl")
+    monkeypatch.setattr(store, "_index_cache", None)
+    monkeypatch.setattr(store, "_rejected", set())
+
+
+def test_publish_and_hot_reload(tmp_path, monkeypatch):
+    """Upiti koriste staru generaciju dok se nova učitava u pozadini, pa prelaze na novu."""
+    use_tmp_index(tmp_path, monkeypatch)
+    first = store.write_generation(*make_index(2))
+    assert index_generations.verify(first)
+    assert len(store._load_index()[1]) == 2
+
+    second = store.write_generation(*make_index(3))
+    assert store.index_files()[0] == second.name
+    assert len(store._load_index()[1]) == 2
+    store._reload_thread.join()
+    assert len(store._load_index()[1]) == 3
+
+    for _ in range(3):
+        store.write_generation(*make_index(1))
+    assert len(index_generations.generations(store.INDEX_DIR)) == index_generations.INDEX_KEEP_GENERATIONS
+
+
+def test_corrupt_generation_is_not_loaded(tmp_path, monkeypatch):
+    """Generacija koja ne odgovara manifestu se preskače; ostaje poslednja ispravna."""
+    use_tmp_index(tmp_path, monkeypatch)
+    store.write_generation(*make_index(2))
+    assert len(store._load_index()[1]) == 2
+
+    broken = store.write_generation(*make_index(3))
+    with open(broken / store.INDEX_NAME, 'ab') as f:
+        f.write(b"x")
+
+    store._load_index()
+    store._reload_thread.join()
+    assert len(store._load_index()[1]) == 2
+
+    monkeypatch.setattr(store, "_index_cache", None)
+    assert len(store._load_index()[1]) == 2
+
+
+def test_live_writer_batches_publishes(tmp_path, monkeypatch):
+    """Prva objava odmah, dalje tek na publish_docs dokumenata (ili force) - ne generacija po flush-u."""
+    use_tmp_index(tmp_path, monkeypatch)
+    monkeypatch.setattr(store, "INDEX_GRANULARITY", "document")
+    store.write_generation(*make_index(1))
+    writer = store.LiveIndexWriter(publish_seconds=300, publish_docs=2)
+    vector = np.eye(4, dtype='float32')[1:2]
+
+    def add_and_flush(i, force=False):
+        writer.add({"id": f"n{i}"}, [None], vector)
+        return writer.flush(force=force)
+
+    assert add_and_flush(1) == 1
+    assert add_and_flush(2) == 0
+    assert add_and_flush(3) == 2
+    assert add_and_flush(4) == 0
+    assert add_and_flush(5, force=True) == 2
+    assert len(index_generations.generations(store.INDEX_DIR)) == 3
+
+
+def test_live_writer_publishes_after_publish_seconds(tmp_path, monkeypatch):
+    """Spor priliv članaka ispod publish_docs se objavljuje kad istekne publish_seconds."""
+    use_tmp_index(tmp_path, monkeypatch)
+    monkeypatch.setattr(store, "INDEX_GRANULARITY", "document")
+    store.write_generation(*make_index(1))
+    now = [1000.0]
+    monkeypatch.setattr(store.time, "monotonic", lambda: now[0])
+    writer = store.LiveIndexWriter(publish_seconds=30, publish_docs=500)
+    vector = np.eye(4, dtype='float32')[1:2]
+
+    def add_and_flush(i, after):
+        now[0] += after
+        writer.add({"id": f"n{i}"}, [None], vector)
+        return writer.flush()
+
+    assert add_and_flush(1, 0) == 1
+    assert add_and_flush(2, 10) == 0
+    assert add_and_flush(3, 10) == 0
+    assert add_and_flush(4, 10) == 3
+    assert add_and_flush(5, 29) == 0
+    assert writer.flush() == 0
+    now[0] += 1
+    assert writer.flush() == 1
@@ -0,0 +1,57 @@
+"""
+Test paralelnog PDF ingest-a (process pool, cache stranica po hash-u fajla, document store).
+"""
+import fitz
+
+from apps.ingest.doc_store import DocStore
+from apps.ingest.ingest_dir import ingest_directory
+
+
+def make_pdf(path, pages):
+    doc = fitz.open()
+    for text in pages:
+        doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+
+def test_ingest_directory_skips_unchanged_files(tmp_path):
+    """Drugi ingest ne parsira nepromijenjene fajlove; izmijenjen fajl zamjenjuje svoje chunk-ove."""
+    pdf_dir = tmp_path / "pdf"
+    pdf_dir.mkdir()
+    make_pdf(pdf_dir / "odluka_o_kamatama.pdf", ["Prva strana odluke.", "Druga strana odluke."])
+    make_pdf(pdf_dir / "izvjestaj.pdf", ["Izvještaj o stabilnosti."])
+
+    store = DocStore(tmp_path / "documents.db", legacy_json=None)
+    kwargs = dict(workers=2, embed=False, store=store, cache_dir=tmp_path / "cache")
+
+    first = ingest_directory(str(pdf_dir), **kwargs)
+    assert first["parsed"] == 2 and first["chunks"] == 3
+    assert store.count() == 3
+    assert {doc["source"] for doc in store.load_all()} == {"pdf:odluka_o_kamatama", "pdf:izvjestaj"}
+
+    second = ingest_directory(str(pdf_dir), **kwargs)
+    assert second["cached"] == 2 and second["unchanged"] == 2 and second["chunks"] == 0
+
+    make_pdf(pdf_dir / "izvjestaj.pdf", ["Izmijenjen izvještaj."])
+    third = ingest_directory(str(pdf_dir), **kwargs)
+    assert third["parsed"] == 1 and third["unchanged"] == 1
+    assert store.count() == 3
+    assert any("Izmijenjen" in doc["content"] for doc in store.load_all())
+
+
+def test_same_named_files_in_subdirectories_do_not_collide(tmp_path):
+    """Isti naziv (i isti sadržaj) u dva poddirektorijuma: odvojeni source-i i chunk-ovi."""
+    pdf_dir = tmp_path / "pdf"
+    for sub in ("2023", "2024"):
+        (pdf_dir / sub).mkdir(parents=True)
+        make_pdf(pdf_dir / sub / "izvjestaj.pdf", ["Godišnji izvještaj."])
+
+    store = DocStore(tmp_path / "documents.db", legacy_json=None)
+    kwargs = dict(workers=2, embed=False, store=store, cache_dir=tmp_path / "cache")
+
+    ingest_directory(str(pdf_dir), **kwargs)
+    assert {doc["source"] for doc in store.load_all()} == {"pdf:2023/izvjestaj", "pdf:2024/izvjestaj"}
+    assert store.count() == 2
+
+    assert ingest_directory(str(pdf_dir), **kwargs)["unchanged"] == 2
@@ -0,0 +1,101 @@
+"""
+Test metadata filtera: type/source/lang/datum se primjenjuju unutar FAISS pretrage (IDSelector).
+"""
+from datetime import datetime
+
+import faiss
+import numpy as np
+import pytest
+
+from apps.ingest import local_storage_vector_multilingual as store
+from apps.ingest.metadata_filter import MetadataBitmaps
+from apps.ingest.quantization import build_index, search_with_rescore
+from tests.test_index_generations import use_tmp_index
+
+DOCS = [
+    {"id": f"pdf-{i}", "type": "pdf", "source": "pdf:SEPA_QnA", "lang": "me", "published_at": None}
+    for i in range(6)
+] + [
+    {"id": "news-2024", "type": "news", "source": "cbcg.me", "lang": "me", "published_at": "2024-11-05T10:00:00"},
+    {"id": "news-2025", "type": "news", "source": "cbcg.me", "lang": "me", "published_at": "2025-03-31T09:00:00"},
+    {"id": "news-en", "type": "news", "source": "cbcg.me", "lang": "en", "published_at": "2025-02-01T09:00:00"},
+]
+
+
+def test_mask_combines_filters():
+    """Vrijednosti istog polja se OR-uju, polja i raspon datuma AND-uju; date_to pokriva cio dan."""
+    bitmaps = MetadataBitmaps(DOCS)
+    ids = lambda filters: [DOCS[i]["id"] for i in np.flatnonzero(bitmaps.mask(filters))]
+
+    assert bitmaps.mask(None) is None
+    assert ids({"type": "news", "lang": ["me", "de"]}) == ["news-2024", "news-2025"]
+    assert ids({"date_from": "2025-01-01", "date_to": "2025-03-31"}) == ["news-2025", "news-en"]
+    assert ids({"source": "nepoznat"}) == []
+    with pytest.raises(ValueError):
+        bitmaps.mask({"autor": "x"})
+
+
+@pytest.mark.parametrize("kind", ["none", "int8", "pq"])
+def test_filtered_search_returns_full_k(kind):
+    """Bliži nedozvoljeni redovi ne troše mjesta - vraća se punih k dozvoljenih (PQ: over-fetch + bitmapa)."""
+    # PQ treba bar PQ_MIN_TRAIN vektora - dopuna bližim pdf redovima
+    extra = 300
+    rows = DOCS + [{**DOCS[0], "id": f"pdf-extra-{i}"} for i in range(extra)]
+    vectors = np.array([[1.0, 0.0]] * 6 + [[0.6, 0.8], [0.0, 1.0], [0.8, 0.6]] + [[1.0, 0.0]] * extra,
+                       dtype='float32')
+    index = build_index(vectors, kind, pq_m=2)
+    assert isinstance(index, faiss.IndexPQ) == (kind == "pq")
+    params, allowed = MetadataBitmaps(rows).search_params({"type": "news"})
+
+    _, ids = search_with_rescore(index, np.array([1.0, 0.0]), 3, vectors=vectors, params=params)
+    assert allowed == 3
+    assert sorted(ids[0].tolist()) == [6, 7, 8]
+
+    # Bez sidecar vektora (bez re-scoring-a) filter važi isto
+    _, ids = search_with_rescore(index, np.array([1.0, 0.0]), 3, params=params)
+    assert sorted(ids[0].tolist()) == [6, 7, 8]
+
+
+def test_search_documents_with_filters(tmp_path, monkeypatch):
+    """Passage index: filter se računa po roditeljskom dokumentu, `since` postaje date_from."""
+    use_tmp_index(tmp_path, monkeypatch)
+    monkeypatch.setattr(store, "_filter_cache", None)
+    monkeypatch.setattr(store, "encode_query", lambda query: np.array([1.0, 0.0], dtype='float32'))
+    vectors = np.array([[1.0, 0.0]] * 6 + [[0.6, 0.8], [0.0, 1.0], [0.8, 0.6]], dtype='float32')
+    index = faiss.IndexFlatIP(2)
+    index.add(vectors)
+    passages = [{"parent": i, "text": doc["id"]} for i, doc in enumerate(DOCS)]
+    store.write_generation(index, {"granularity": "passage", "docs": [dict(d) for d in DOCS], "passages": passages})
+
+    news = store.search_documents("vijesti", k=3, filters={"type": "news"})
+    recent_me = store.search_documents("vijesti", k=3, since=datetime(2025, 1, 1), filters={"lang": "me"})
+
+    assert {doc["id"] for doc in news} == {"news-2024", "news-2025", "news-en"}
+    assert [doc["id"] for doc in recent_me] == ["news-2025"]
+    assert store.search_documents("vijesti", k=3, filters={"source": "nepoznat"}) == []
+
+
+def test_openai_store_filters_use_index_metadata(tmp_path, monkeypatch):
+    """OpenAI index: bitmape su iz metadata indeksa (ne iz document store-a), -1 redovi se preskaču."""
+    import pickle
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    from apps.ingest import local_storage_vector
+
+    vectors = np.array([[1.0, 0.0]] * 6 + [[0.6, 0.8], [0.0, 1.0], [0.8, 0.6]], dtype='float32')
+    index = faiss.IndexFlatIP(2)
+    index.add(vectors)
+    faiss.write_index(index, str(tmp_path / "index.faiss"))
+    with open(tmp_path / "metadata.pkl", 'wb') as f:
+        pickle.dump([{**doc, "doc_id": i} for i, doc in enumerate(DOCS)], f)
+
+    monkeypatch.setattr(local_storage_vector, "VECTOR_INDEX_FILE", tmp_path / "index.faiss")
+    monkeypatch.setattr(local_storage_vector, "DOCS_METADATA_FILE", tmp_path / "metadata.pkl")
+    monkeypatch.setattr(local_storage_vector, "_filter_cache", None)
+    monkeypatch.setattr(local_storage_vector, "get_embedding", lambda query: [1.0, 0.0])
+    # Store je posle build-a izgubio tip - filter i dalje ide po indeksu
+    monkeypatch.setattr(local_storage_vector, "load_documents",
+                        lambda: [{k: v for k, v in doc.items() if k != "type"} for doc in DOCS])
+
+    results = local_storage_vector.search_documents("upit", k=8, filters={"type": "news", "lang": "en"})
+
+    assert [doc["id"] for doc in results] == ["news-en"]
@@ -0,0 +1,63 @@
+"""
+Test passage indeksa: agregacija passage-a po dokumentu i passage-i za keyword pogotke.
+"""
+import faiss
+import numpy as np
+
+from apps.api import retrieval_mock
+from apps.ingest import local_storage_vector_multilingual as store
+from tests.test_index_generations import use_tmp_index
+
+LONG = "Uvodni pasus o banci. " * 80
+
+DOCS = [
+    {"id": "sepa", "title": "SEPA", "content": LONG},
+    {"id": "kamate", "title": "Kamate", "content": LONG},
+]
+PASSAGES = [
+    {"parent": 0, "text": "SEPA uvod"},
+    {"parent": 0, "text": "SEPA instant plaćanja"},
+    {"parent": 0, "text": "SEPA direktno zaduženje"},
+    {"parent": 1, "text": "Kamatne stope"},
+]
+
+
+def _write_index(tmp_path, monkeypatch):
+    use_tmp_index(tmp_path, monkeypatch)
+    monkeypatch.setattr(store, "_doc_passages_cache", None)
+    monkeypatch.setattr(store, "encode_query", lambda query: np.array([1.0, 0.0], dtype='float32'))
+    index = faiss.IndexFlatIP(2)
+    index.add(np.array([[0.9, 0.1], [1.0, 0.0], [0.95, 0.05], [0.0, 1.0]], dtype='float32'))
+    store.write_generation(index, {"granularity": "passage", "docs": [dict(d) for d in DOCS], "passages": PASSAGES})
+
+
+def test_passages_aggregate_per_document(tmp_path, monkeypatch):
+    """Dokument se vraća jednom, sa skorom najboljeg passage-a i najviše MAX_PASSAGES_PER_DOC passage-a."""
+    _write_index(tmp_path, monkeypatch)
+    monkeypatch.setattr(store, "MAX_PASSAGES_PER_DOC", 2)
+
+    results = store.search_documents("instant", k=2)
+
+    assert [doc["id"] for doc in results] == ["sepa", "kamate"]
+    assert results[0]["_passages"] == ["SEPA instant plaćanja", "SEPA direktno zaduženje"]
+    assert results[0]["_score"] > results[1]["_score"]
+
+
+def test_keyword_hits_reuse_indexed_passages(tmp_path, monkeypatch):
+    """Keyword pogodak dobija passage-e iz indeksa (bez chunk-ovanja); neindeksiran dokument se chunk-uje."""
+    _write_index(tmp_path, monkeypatch)
+    store._load_index()
+    chunked = []
+    monkeypatch.setattr(retrieval_mock, "chunk", lambda text: chunked.append(text) or ["novi passage"])
+    monkeypatch.setattr(retrieval_mock, "MAX_PASSAGES_PER_DOC", 1)
+
+    out = retrieval_mock._attach_passages("direktno zaduženje", [
+        {"id": "sepa", "title": "SEPA", "content": LONG},
+        {"id": "novi", "title": "Novi", "content": LONG},
+        {"id": "kratak", "title": "Kratak", "content": "Kratak tekst."},
+    ])
+
+    assert out[0]["_passages"] == ["SEPA direktno zaduženje"]
+    assert out[1]["_passages"] == ["novi passage"]
+    assert "_passages" not in out[2]
+    assert len(chunked) == 1
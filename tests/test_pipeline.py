@@ -0,0 +1,141 @@
+"""
+Test streaming ingest pipeline-a (crawler -> ekstrakcija -> embedding -> index writer).
+"""
+import asyncio
+import functools
+
+import httpx
+import numpy as np
+import pytest
+
+from apps.functions import local_scraper
+from apps.functions.fetch_cache import FetchCache
+from apps.functions.crawler import AsyncCrawler
+from apps.functions.pipeline import Pipeline, _DONE
+from apps.ingest import local_storage_vector_multilingual as vector_store
+from apps.ingest.doc_store import DocStore
+from tests.test_crawler import BASE, fake_site
+
+
+class FakeWriter:
+    available = True
+
+    def __init__(self):
+        self.docs = []
+        self.flushed = 0
+        self.pending = 0
+
+    def add(self, doc, passages, vectors):
+        assert len(passages) == len(vectors)
+        self.docs.append(doc)
+        self.pending += 1
+
+    def flush(self, force=False):
+        self.flushed, self.pending = self.flushed + self.pending, 0
+        return self.flushed
+
+
+def test_pipeline_streams_new_articles_to_index(tmp_path, monkeypatch):
+    """Novi članci idu u bazu i live index; drugi run ih prepoznaje kao nepromijenjene."""
+    crawler = functools.partial(AsyncCrawler, rate_per_host=1000, burst=100, transport=httpx.MockTransport(fake_site))
+    monkeypatch.setattr(local_scraper, "AsyncCrawler", crawler)
+    monkeypatch.setattr(vector_store, "EMBEDDING_CACHE_FILE", tmp_path / "cache.pkl")
+    monkeypatch.setattr(vector_store, "encode_passages",
+                        lambda texts, batch_size=32: np.ones((len(texts), 4), dtype='float32'))
+    store = DocStore(tmp_path / "documents.db", legacy_json=None)
+
+    async def run():
+        writer = FakeWriter()
+        pipeline = Pipeline(store, writer, queue_size=2, embed_batch=2, flush_seconds=0)
+        sections, report = await pipeline.run([BASE])
+        return writer, sections, report
+
+    writer, sections, report = asyncio.run(run())
+
+    assert report["new"] == 5 and report["changed"] == 0 and not report["rebuild_needed"]
+    assert store.count() == 5 and writer.flushed == 5
+    assert report["first_searchable"] is not None
+    assert sections[0][2]["saved"] == 5
+
+    writer, _, report = asyncio.run(run())
+    assert report["unchanged"] == 5 and report["new"] == 0 and writer.docs == []
+
+
+def _patch_site(tmp_path, monkeypatch):
+    crawler = functools.partial(AsyncCrawler, rate_per_host=1000, burst=100, transport=httpx.MockTransport(fake_site))
+    monkeypatch.setattr(local_scraper, "AsyncCrawler", crawler)
+    monkeypatch.setattr(vector_store, "EMBEDDING_CACHE_FILE", tmp_path / "cache.pkl")
+    monkeypatch.setattr(vector_store, "encode_passages",
+                        lambda texts, batch_size=32: np.ones((len(texts), 4), dtype='float32'))
+
+
+def test_write_error_skips_item_and_refetches_next_run(tmp_path, monkeypatch):
+    """Greška upsert-a jednog članka ne blokira pipeline; članak se zaboravlja u fetch cache-u."""
+    _patch_site(tmp_path, monkeypatch)
+    store = DocStore(tmp_path / "documents.db", legacy_json=None)
+    upsert = store.upsert
+    failing = []
+
+    def flaky_upsert(docs):
+        if not failing:
+            failing.append(docs[0]["url"])
+            raise RuntimeError("database is locked")
+        upsert(docs)
+
+    monkeypatch.setattr(store, "upsert", flaky_upsert)
+    fetch_cache = FetchCache(tmp_path / "fetch.json")
+
+    async def run():
+        pipeline = Pipeline(store, FakeWriter(), queue_size=1, embed_batch=1, flush_seconds=0)
+        return await asyncio.wait_for(pipeline.run([BASE], fetch_cache), timeout=10)
+
+    _, report = asyncio.run(run())
+
+    assert report["failed"] == 1 and store.count() == 4
+    assert len(fetch_cache.entries) == 4 and failing[0] not in fetch_cache.entries
+
+
+def test_crashed_stage_cancels_pipeline(tmp_path, monkeypatch):
+    """Pala faza otkazuje crawl i ostale faze umjesto da run visi na punim redovima."""
+    _patch_site(tmp_path, monkeypatch)
+    store = DocStore(tmp_path / "documents.db", legacy_json=None)
+
+    async def broken_embed(self):
+        raise RuntimeError("embed faza pala")
+
+    monkeypatch.setattr(Pipeline, "embed", broken_embed)
+
+    async def run():
+        pipeline = Pipeline(store, FakeWriter(), queue_size=1, embed_batch=1, flush_seconds=0)
+        await asyncio.wait_for(pipeline.run([BASE]), timeout=10)
+
+    with pytest.raises(RuntimeError, match="embed faza pala"):
+        asyncio.run(run())
+
+
+def test_idle_write_queue_publishes_immediately(tmp_path):
+    """Kad red za upis miruje flush interval, writer dobija force=True (ne čeka publish prag)."""
+    class RecordingWriter(FakeWriter):
+        def __init__(self):
+            super().__init__()
+            self.forces = []
+
+        def flush(self, force=False):
+            if self.pending:
+                self.forces.append(force)
+            return super().flush(force)
+
+    store = DocStore(tmp_path / "documents.db", legacy_json=None)
+    writer = RecordingWriter()
+
+    async def run():
+        pipeline = Pipeline(store, writer, flush_seconds=0.05)
+        task = asyncio.create_task(pipeline.write())
+        await pipeline.write_q.put(({"id": "n1", "url": "u1"}, "new", [None], np.ones((1, 4), dtype='float32')))
+        await asyncio.sleep(0.3)
+        assert writer.forces == [True]
+        await pipeline.write_q.put(_DONE)
+        await asyncio.wait_for(task, timeout=5)
+
+    asyncio.run(run())
+    assert writer.flushed == 1 and store.count() == 1
@@ -0,0 +1,88 @@
+"""
+Test preload-a za gunicorn (index učitan u master-u koristi se u fork-ovanom worker-u bez ponovnog
+čitanja) i brzog starta (import API-ja ne povlači teške pakete).
+"""
+import json
+import os
+import subprocess
+import sys
+
+import faiss
+import numpy as np
+import pytest
+
+from apps.api import preload
+from apps.ingest import doc_store, encoders, local_storage_vector_multilingual as store
+from tests.test_index_generations import use_tmp_index
+
+
+def test_memory_usage_reports_rss():
+    """rss je uvijek prisutan; na Linux-u i pss/shared/private iz smaps_rollup."""
+    usage = preload.memory_usage()
+    assert usage["rss"] > 0
+    if os.path.exists("/proc/self/smaps_rollup"):
+        assert 0 < usage["pss"] <= usage["rss"] + 1
+
+
+def test_api_import_defers_heavy_packages():
+    """import apps.api.main ne učitava openai, numpy, faiss ni encoder - to radi warmup ili prvi upit."""
+    code = ("import sys, apps.api.main; print('loaded:' + ','.join(m for m in "
+            "('openai', 'numpy', 'faiss', 'torch', 'sentence_transformers', 'apps.api.retrieval_mock') "
+            "if m in sys.modules))")
+    env = {**os.environ, "AZURE_SEARCH_ENDPOINT": "", "AZURE_SEARCH_API_KEY": ""}
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    assert out.stdout.splitlines()[-1] == "loaded:"
+
+
+def test_worker_threads_split_cpus(monkeypatch):
+    monkeypatch.setattr(preload, "TORCH_THREADS_PER_WORKER", 0)
+    monkeypatch.setattr(preload.os, "cpu_count", lambda: 8)
+    assert preload.worker_threads(4) == 2
+    assert preload.worker_threads(16) == 1
+    monkeypatch.setattr(preload, "TORCH_THREADS_PER_WORKER", 3)
+    assert preload.worker_threads(4) == 3
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork nije dostupan")
+def test_forked_worker_uses_preloaded_index(tmp_path, monkeypatch):
+    """Worker posle fork-a pretražuje index iz master-a; _read_index se u njemu ne poziva."""
+    use_tmp_index(tmp_path, monkeypatch)
+    # preload() otvara i document store - ne smije dirati data/ u repozitorijumu
+    monkeypatch.setattr(doc_store, "get_store",
+                        lambda path=tmp_path / "documents.db": doc_store.DocStore(path, legacy_json=None))
+    monkeypatch.setattr(store, "_filter_cache", None)
+    monkeypatch.setattr(encoders, "ENCODER_BACKEND", "onnx")
+    monkeypatch.setattr(store, "encode_query", lambda query: np.array([1.0, 0.0], dtype='float32'))
+    index = faiss.IndexFlatIP(2)
+    index.add(np.array([[1.0, 0.0], [0.0, 1.0]], dtype='float32'))
+    store.write_generation(index, [{"id": "a", "type": "news"}, {"id": "b", "type": "pdf"}])
+
+    info = preload.preload()
+    assert info["index_rows"] == 2 and info["encoder"] is None
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            preload.after_fork(2)
+            store._read_index = lambda files: (_ for _ in ()).throw(AssertionError("ponovno čitanje"))
+            ids = [doc["id"] for doc in store.search_documents("upit", k=2, filters={"type": "pdf"})]
+            os.write(write_fd, json.dumps(ids).encode())
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    with os.fdopen(read_fd) as f:
+        assert json.loads(f.read()) == ["b"]
+
+
+def test_memory_endpoint_requires_debug_flag(monkeypatch):
+    """GET /memory postoji samo uz DEBUG_ENDPOINTS."""
+    from fastapi.testclient import TestClient
+    from apps.api import main
+
+    client = TestClient(main.app)
+    monkeypatch.setattr(main, "DEBUG_ENDPOINTS", False)
+    assert client.get("/memory").status_code == 404
+    monkeypatch.setattr(main, "DEBUG_ENDPOINTS", True)
+    assert client.get("/memory").json()["rss"] > 0
@@ -0,0 +1,132 @@
+"""
+Test pipelined ingest-a u Azure AI Search protiv lokalnog stand-in REST servera.
+"""
+import importlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fitz
+import pytest
+from azure.core.credentials import AzureKeyCredential
+from azure.search.documents import SearchClient
+
+AZURE_ENV = {
+    "AZURE_SEARCH_ENDPOINT": "http://127.0.0.1",
+    "AZURE_SEARCH_API_KEY": "test",
+    "AZURE_SEARCH_FAQ_INDEX": "faq_sepa",
+    "AZURE_SEARCH_NEWS_INDEX": "news_cbcg",
+    "OPENAI_API_KEY": "test",
+}
+
+
+@pytest.fixture
+def push_to_search(monkeypatch):
+    """push_to_search čita Azure env pri importu; env važi samo za trajanje testa (ne curi u ostale)."""
+    for name, value in AZURE_ENV.items():
+        monkeypatch.setenv(name, value)
+    return importlib.import_module("apps.ingest.push_to_search")
+
+
+class FakeSearchHandler(BaseHTTPRequestHandler):
+    """Minimalni docs/search.index i docs/search.post.search endpoint-i; prvi upload throttle-uje jedan dokument."""
+    docs = {}
+    index_calls = 0
+    reject_uploads = False
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if "docs/search.index" in self.path:
+            cls = type(self)
+            cls.index_calls += 1
+            results = []
+            for i, action in enumerate(body["value"]):
+                if cls.reject_uploads and action["@search.action"] != "delete":
+                    results.append({"key": action["id"], "status": False, "errorMessage": "invalid", "statusCode": 400})
+                    continue
+                if cls.index_calls == 1 and i == 0:
+                    results.append({"key": action["id"], "status": False, "errorMessage": "throttled", "statusCode": 503})
+                    continue
+                if action["@search.action"] == "delete":
+                    cls.docs.pop(action["id"], None)
+                else:
+                    cls.docs[action["id"]] = action
+                results.append({"key": action["id"], "status": True, "errorMessage": None, "statusCode": 200})
+            status = 207 if not all(r["status"] for r in results) else 200
+            self._send(status, {"value": results})
+        else:
+            hits = [{"@search.score": 1.0, "id": doc_id} for doc_id in self.docs]
+            self._send(200, {"value": hits})
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def make_pdf(path, pages):
+    pdf = fitz.open()
+    for text in pages:
+        pdf.new_page().insert_text((72, 72), text)
+    pdf.save(str(path))
+    pdf.close()
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSearchHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, SearchClient(f"http://127.0.0.1:{server.server_port}", "faq_sepa", AzureKeyCredential("test"))
+
+
+def test_ingest_pdf_is_pipelined_and_idempotent(tmp_path, push_to_search):
+    """Throttle-ovan dokument se ponavlja; ponovni ingest ne embeduje i ne duplira ništa."""
+    make_pdf(tmp_path / "sepa.pdf", [f"SEPA pitanje broj {i}. Odgovor na pitanje {i}." for i in range(3)])
+    server, client = start_server()
+
+    embedded = []
+
+    def fake_embed(texts):
+        embedded.extend(texts)
+        return [[0.1, 0.2, 0.3] for _ in texts]
+
+    try:
+        kwargs = dict(search_client=client, embed_fn=fake_embed, batch_size=1, retry_delay=0.01)
+        first = push_to_search.ingest_pdf(str(tmp_path / "sepa.pdf"), **kwargs)
+        assert first["uploaded"] == 3 and first["batches"] == 3
+        assert len(FakeSearchHandler.docs) == 3
+
+        embedded.clear()
+        second = push_to_search.ingest_pdf(str(tmp_path / "sepa.pdf"), **kwargs)
+        assert second["skipped"] == 3 and second["uploaded"] == 0
+        assert embedded == []
+        assert len(FakeSearchHandler.docs) == 3
+    finally:
+        server.shutdown()
+
+
+def test_stale_chunks_kept_when_upload_incomplete(tmp_path, monkeypatch, push_to_search):
+    """Source/naslov su iz naziva fajla; neuspio upload nove verzije ne briše staru."""
+    monkeypatch.setattr(FakeSearchHandler, "docs", {})
+    monkeypatch.setattr(FakeSearchHandler, "index_calls", 1)
+    make_pdf(tmp_path / "kursna_lista.pdf", ["Kursna lista za januar."])
+    server, client = start_server()
+    kwargs = dict(search_client=client, embed_fn=lambda texts: [[0.1] for _ in texts], retry_delay=0.01)
+
+    try:
+        push_to_search.ingest_pdf(str(tmp_path / "kursna_lista.pdf"), **kwargs)
+        old = dict(FakeSearchHandler.docs)
+        assert [(doc["source"], doc["title"]) for doc in old.values()] == [("pdf:kursna_lista", "kursna lista")]
+
+        make_pdf(tmp_path / "kursna_lista.pdf", ["Kursna lista za februar."])
+        monkeypatch.setattr(FakeSearchHandler, "reject_uploads", True)
+        stats = push_to_search.ingest_pdf(str(tmp_path / "kursna_lista.pdf"), **kwargs)
+        assert stats["uploaded"] == 0 and stats["deleted"] == 0
+        assert FakeSearchHandler.docs == old
+    finally:
+        server.shutdown()
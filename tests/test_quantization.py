@@ -0,0 +1,80 @@
+"""
+Test kvantizovanog indeksa i tačnog re-scoring-a.
+"""
+import numpy as np
+import faiss
+import pytest
+
+from apps.ingest.quantization import build_index, index_nbytes, search_with_rescore
+
+
+def _vectors(n=600, d=64):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(n, d)).astype('float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def test_int8_with_rescore_matches_exact_search():
+    """int8 index je ~4x manji, a re-scoring vraća iste top-k kao float32."""
+    vectors = _vectors()
+    exact = build_index(vectors, kind="none")
+    quantized = build_index(vectors, kind="int8")
+
+    assert index_nbytes(quantized) * 3 < index_nbytes(exact)
+
+    hits = 0
+    for query in vectors[:50]:
+        _, truth = exact.search(query.reshape(1, -1), 5)
+        scores, ids = search_with_rescore(quantized, query, 5, vectors=vectors, rescore_factor=4)
+        hits += len(set(ids[0]) & set(truth[0]))
+        assert np.all(np.diff(scores[0]) <= 1e-6)
+
+    assert hits / (50 * 5) >= 0.98
+
+
+def test_fp16_rescore_vectors_keep_recall(monkeypatch):
+    """fp16 sidecar je pola float32 veličine, a re-scoring daje iste top-k; none = bez sidecar-a."""
+    from apps.ingest import local_storage_vector_multilingual as store
+
+    vectors = _vectors()
+    monkeypatch.setattr(store, "QUANTIZATION", "int8")
+    monkeypatch.setattr(store, "RESCORE_DTYPE", "fp16")
+    sidecar = store.rescore_vectors(vectors)
+    assert sidecar.dtype == np.float16 and sidecar.nbytes * 2 == vectors.nbytes
+
+    exact = build_index(vectors, kind="none")
+    quantized = build_index(vectors, kind="int8")
+    hits = 0
+    for query in vectors[:50]:
+        _, truth = exact.search(query.reshape(1, -1), 5)
+        _, ids = search_with_rescore(quantized, query, 5, vectors=sidecar, rescore_factor=4)
+        hits += len(set(ids[0]) & set(truth[0]))
+    assert hits / (50 * 5) >= 0.98
+
+    monkeypatch.setattr(store, "RESCORE_DTYPE", "none")
+    assert store.rescore_vectors(vectors) is None
+
+
+def test_auto_rescore_dtype_skips_sidecar_for_fp16_and_int8(monkeypatch):
+    """auto: uz fp16/int8 index nema sidecar-a (ne bi uštedio memoriju), uz pq je fp16."""
+    from apps.ingest import local_storage_vector_multilingual as store
+
+    vectors = _vectors()
+    monkeypatch.setattr(store, "RESCORE_DTYPE", "auto")
+    for kind, expected in (("none", "none"), ("fp16", "none"), ("int8", "none"), ("pq", "fp16")):
+        monkeypatch.setattr(store, "QUANTIZATION", kind)
+        assert store.rescore_dtype() == expected
+    assert store.rescore_vectors(vectors).dtype == np.float16
+    monkeypatch.setattr(store, "QUANTIZATION", "int8")
+    assert store.rescore_vectors(vectors) is None
+
+    monkeypatch.setattr(store, "RESCORE_DTYPE", "bf16")
+    with pytest.raises(ValueError):
+        store.rescore_dtype()
+
+
+def test_pq_falls_back_to_int8_for_small_corpus():
+    """PQ bez dovoljno vektora za treniranje prelazi na int8."""
+    index = build_index(_vectors(n=100), kind="pq", pq_m=16)
+    assert isinstance(index, faiss.IndexScalarQuantizer)
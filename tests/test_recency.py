@@ -0,0 +1,54 @@
+"""
+Test vremenskih particija: "trenutno" upiti pretražuju samo skorije mjesece (vector i keyword).
+"""
+from datetime import datetime
+
+import faiss
+import numpy as np
+
+from apps.ingest import local_storage, local_storage_vector_multilingual as store
+from apps.ingest.doc_store import DocStore
+from tests.test_index_generations import use_tmp_index
+
+DOCS = [
+    {"id": "old", "title": "Kamatne stope 2023", "content": "Kamatne stope banaka.", "published_at": "2023-05-10T00:00:00"},
+    {"id": "new", "title": "Kamatne stope danas", "content": "Kamatne stope banaka.", "published_at": "2025-03-02T00:00:00"},
+    {"id": "undated", "title": "Kamatne stope", "content": "Kamatne stope banaka."},
+]
+
+
+def test_recent_buckets_roll_over_by_month():
+    """Prozor od 90 dana pokriva mjesece od granice do danas."""
+    assert store.recent_buckets(datetime(2024, 12, 15), now=datetime(2025, 3, 15)) == \
+        ["2024-12", "2025-01", "2025-02", "2025-03"]
+    assert store.month_bucket("2025-03-02T00:00:00") == "2025-03"
+    assert store.month_bucket("") is None
+
+
+def test_vector_search_scoped_to_recent_partitions(tmp_path, monkeypatch):
+    """Stariji dokument bliži upitu ne ulazi u rezultat; traži se samo particija skorijeg mjeseca."""
+    use_tmp_index(tmp_path, monkeypatch)
+    monkeypatch.setattr(store, "_partition_cache", None)
+    monkeypatch.setattr(store, "encode_query", lambda query: np.array([1.0, 0.0], dtype='float32'))
+    vectors = np.array([[1.0, 0.0], [0.6, 0.8], [1.0, 0.0]], dtype='float32')
+    index = faiss.IndexFlatIP(2)
+    index.add(vectors)
+    store.write_generation(index, [dict(doc) for doc in DOCS])
+
+    everything = store.search_documents("kamatne stope", k=3)
+    recent = store.search_documents("kamatne stope", k=3, since=datetime(2025, 1, 1))
+
+    assert {doc["id"] for doc in everything} == {"old", "new", "undated"}
+    assert [doc["id"] for doc in recent] == ["new"]
+    assert list(store._partition_cache[2]) == ["2025-03"]
+
+
+def test_keyword_search_reads_only_recent_range(tmp_path, monkeypatch):
+    """Keyword pretraga sa `since` čita samo raspon po published_at iz baze."""
+    doc_store = DocStore(tmp_path / "documents.db", legacy_json=None)
+    doc_store.upsert(DOCS)
+    monkeypatch.setattr(local_storage, "get_store", lambda: doc_store)
+
+    results = local_storage.search_documents("kamatne stope", k=5, since=datetime(2025, 1, 1))
+
+    assert [doc["id"] for doc in results] == ["new"]
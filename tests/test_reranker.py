@@ -0,0 +1,70 @@
+"""
+Test cross-encoder reranking-a: poredak po skoru, cache parova i fallback kad reranker padne.
+"""
+import types
+from collections import OrderedDict
+
+import pytest
+
+from apps.api import reranker, retrieval_mock
+
+DOCS = [
+    {"title": "Kamate", "content": "Kamatne stope banaka.", "source": "a", "page": 1},
+    {"title": "SEPA", "content": "SEPA instant plaćanja.", "source": "b", "page": 1},
+    {"title": "Zlato", "content": "Zlatne rezerve.", "source": "c", "page": 1},
+]
+
+
+class FakeCrossEncoder:
+    """Skor = broj riječi upita u tekstu; broji parove koji su stvarno ocijenjeni."""
+
+    def __init__(self):
+        self.scored = 0
+
+    def predict(self, pairs, batch_size=16, show_progress_bar=False):
+        self.scored += len(pairs)
+        return [sum(word in text.lower() for word in query.lower().split()) for query, text in pairs]
+
+
+@pytest.fixture
+def model(monkeypatch):
+    fake = FakeCrossEncoder()
+    monkeypatch.setattr(reranker, "get_model", lambda: fake)
+    monkeypatch.setattr(reranker, "_score_cache", OrderedDict())
+    return fake
+
+
+def test_rerank_orders_by_score_and_keeps_top_n(model):
+    results = reranker.rerank("sepa instant", DOCS, top_n=2)
+
+    assert [doc["title"] for doc in results] == ["SEPA", "Kamate"]
+    assert results[0]["_rerank_score"] == 2
+    assert reranker.rerank("sepa", [], top_n=2) == []
+
+
+def test_score_cache_skips_known_pairs(model, monkeypatch):
+    """Ponovljeni parovi se ne ocjenjuju ponovo; cache je ograničen na RERANK_CACHE_SIZE (LRU)."""
+    monkeypatch.setattr(reranker, "RERANK_CACHE_SIZE", 3)
+    reranker.rerank("sepa", DOCS)
+    reranker.rerank("sepa", DOCS)
+    assert model.scored == 3
+
+    reranker.rerank("zlato", DOCS[:1])
+    assert model.scored == 4
+    assert len(reranker._score_cache) == 3
+
+
+def test_retrieve_falls_back_when_rerank_fails(monkeypatch):
+    """Greška reranker-a ne ruši retrieval - ostaje RRF poredak, skraćen na k."""
+    def broken(query, docs, top_n):
+        raise RuntimeError("model nije dostupan")
+
+    monkeypatch.setattr(retrieval_mock, "get_store", lambda: types.SimpleNamespace(count=lambda: 1))
+    monkeypatch.setattr(retrieval_mock, "keyword_search", lambda query, k, since=None: DOCS)
+    monkeypatch.setattr(retrieval_mock, "search_documents", lambda query, k, since=None: [])
+    monkeypatch.setattr(reranker, "RERANK_ENABLED", True)
+    monkeypatch.setattr(reranker, "rerank", broken)
+
+    results = retrieval_mock.retrieve("kamate", k=2)
+
+    assert [doc["title"] for doc in results] == ["Kamate", "SEPA"]
@@ -0,0 +1,75 @@
+"""
+Test async Azure retrieval-a (FAQ + NEWS paralelno, hibridni upit) preko MockTransport-a.
+"""
+import asyncio
+import json
+import types
+
+import httpx
+
+from apps.api import rag_pipeline
+from apps.api.retrieval import AsyncSearchRetriever, openai_embed
+
+SEARCH_DELAY = 0.2
+
+HITS = {
+    "faq_sepa": [
+        {"@search.score": 0.033, "content": "SEPA kreditni transfer.", "title": "SEPA Q&A", "source": "pdf:SEPA_QnA", "page": 3},
+        {"@search.score": 0.011, "content": "SEPA direktno zaduženje.", "title": "SEPA Q&A", "source": "pdf:SEPA_QnA", "page": 5},
+    ],
+    "news_cbcg": [
+        {"@search.score": 7.5, "body": "CBCG je pristupila SEPA zoni.", "title": "Saopštenje", "url": "https://www.cbcg.me/1"},
+    ],
+}
+
+
+def test_faq_and_news_queried_concurrently_with_vector():
+    """Oba indeksa se pretražuju istovremeno; FAQ dobija vectorQueries, embedding upita se kešira."""
+    requests = []
+    embedded = []
+
+    async def search_service(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(SEARCH_DELAY)
+        index = request.url.path.split("/")[2]
+        requests.append((index, json.loads(request.content), request.url.params["api-version"]))
+        return httpx.Response(200, json={"value": HITS[index]})
+
+    def embed(text):
+        embedded.append(text)
+        return [0.1] * 3072
+
+    async def run():
+        retriever = AsyncSearchRetriever(
+            "https://search.test", "key", embed_fn=embed, transport=httpx.MockTransport(search_service)
+        )
+        timings = {}
+        ctx = await retriever.retrieve("SEPA transfer", k=4, timings=timings)
+        await retriever.retrieve("SEPA transfer", k=4)
+        await retriever.aclose()
+        return ctx, timings
+
+    ctx, timings = asyncio.run(run())
+
+    assert timings["total"] < 1.6 * SEARCH_DELAY
+    assert embedded == ["SEPA transfer"]
+    faq_body = next(body for index, body, _ in requests if index == "faq_sepa")
+    assert faq_body["vectorQueries"][0]["fields"] == "content_vector"
+    assert len(faq_body["vectorQueries"][0]["vector"]) == 3072
+    # Skorovi su normalizovani po indeksu: najbolji FAQ i NEWS pogodak prije slabijeg FAQ-a
+    assert [c["page"] for c in ctx] == [3, None, 5]
+
+
+def test_openai_embed_reuses_shared_client(monkeypatch):
+    """Svaki embedding upita ide kroz isti OpenAI klijent (rag_pipeline.get_client), bez novog po pozivu."""
+    calls = []
+
+    def create(model, input):
+        calls.append(input)
+        return types.SimpleNamespace(data=[types.SimpleNamespace(embedding=[0.5] * 3)])
+
+    client = types.SimpleNamespace(embeddings=types.SimpleNamespace(create=create))
+    monkeypatch.setattr(rag_pipeline, "_client", client)
+
+    assert openai_embed("SEPA") == [0.5] * 3
+    assert openai_embed("kurs") == [0.5] * 3
+    assert calls == [["SEPA"], ["kurs"]] and rag_pipeline.get_client() is client
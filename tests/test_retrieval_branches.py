@@ -0,0 +1,94 @@
+"""
+Test paralelnih grana hibridne pretrage (keyword + vector) sa rokovima po grani.
+"""
+import threading
+import time
+import types
+
+from apps.api import retrieval_mock
+
+KEYWORD_DOC = {"title": "SEPA plaćanja", "content": "SEPA kreditni transfer.", "source": "cbcg.me", "page": 1}
+VECTOR_DOC = {"title": "Instant plaćanja", "content": "Instant plaćanja u SEPA zoni.", "source": "cbcg.me", "page": 2}
+
+
+def test_slow_branch_times_out_without_stalling(monkeypatch):
+    """Spora vector grana probija rok; fuzija ide sa keyword rezultatima, timeout je zabilježen."""
+    def slow_vector(query, k, since=None):
+        time.sleep(1.0)
+        return [VECTOR_DOC]
+
+    monkeypatch.setattr(retrieval_mock, "get_store", lambda: types.SimpleNamespace(count=lambda: 1))
+    monkeypatch.setattr(retrieval_mock, "keyword_search", lambda query, k, since=None: [KEYWORD_DOC])
+    monkeypatch.setattr(retrieval_mock, "search_documents", slow_vector)
+    monkeypatch.setattr(retrieval_mock, "VECTOR_TIMEOUT", 0.2)
+    monkeypatch.setattr(retrieval_mock, "is_warm", lambda: True)
+    monkeypatch.setattr(retrieval_mock.reranker, "RERANK_ENABLED", False)
+    before = retrieval_mock.branch_failures["vector:timeout"]
+
+    start = time.perf_counter()
+    results = retrieval_mock.retrieve("SEPA transfer", k=4)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.8
+    assert [doc["title"] for doc in results] == ["SEPA plaćanja"]
+    assert retrieval_mock.branch_failures["vector:timeout"] == before + 1
+
+
+def test_branches_run_concurrently():
+    """Ukupno vrijeme je najduža grana, ne zbir."""
+    def branch(delay, docs):
+        def run():
+            time.sleep(delay)
+            return docs
+        return run
+
+    start = time.perf_counter()
+    out = retrieval_mock._run_branches({
+        "keyword": (branch(0.3, [KEYWORD_DOC]), 2.0),
+        "vector": (branch(0.3, [VECTOR_DOC]), 2.0),
+    })
+
+    assert time.perf_counter() - start < 0.55
+    assert out["keyword"]["status"] == out["vector"]["status"] == "ok"
+    assert out["vector"]["results"] == [VECTOR_DOC]
+
+
+def test_saturated_branch_is_busy_without_blocking_other(monkeypatch):
+    """Zaglavljene vector pretrage zauzmu samo mjesta vector grane; keyword grana radi normalno."""
+    monkeypatch.setattr(retrieval_mock, "RETRIEVAL_WORKERS", 1)
+    monkeypatch.setattr(retrieval_mock, "_branch_pools", {})
+    monkeypatch.setattr(retrieval_mock, "_branch_slots", {})
+    release = threading.Event()
+
+    def stuck():
+        release.wait(5)
+        return [VECTOR_DOC]
+
+    try:
+        first = retrieval_mock._run_branches({"keyword": (lambda: [KEYWORD_DOC], 1.0), "vector": (stuck, 0.1)})
+        assert first["vector"]["status"] == "timeout"
+
+        start = time.perf_counter()
+        second = retrieval_mock._run_branches({"keyword": (lambda: [KEYWORD_DOC], 1.0), "vector": (stuck, 1.0)})
+        assert time.perf_counter() - start < 0.5
+        assert second["keyword"]["results"] == [KEYWORD_DOC]
+        assert second["vector"]["status"] == "busy"
+    finally:
+        release.set()
+
+
+def test_cold_vector_branch_gets_longer_deadline(monkeypatch):
+    """Prvi upit (encoder i index se tek učitavaju) čeka vector granu do COLD roka."""
+    def loading_vector(query, k, since=None):
+        time.sleep(0.3)
+        return [VECTOR_DOC]
+
+    monkeypatch.setattr(retrieval_mock, "get_store", lambda: types.SimpleNamespace(count=lambda: 1))
+    monkeypatch.setattr(retrieval_mock, "keyword_search", lambda query, k, since=None: [])
+    monkeypatch.setattr(retrieval_mock, "search_documents", loading_vector)
+    monkeypatch.setattr(retrieval_mock, "VECTOR_TIMEOUT", 0.1)
+    monkeypatch.setattr(retrieval_mock, "VECTOR_COLD_TIMEOUT", 2.0)
+    monkeypatch.setattr(retrieval_mock, "is_warm", lambda: False)
+    monkeypatch.setattr(retrieval_mock.reranker, "RERANK_ENABLED", False)
+
+    assert [doc["title"] for doc in retrieval_mock.retrieve("instant", k=2)] == ["Instant plaćanja"]
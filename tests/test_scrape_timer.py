@@ -0,0 +1,201 @@
+"""
+Test Azure scrapera: kompletan inkrementalni sync poznatih članaka i dedupe bez ponovnog upload-a.
+"""
+import importlib
+import sys
+import types
+
+import httpx
+import pytest
+from azure.core.exceptions import HttpResponseError
+
+from apps.functions.extract import doc_id_for_url
+
+AZURE_ENV = {
+    "AZURE_SEARCH_ENDPOINT": "http://127.0.0.1",
+    "AZURE_SEARCH_API_KEY": "test",
+    "AZURE_SEARCH_NEWS_INDEX": "news_cbcg",
+}
+
+
+class _FunctionApp:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: (lambda fn: fn)
+
+
+@pytest.fixture
+def scraper(monkeypatch):
+    """
+    Scraper modul sa test env-om; env i stub azure.functions važe samo za trajanje testa.
+
+    scrape_timer/__init__.py registruje Azure Function - bez azure-functions paketa dovoljan je stub dekoratora.
+    """
+    for name, value in AZURE_ENV.items():
+        monkeypatch.setenv(name, value)
+    try:
+        import azure.functions  # noqa: F401
+    except ImportError:
+        monkeypatch.setitem(sys.modules, "azure.functions",
+                            types.SimpleNamespace(FunctionApp=_FunctionApp, TimerRequest=object))
+    return importlib.import_module("apps.functions.scrape_timer.scraper")
+
+ARTICLE = "https://www.cbcg.me/me/javnost-rada/aktuelno/saopstenja/clanak-{}"
+BODY = "Centralna banka Crne Gore saopštava da je platni sistem stabilan i likvidan. " * 4
+
+
+class FakeSearch:
+    """Stand-in za SearchClient: search sa top/filter (published_at ge, id gt)/order_by, upsert i brisanje."""
+
+    def __init__(self, docs, sortable=True):
+        self.docs = {doc["id"]: doc for doc in docs}
+        self.sortable = sortable
+        self.search_calls = []
+        self.uploaded = []
+
+    def search(self, search_text, select, filter=None, order_by=None, top=50, skip=0):
+        self.search_calls.append(filter)
+        if not self.sortable and order_by:
+            raise HttpResponseError(message="Field 'id' is not sortable")
+        assert order_by in (["id asc"], None)
+        # Interni poredak indeksa nije poredak ključeva
+        docs = sorted(self.docs.values(), key=lambda doc: doc["id"], reverse=True)
+        for clause in (filter or "").replace("(", "").replace(")", "").split(" and "):
+            if clause:
+                field, op, value = clause.split(" ", 2)
+                value = value.strip("'")
+                docs = [doc for doc in docs if (doc[field] >= value if op == "ge" else doc[field] > value)]
+        if order_by:
+            docs.sort(key=lambda doc: doc["id"])
+        return [{key: doc.get(key) for key in select} for doc in docs[skip:skip + top]]
+
+    def merge_or_upload_documents(self, docs):
+        self.uploaded.extend(docs)
+        self.docs.update({doc["id"]: doc for doc in docs})
+
+    def delete_documents(self, docs):
+        for doc in docs:
+            self.docs.pop(doc["id"], None)
+
+
+def fake_site(request: httpx.Request) -> httpx.Response:
+    url = str(request.url)
+    if url.endswith("/saopstenja"):
+        links = "".join(f'<a href="{ARTICLE.format(i)}">x</a>' for i in range(3))
+        return httpx.Response(200, text=f"<html><body>{links}</body></html>")
+    return httpx.Response(200, text=f"<html><h1>Saopštenje {url[-1]} za javnost</h1>"
+                                    f"<span class='date'>0{url[-1]}/11/2025</span>"
+                                    f"<div class='page-text'>{BODY} {url[-1]}</div></html>")
+
+
+def test_known_docs_sync_and_dedupe(tmp_path, monkeypatch, scraper):
+    """Pun sync čita sve stranice indeksa; sledeći run je inkrementalan i ne upload-uje poznato."""
+    monkeypatch.setattr(scraper, "KNOWN_DOCS_FILE", tmp_path / "known.json")
+    monkeypatch.setattr(scraper, "FETCH_CACHE_FILE", tmp_path / "fetch.json")
+    monkeypatch.setattr(scraper, "SYNC_PAGE_SIZE", 2)
+    monkeypatch.setattr(scraper.time, "sleep", lambda s: None)
+
+    # Indeks već ima 5 starih članaka (više od jedne stranice sync-a)
+    old = [{"id": f"old_{i}", "url": f"https://www.cbcg.me/old/{i}", "hash": f"h{i}",
+            "published_at": "2024-01-0%dT00:00:00" % (i + 1)} for i in range(5)]
+    search = FakeSearch(old)
+    transport = httpx.MockTransport(fake_site)
+
+    scraper.run_scrape(search=search, transport=transport)
+    assert search.search_calls[0] is None and len(search.search_calls) == 3
+    assert {"old_0", "old_4"} <= set(scraper.KnownDocs(tmp_path / "known.json").docs)
+    assert {doc["id"] for doc in search.uploaded} == {doc_id_for_url(ARTICLE.format(i)) for i in range(3)}
+
+    search.search_calls.clear()
+    search.uploaded.clear()
+    scraper.run_scrape(search=search, transport=transport)
+    assert all(f and f.startswith("published_at ge") for f in search.search_calls)
+    assert search.uploaded == []
+
+
+def test_dedupe_by_url_before_hash(tmp_path, monkeypatch, scraper):
+    """Legacy id za isti URL se re-key-uje i kad je body isti; isti body na drugom URL-u se upload-uje."""
+    monkeypatch.setattr(scraper, "KNOWN_DOCS_FILE", tmp_path / "known.json")
+    monkeypatch.setattr(scraper, "FETCH_CACHE_FILE", tmp_path / "fetch.json")
+    monkeypatch.setattr(scraper.time, "sleep", lambda s: None)
+    _, _, body, digest = scraper.parse_article(fake_site(httpx.Request("GET", ARTICLE.format(0))).text,
+                                               ARTICLE.format(0))
+    legacy = {"id": "uuid-legacy", "url": ARTICLE.format(0), "hash": digest, "published_at": "2025-11-01T00:00:00"}
+    copy = {"id": "other", "url": "https://www.cbcg.me/kopija", "hash": "x", "published_at": "2025-11-01T00:00:00"}
+    search = FakeSearch([legacy, copy])
+
+    scraper.run_scrape(search=search, transport=httpx.MockTransport(fake_site))
+
+    assert doc_id_for_url(ARTICLE.format(0)) in search.docs
+    assert "uuid-legacy" not in search.docs
+    assert len(search.uploaded) == 3
+
+
+def test_known_docs_remove_and_watermark(scraper):
+    """remove() briše i hash (ne blokira ponovni upload); watermark poredi normalizovane datume."""
+    known = scraper.KnownDocs.__new__(scraper.KnownDocs)
+    known.docs, known.watermark, known.full_sync_at = {}, None, None
+    known._reindex()
+
+    known.add("a", None, "h1", "2025-03-01T10:00:00Z")
+    known.add("b", "https://x", "h2", "2025-02-28T23:00:00-05:00")
+    known.add("c", "https://y", "h3", "2025-03-01")
+    assert known.watermark == "2025-03-01T10:00:00"
+    assert known.is_duplicate_body("h1") and not known.is_duplicate_body("h2")
+
+    known.remove("a")
+    assert not known.is_duplicate_body("h1") and "h1" not in known.ids_by_hash
+
+
+def test_fetch_cache_saved_only_after_upload(tmp_path, monkeypatch, scraper):
+    """Pad upload-a ne pamti ETag/hash; odbijeni ključ se preuzima ponovo u sledećem run-u."""
+    monkeypatch.setattr(scraper, "KNOWN_DOCS_FILE", tmp_path / "known.json")
+    monkeypatch.setattr(scraper, "FETCH_CACHE_FILE", tmp_path / "fetch.json")
+    monkeypatch.setattr(scraper.time, "sleep", lambda s: None)
+    transport = httpx.MockTransport(fake_site)
+    rejected = doc_id_for_url(ARTICLE.format(1))
+    attempts = []
+
+    class FailingSearch(FakeSearch):
+        def merge_or_upload_documents(self, docs):
+            raise RuntimeError("Search nedostupan")
+
+    class PartialSearch(FakeSearch):
+        def merge_or_upload_documents(self, docs):
+            attempts.append(sorted(doc["id"] for doc in docs))
+            super().merge_or_upload_documents([doc for doc in docs if doc["id"] != rejected])
+            return [types.SimpleNamespace(key=doc["id"], succeeded=doc["id"] != rejected) for doc in docs]
+
+    try:
+        scraper.run_scrape(search=FailingSearch([]), transport=transport)
+    except RuntimeError:
+        pass
+    assert not (tmp_path / "fetch.json").exists()
+
+    search = PartialSearch([])
+    scraper.run_scrape(search=search, transport=transport)
+    assert len(search.uploaded) == 2
+
+    # Prihvaćeni su u cache-u (nepromijenjeni), odbijeni se šalje ponovo
+    scraper.run_scrape(search=search, transport=transport)
+    assert attempts[-1] == [rejected]
+
+
+def test_sync_falls_back_for_unsortable_index_and_never_aborts(tmp_path, monkeypatch, scraper):
+    """Postojeći indeks bez sortable id-a: sync skip-om; pad sync-a ne prekida scrape."""
+    monkeypatch.setattr(scraper, "KNOWN_DOCS_FILE", tmp_path / "known.json")
+    monkeypatch.setattr(scraper, "FETCH_CACHE_FILE", tmp_path / "fetch.json")
+    monkeypatch.setattr(scraper, "SYNC_PAGE_SIZE", 2)
+    monkeypatch.setattr(scraper.time, "sleep", lambda s: None)
+    old = [{"id": f"old_{i}", "url": f"https://www.cbcg.me/old/{i}", "hash": f"h{i}",
+            "published_at": "2024-01-01T00:00:00"} for i in range(5)]
+
+    known = scraper.KnownDocs(tmp_path / "known.json")
+    assert known.sync(FakeSearch(old, sortable=False)) == 5
+
+    class BrokenSearch(FakeSearch):
+        def search(self, *args, **kwargs):
+            raise HttpResponseError(message="Service unavailable")
+
+    search = BrokenSearch([])
+    scraper.run_scrape(search=search, transport=httpx.MockTransport(fake_site))
+    assert len(search.uploaded) == 3
@@ -0,0 +1,112 @@
+"""
+Test lokalnog Azure AI Search emulatora (oba stila putanja, BM25, filter/orderby, vektori).
+"""
+import asyncio
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+
+from apps.api.retrieval import AsyncSearchRetriever
+from apps.api.search_emulator import create_app, parse_filter, seed_news
+from apps.functions.extract import body_digest, extract_article
+from apps.functions.local_scraper import parse_article
+from apps.ingest import doc_store
+
+FAQ_FIELDS = [
+    {"name": "id", "type": "Edm.String", "key": True},
+    {"name": "title", "type": "Edm.String", "searchable": True},
+    {"name": "content", "type": "Edm.String", "searchable": True},
+    {"name": "source", "type": "Edm.String", "filterable": True},
+    {"name": "page", "type": "Edm.Int32", "filterable": True, "sortable": True},
+    {"name": "content_vector", "type": "Collection(Edm.Single)", "dimensions": 3},
+]
+
+FAQ_DOCS = [
+    {"id": "1", "title": "SEPA", "content": "SEPA kreditni transfer u eurima.", "source": "pdf:SEPA_QnA", "page": 1,
+     "content_vector": [1.0, 0.0, 0.0]},
+    {"id": "2", "title": "SEPA", "content": "Direktno zaduženje za plaćanje računa.", "source": "pdf:SEPA_QnA", "page": 2,
+     "content_vector": [0.0, 1.0, 0.0]},
+    {"id": "3", "title": "Kursna lista", "content": "Kursna lista Centralne banke.", "source": "pdf:Kurs", "page": 7,
+     "content_vector": [0.0, 0.0, 1.0]},
+]
+
+
+def make_client():
+    client = TestClient(create_app())
+    assert client.put("/indexes('faq_sepa')?api-version=2023-11-01",
+                      json={"name": "faq_sepa", "fields": FAQ_FIELDS}).status_code == 201
+    r = client.post("/indexes('faq_sepa')/docs/search.index",
+                    json={"value": [{"@search.action": "mergeOrUpload", **doc} for doc in FAQ_DOCS]})
+    assert r.status_code == 200 and all(item["status"] for item in r.json()["value"])
+    return client
+
+
+def test_bm25_filter_orderby_and_both_path_styles():
+    """BM25 rangira po terminima; filter, orderby, select, top i count rade na obje putanje."""
+    client = make_client()
+
+    hits = client.post("/indexes('faq_sepa')/docs/search.post.search", json={"search": "kreditni transfer"}).json()["value"]
+    assert hits[0]["id"] == "1" and "content_vector" not in hits[0]
+
+    r = client.post("/indexes/faq_sepa/docs/search", json={
+        "search": "*", "filter": "source eq 'pdf:SEPA_QnA' and page ge 1", "orderby": "page desc",
+        "select": "id,page", "top": 1, "count": True,
+    }).json()
+    assert r["value"] == [{"@search.score": 1.0, "id": "2", "page": 2}]
+    assert r["@odata.count"] == 2
+
+    assert client.get("/indexes('faq_sepa')/docs/$count").text == "3"
+    assert client.get("/indexes('faq_sepa')/docs/$count", params={"$filter": "source eq 'pdf:SEPA_QnA'"}).text == "2"
+    assert client.post("/indexes('faq_sepa')/docs/search.index",
+                       json={"value": [{"@search.action": "merge", "id": "404", "page": 1}]}).status_code == 207
+
+
+def test_hybrid_query_through_async_retriever():
+    """AsyncSearchRetriever radi protiv emulatora; vektorski dio upita mijenja poredak (RRF)."""
+    client = make_client()
+    client.post("/indexes/news_cbcg/docs/index", json={"value": [
+        {"@search.action": "upload", "id": "n1", "title": "Saopštenje", "body": "Kursna lista za danas.", "url": "u1"},
+    ]})
+
+    async def run():
+        retriever = AsyncSearchRetriever(
+            "http://emulator", "key", embed_fn=lambda q: [0.0, 0.0, 1.0],
+            transport=httpx.ASGITransport(app=client.app)
+        )
+        ctx = await retriever.retrieve("kursna lista", k=2)
+        await retriever.aclose()
+        return ctx
+
+    ctx = asyncio.run(run())
+
+    assert ctx[0]["page"] == 7
+    assert {c["source"] for c in ctx} >= {"pdf:Kurs", "u1"}
+
+
+def test_filter_parser():
+    """OData podskup: poređenja, and/or/not, zagrade, search.in i '' u stringu."""
+    doc = {"source": "O'Neil", "page": 3, "published_at": "2025-03-01"}
+    assert parse_filter("source eq 'O''Neil' and (page gt 5 or published_at ge '2025-01-01')")(doc)
+    assert parse_filter("not search.in(source, 'a,b')")(doc)
+    assert not parse_filter("page le 2")(doc)
+
+
+def test_seed_news_hash_matches_scraper(tmp_path, monkeypatch):
+    """"hash" u seed-ovanom news indeksu je sha256 punog body-ja, kao u Azure scraper-u."""
+    html = (Path(__file__).parent / "fixtures" / "html" / "saopstenje_me.html").read_text(encoding="utf-8")
+    url = "https://www.cbcg.me/me/x"
+    long_doc = {**parse_article(url, html), "id": "dug", "url": "u2"}
+    long_doc["body_hash"] = body_digest("x" * 5000)
+    long_doc["content"] = "x" * 3000
+    store = doc_store.DocStore(tmp_path / "docs.db", legacy_json=None)
+    store.upsert([parse_article(url, html), long_doc])
+    monkeypatch.setattr(doc_store, "get_store", lambda: store)
+
+    client = TestClient(create_app())
+    assert seed_news(client.app) == 2
+
+    docs = client.app.state.indexes["news_cbcg"].docs
+    scraper_digest = body_digest(extract_article(html, url)["body"])
+    assert docs[parse_article(url, html)["id"]]["hash"] == scraper_digest
+    assert docs["dug"]["hash"] == body_digest("x" * 5000)